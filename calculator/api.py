@@ -0,0 +1,162 @@
+"""시뮬레이션 JSON API
+
+HTML 템플릿 렌더링 없이 계산 결과만 JSON 으로 돌려준다. 공통 옵션:
+
+    format=columnar  거래 기록을 [{열: 값}] 대신 {열: [값, ...]} 로 반환
+    records=0        월별 거래 기록을 빼고 최종 결과만 반환
+    lang=ko          금액을 원화로 입력/출력 (기본 en, 달러)
+
+/api/calculator/rolling/ 은 같은 입력으로 가능한 모든 시작 월의 결과를 한 번에 계산해
+수익률 분포(최소/중앙값/최대/백분위)를 돌려준다. window_months 를 주면 각 시작 월부터
+그 개월 수만큼만 투자한다.
+"""
+import math
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from . import backtest, price_cache, result_cache, timing
+from .forms import InvestmentForm
+from .price_cache import from_day_number
+from .views import EXCHANGE_RATE, increase_view_count, search_stock_data, simulate_investment
+
+
+def query_params(request):
+    """GET 쿼리 또는 POST 폼 값"""
+    return request.POST if request.method == 'POST' else request.GET
+
+
+def wants_records(params):
+    return params.get('records', '1').lower() not in ('0', 'false', 'no')
+
+
+def columnar(records):
+    """거래 기록 리스트를 열 단위 배열로 변환 (열 이름은 첫 기록 기준)"""
+    if not records:
+        return {}
+    return {key: [record.get(key) for record in records] for key in records[0]}
+
+
+def result_response(records, params, **data):
+    """출력 옵션에 맞춰 JSON 응답 생성 (data 는 그대로 포함)"""
+    if wants_records(params):
+        if params.get('format') == 'columnar':
+            data['records'] = columnar(records)
+        else:
+            data['records'] = records
+    return JsonResponse(data)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def calculate(request):
+    """적립식 투자 계산 API (calculate_investment 와 같은 입력 필드)"""
+    params = query_params(request)
+    lang_code = params.get('lang', 'en')
+    is_english = lang_code != 'ko'
+
+    form = InvestmentForm(params)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    ticker = form.cleaned_data['ticker'].upper()
+    increase_view_count(ticker)
+
+    # 한국어인 경우 원화 입력 → 달러로 변환
+    initial_capital = float(form.cleaned_data['initial_capital'])
+    monthly_investment = float(form.cleaned_data['monthly_investment'])
+    if not is_english:
+        initial_capital /= EXCHANGE_RATE
+        monthly_investment /= EXCHANGE_RATE
+
+    update_result, message = search_stock_data(ticker)
+    if update_result is None and "최신" not in message:
+        return JsonResponse({'error': message}, status=502)
+
+    with timing.span(timing.SIMULATION):
+        records, final_result = simulate_investment(
+            ticker, initial_capital, monthly_investment,
+            form.cleaned_data['start_date'], form.cleaned_data['end_date'],
+            is_english, EXCHANGE_RATE
+        )
+    return result_response(records, params, ticker=ticker, final_result=final_result)
+
+
+def rolling_outcomes(ticker, initial_capital, monthly_investment, start_date, end_date,
+                     window_months, exchange_rate):
+    """시작 월별 결과와 분포 요약 (같은 입력과 데이터 버전이면 캐시 사용)
+
+    금액은 exchange_rate 를 곱한 통화 기준 (달러면 1.0).
+    """
+    def compute():
+        series = price_cache.get_price_series(ticker)
+        result = backtest.simulate_rolling_starts(
+            series.days, series.closes, initial_capital, monthly_investment,
+            start_date, end_date, window_months
+        )
+        outcomes = [
+            {
+                'start_date': from_day_number(start).strftime('%Y-%m-%d'),
+                'end_date': from_day_number(end).strftime('%Y-%m-%d'),
+                'profit_rate': None if math.isnan(rate) else round(rate, 2),
+                'final_total_assets': round(assets * exchange_rate, 2),
+                'total_investment': round(invested * exchange_rate, 2),
+            }
+            for start, end, rate, assets, invested in zip(
+                result['start_dates'].tolist(),
+                result['end_dates'].tolist(),
+                result['profit_rate'].tolist(),
+                result['final_total_assets'].tolist(),
+                result['total_investment'].tolist(),
+            )
+        ]
+        return outcomes, backtest.summarize_outcomes(result['profit_rate'])
+
+    params = {
+        'ticker': ticker,
+        'initial_capital': initial_capital,
+        'monthly_investment': monthly_investment,
+        'start_date': start_date,
+        'end_date': end_date,
+        'window_months': window_months,
+        'exchange_rate': exchange_rate,
+    }
+    return result_cache.get_or_compute('rolling', params, [ticker], compute)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def rolling(request):
+    """시작 월을 바꿔 가며 계산한 적립식 투자 결과 분포 API"""
+    params = query_params(request)
+    lang_code = params.get('lang', 'en')
+    exchange_rate = EXCHANGE_RATE if lang_code == 'ko' else 1.0
+
+    form = InvestmentForm(params)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    try:
+        window_months = int(params.get('window_months') or 0) or None
+    except ValueError:
+        return JsonResponse({'errors': {'window_months': ['정수를 입력하세요.']}}, status=400)
+    if window_months is not None and window_months < 1:
+        return JsonResponse({'errors': {'window_months': ['1 이상이어야 합니다.']}}, status=400)
+
+    ticker = form.cleaned_data['ticker'].upper()
+    increase_view_count(ticker)
+
+    update_result, message = search_stock_data(ticker)
+    if update_result is None and "최신" not in message:
+        return JsonResponse({'error': message}, status=502)
+
+    with timing.span(timing.SIMULATION):
+        outcomes, summary = rolling_outcomes(
+            ticker,
+            float(form.cleaned_data['initial_capital']) / exchange_rate,
+            float(form.cleaned_data['monthly_investment']) / exchange_rate,
+            form.cleaned_data['start_date'], form.cleaned_data['end_date'],
+            window_months, exchange_rate
+        )
+    return result_response(outcomes, params, ticker=ticker, summary=summary)
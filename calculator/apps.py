@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CalculatorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'calculator'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import timing
+
+        # 요청별 DB 쿼리 수/시간 측정 (RequestTimingMiddleware 사용 시)
+        connection_created.connect(timing.install_query_wrapper, dispatch_uid='calculator-timing')
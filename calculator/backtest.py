@@ -0,0 +1,310 @@
+"""적립식(DCA) 백테스트 엔진
+
+Django 요청 흐름과 무관하게 티커의 (일수, 종가) 배열만으로 월별 구매 일정,
+보유 수량, 현금, 평가금액, 수익률을 계산한다. 날짜는 1970-01-01 기준 일수.
+"""
+import numpy as np
+
+from .price_cache import from_day_number, to_day_number
+
+
+def investment_schedule(start_date, end_date):
+    """시작일의 일자를 매월 구매일로 하는 구매일 배열 (종료일 이하)
+
+    해당 월에 그 일자가 없으면 (예: 31일) 월말로 맞춘다.
+    """
+    if start_date > end_date:
+        return np.empty(0, dtype=np.int64)
+
+    month_count = (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+    months = np.datetime64(start_date, 'M') + np.arange(month_count)
+    month_starts = months.astype('datetime64[D]')
+    month_ends = (months + 1).astype('datetime64[D]') - 1
+
+    schedule = np.minimum(month_starts + (start_date.day - 1), month_ends).astype(np.int64)
+    return schedule[schedule <= to_day_number(end_date)]
+
+
+def asof_indexes(days, targets):
+    """각 목표일 이전(포함) 마지막 거래일의 인덱스 (없으면 -1)"""
+    return np.searchsorted(days, targets, side='right') - 1
+
+
+def simulate_schedule(prices, valid, initial_capital, monthly_investment):
+    """월별 구매가 배열로 적립식 매수 시뮬레이션
+
+    prices[i] 는 i 번째 달의 구매가, valid[i] 는 가격 데이터 존재 여부.
+    첫 달을 제외하고 가격이 있는 달에만 월적립액을 더한 뒤 살 수 있는 만큼 산다.
+    """
+    month_count = len(prices)
+    contributions = np.where(valid, monthly_investment, 0.0)
+    if month_count:
+        contributions[0] = 0.0
+
+    # 누적 투자금 (순차 누적이라 기존 반복 계산과 동일한 값)
+    total_investment = np.cumsum(np.concatenate(([initial_capital], contributions)))[1:]
+
+    # 현금/수량은 앞 달 결과에 의존하므로 순차 계산 (파이썬 float 연산)
+    cash = initial_capital
+    shares_held = 0.0
+    bought_at, shares_bought, held_after, cash_after = [], [], [], []
+
+    price_list = prices.tolist()
+    for i in np.flatnonzero(valid).tolist():
+        if i > 0:
+            cash += monthly_investment
+        stock_price = price_list[i]
+        shares_to_buy = cash // stock_price
+
+        if shares_to_buy > 0:
+            shares_held += shares_to_buy
+            cash -= shares_to_buy * stock_price
+            bought_at.append(i)
+            shares_bought.append(shares_to_buy)
+            held_after.append(shares_held)
+            cash_after.append(cash)
+
+    bought_at = np.asarray(bought_at, dtype=np.int64)
+    bought_prices = prices[bought_at]
+    held_after = np.asarray(held_after, dtype=np.float64)
+    cash_after = np.asarray(cash_after, dtype=np.float64)
+    invested = total_investment[bought_at]
+
+    stock_value = held_after * bought_prices
+    total_assets = stock_value + cash_after
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit_rate = np.where(invested > 0, ((total_assets - invested) / invested) * 100, 0.0)
+
+    return {
+        'month_index': bought_at,
+        'price': bought_prices,
+        'shares_bought': np.asarray(shares_bought, dtype=np.float64),
+        'shares_held': held_after,
+        'stock_value': stock_value,
+        'cash': cash_after,
+        'total_assets': total_assets,
+        'profit_rate': profit_rate,
+        'final_shares_held': shares_held,
+        'final_cash': cash,
+        'total_investment': float(total_investment[-1]) if month_count else initial_capital,
+    }
+
+
+def simulate_dca(days, closes, initial_capital, monthly_investment, start_date, end_date):
+    """티커 종가 배열로 적립식 투자 시뮬레이션 (금액은 달러 기준)"""
+    schedule = investment_schedule(start_date, end_date)
+    indexes = asof_indexes(days, schedule)
+    valid = indexes >= 0
+    prices = np.where(valid, closes[np.maximum(indexes, 0)] if len(closes) else 0.0, 0.0)
+
+    # 종료일 기준 주가
+    end_index = int(asof_indexes(days, to_day_number(end_date)))
+    end_price = (from_day_number(days[end_index]), float(closes[end_index])) if end_index >= 0 else None
+
+    return simulate_aligned(schedule, prices, valid, end_price, initial_capital, monthly_investment)
+
+
+def simulate_aligned(schedule, prices, valid, end_price, initial_capital, monthly_investment):
+    """구매일별 가격 배열과 종료일 (날짜, 종가)로 적립식 시뮬레이션 (가격 출처와 무관)"""
+    result = simulate_schedule(prices, valid, initial_capital, monthly_investment)
+    result['dates'] = schedule[result['month_index']]
+
+    if end_price:
+        result['end_date_price_day'], result['end_date_price'] = end_price
+    else:
+        result['end_date_price'] = 0
+        result['end_date_price_day'] = None
+
+    return result
+
+
+def build_records(result, ticker, is_english, exchange_rate):
+    """시뮬레이션 결과를 템플릿용 거래 기록 리스트로 변환"""
+    records = []
+    columns = zip(
+        result['dates'].tolist(),
+        result['price'].tolist(),
+        result['shares_bought'].tolist(),
+        result['shares_held'].tolist(),
+        result['stock_value'].tolist(),
+        result['cash'].tolist(),
+        result['total_assets'].tolist(),
+        result['profit_rate'].tolist(),
+    )
+    for day, price, bought, held, stock_value, cash, total_assets, profit_rate in columns:
+        record_data = {
+            'date': from_day_number(day).strftime('%y/%m/%d'),
+            'action': f'{ticker}',
+            'price': round(price, 2),
+            'shares_bought': round(bought, 0),
+            'shares_held': round(held, 0),
+            'stock_value': round(stock_value, 2),
+            'cash': round(cash, 2),
+            'total_assets': round(total_assets, 2),
+            'profit_rate': round(profit_rate, 2),
+            'currency_symbol': '$'
+        }
+
+        # 한국어인 경우 원화로 변환하여 추가
+        if not is_english:
+            record_data.update({
+                'stock_value_krw': round(stock_value * exchange_rate, 0),
+                'cash_krw': round(cash * exchange_rate, 0),
+                'total_assets_krw': round(total_assets * exchange_rate, 0),
+            })
+
+        records.append(record_data)
+
+    return records
+
+
+def build_final_result(result, end_date, is_english, exchange_rate):
+    """시뮬레이션 결과로 최종 요약 생성 (구매 기록이 없으면 None)"""
+    if not len(result['month_index']):
+        return None
+
+    shares_held = result['final_shares_held']
+    total_investment = result['total_investment']
+    end_date_price = result['end_date_price']
+    end_date_price_day = result['end_date_price_day'] or end_date
+
+    final_stock_value = shares_held * end_date_price
+    final_cash = result['final_cash']
+    final_total_assets = final_stock_value + final_cash
+    final_profit_amount = final_total_assets - total_investment
+
+    if total_investment > 0:
+        final_profit_rate = ((final_total_assets - total_investment) / total_investment) * 100
+    else:
+        final_profit_rate = 0.0
+
+    final_result = {
+        # 달러 기준 값
+        'final_stock_value': final_stock_value,
+        'final_cash': final_cash,
+        'final_total_assets': final_total_assets,
+        'final_total_investment': total_investment,
+        'final_profit_amount': final_profit_amount,
+        'final_profit_rate': final_profit_rate,
+        'final_shares_held': shares_held,
+        'end_date_price': end_date_price,
+        'end_date_price_date': end_date_price_day.strftime('%y/%m/%d'),
+        'is_english': is_english,
+        'currency_symbol': '$',
+        'exchange_rate': exchange_rate
+    }
+
+    # 한국어인 경우 원화 값 추가
+    if not is_english:
+        final_result.update({
+            'final_stock_value_krw': final_stock_value * exchange_rate,
+            'final_cash_krw': final_cash * exchange_rate,
+            'final_total_assets_krw': final_total_assets * exchange_rate,
+            'final_total_investment_krw': total_investment * exchange_rate,
+            'final_profit_amount_krw': final_profit_amount * exchange_rate,
+        })
+
+    return final_result
+
+
+DEFAULT_PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+
+def simulate_rolling_starts(days, closes, initial_capital, monthly_investment, start_date, end_date,
+                            window_months=None):
+    """시작 월을 한 달씩 옮겨 가며 적립식 투자를 한 번에 계산
+
+    start_date 의 일자를 구매일로 하여 (없는 달은 월말) start_date ~ end_date 사이 가격이
+    있는 모든 달을 시작 월로 본다. window_months 를 주면 각 시작 월부터 그 개월 수만큼 (마지막 구매일까지),
+    없으면 모두 end_date 까지 투자한다. 월 단위 순차 계산을 시작 월 전체에 대해 배열로
+    동시에 수행하므로 각 시작 월마다 simulate_dca 를 호출한 것과 같은 값을 준다.
+    """
+    schedule = investment_schedule(start_date, end_date)
+    indexes = asof_indexes(days, schedule)
+    valid = indexes >= 0
+    prices = np.where(valid, closes[np.maximum(indexes, 0)] if len(closes) else 0.0, 0.0)
+
+    month_count = len(schedule)
+    starts = np.flatnonzero(valid)
+    if window_months:
+        starts = starts[starts + window_months <= month_count]
+        stops = starts + window_months
+        span = window_months
+    else:
+        stops = np.full(len(starts), month_count, dtype=np.int64)
+        span = month_count - int(starts[0]) if len(starts) else 0
+
+    run_count = len(starts)
+    cash = np.full(run_count, float(initial_capital))
+    shares_held = np.zeros(run_count)
+    total_investment = np.full(run_count, float(initial_capital))
+    purchases = np.zeros(run_count, dtype=np.int64)
+
+    # 시작 월 기준 k 번째 달을 모든 시작 월에 대해 함께 계산 (k 에 대해서만 순차)
+    for k in range(span):
+        month = starts + k
+        active = month < stops
+        if not active.any():
+            break
+        month = np.minimum(month, month_count - 1)
+        buying = active & valid[month]
+        price = np.where(buying, prices[month], 1.0)
+
+        if k > 0:
+            cash = np.where(buying, cash + monthly_investment, cash)
+            total_investment = np.where(buying, total_investment + monthly_investment, total_investment)
+
+        shares_to_buy = np.where(buying, cash // price, 0.0)
+        bought = shares_to_buy > 0
+        shares_held = np.where(bought, shares_held + shares_to_buy, shares_held)
+        cash = np.where(bought, cash - shares_to_buy * price, cash)
+        purchases += bought
+
+    # 종료일 기준 주가 (기간 지정 시 마지막 구매일, 아니면 end_date)
+    if window_months:
+        end_days = schedule[stops - 1]
+    else:
+        end_days = np.full(run_count, to_day_number(end_date), dtype=np.int64)
+    end_indexes = asof_indexes(days, end_days)
+    end_prices = np.where(end_indexes >= 0, closes[np.maximum(end_indexes, 0)] if len(closes) else 0.0, 0.0)
+
+    final_total_assets = shares_held * end_prices + cash
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit_rate = np.where(
+            total_investment > 0,
+            ((final_total_assets - total_investment) / total_investment) * 100,
+            0.0
+        )
+    # 구매 기록이 없는 시작 월은 결과 없음 (simulate_dca 의 최종 결과 None 과 같음)
+    profit_rate = np.where(purchases > 0, profit_rate, np.nan)
+
+    return {
+        'start_dates': schedule[starts],
+        'end_dates': end_days,
+        'final_total_assets': final_total_assets,
+        'final_cash': cash,
+        'final_shares_held': shares_held,
+        'total_investment': total_investment,
+        'profit_rate': profit_rate,
+    }
+
+
+def summarize_outcomes(profit_rate, percentiles=DEFAULT_PERCENTILES):
+    """시작 월별 수익률 분포 요약 (결과 없는 시작 월은 제외)"""
+    rates = profit_rate[~np.isnan(profit_rate)]
+    if not len(rates):
+        return {'count': 0}
+
+    best = int(np.argmax(rates))
+    worst = int(np.argmin(rates))
+    return {
+        'count': int(len(rates)),
+        'min': float(rates[worst]),
+        'median': float(np.median(rates)),
+        'mean': float(np.mean(rates)),
+        'max': float(rates[best]),
+        'positive_ratio': float(np.mean(rates > 0)),
+        'percentiles': {
+            str(p): float(v) for p, v in zip(percentiles, np.percentile(rates, percentiles))
+        },
+    }
@@ -0,0 +1,467 @@
+"""오프라인 성능 벤치마크
+
+합성 주가(수십 년치 영업일 랜덤워크)를 여러 티커에 대해 만들어 저장한 뒤, 계산/수집
+핫패스의 실행 시간(중앙값), 쿼리 수, 최대 메모리(tracemalloc)를 측정한다. 외부 데이터
+제공처 호출은 모두 빈 결과를 돌려주는 대역으로 바꾸고, 결과 캐시와 컬럼형 파일 저장소는
+끄고 측정한다. 벤치마크 데이터는 트랜잭션을 롤백해서 남기지 않는다.
+
+`manage.py benchmark` 로 실행하고, 결과를 기준선 JSON(benchmark_baseline.json)과 비교한다.
+기준선의 측정 조건(티커 수/기간/반복 횟수)이 이번 실행과 다르면 비교하지 않는다. 쿼리 수는
+머신과 무관하므로 항상 비교하고, 실행 시간은 기준선을 만든 머신에서 --timings 를 줄 때만
+비교한다. 쿼리 수가 의도적으로 바뀌는 변경은 기본 옵션으로 `manage.py benchmark --save-baseline`
+을 실행해 기준선을 다시 만들고 함께 커밋한다.
+
+`manage.py benchmark_indexes` 는 설정된 DB 에 수백만 행을 직접 넣고 모델 Meta.indexes 의
+복합 인덱스로 날짜 기준 조회 지연 시간을 잰다. --drop-indexes 를 줄 때만 인덱스를 잠시 지운
+상태와 비교한다 (운영 DB 에서는 쓰지 않음).
+"""
+import json
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from datetime import date, timedelta
+from unittest import mock
+
+import numpy as np
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import ingestion, price_cache
+from .models import StockData
+
+TICKER_PREFIX = 'BM'
+# 인덱스 벤치마크는 트랜잭션 없이 실제로 저장하므로 실제 티커와 겹치지 않는 이름 사용
+INDEX_TICKER_PREFIX = '_IX'
+INDEX_BATCH_SIZE = 5000
+FIXTURE_END = date(2025, 1, 1)
+DEFAULT_THRESHOLD = 1.25  # 기준선보다 25% 넘게 느려지면 실패 (--timings)
+# 이 값이 기준선과 같아야 비교할 수 있음
+META_KEYS = ('tickers', 'years', 'repeat')
+
+# 측정 중에는 결과 캐시/파일 저장소/전고점 저장 설정을 고정
+BENCHMARK_SETTINGS = {
+    'SIMULATION_CACHE_ENABLED': False,
+    'PRICE_STORE_DIR': None,
+    'STOCK2_PERSIST_ALL_TIME_HIGH': True,
+}
+
+
+class Rollback(Exception):
+    """벤치마크 데이터 롤백용"""
+
+
+def benchmark_tickers(count):
+    return [f'{TICKER_PREFIX}{i:03d}' for i in range(count)]
+
+
+def synthetic_history(rng, years, end=FIXTURE_END):
+    """영업일 기준 (날짜 배열, 종가 배열) 랜덤워크 (연 7%, 변동성 20% 수준)"""
+    start = np.datetime64(end, 'D') - np.timedelta64(int(years * 365.25), 'D')
+    days = np.arange(start, np.datetime64(end, 'D'))
+    days = days[np.is_busday(days)]
+
+    returns = rng.normal(0.07 / 252, 0.2 / np.sqrt(252), len(days))
+    closes = np.round(rng.uniform(5, 200) * np.exp(np.cumsum(returns)), 2)
+    return days.astype(object), np.maximum(closes, 0.01)
+
+
+def load_fixtures(tickers, years, seed=0):
+    """티커별 합성 이력을 수집 경로(store_price_rows)로 저장, 총 행 수 반환"""
+    rng = np.random.default_rng(seed)
+    rows_by_ticker = {}
+    for ticker in tickers:
+        dates, closes = synthetic_history(rng, years)
+        rows_by_ticker[ticker] = list(zip(dates.tolist(), closes.tolist()))
+    return sum(ingestion.store_price_rows(rows_by_ticker).values())
+
+
+def stub_upstream():
+    """외부 API 호출을 빈 결과로 대체 (오프라인 실행 보장)"""
+    from stock2 import views as stock2_views
+    from . import views
+
+    empty_frame = mock.Mock(empty=True)
+    return [
+        mock.patch.object(views, 'fetch_yfinance_history', return_value=empty_frame),
+        mock.patch.object(stock2_views, 'fetch_twelve_data', return_value=[]),
+        mock.patch.object(stock2_views, 'fetch_twelve_data_batch', side_effect=lambda tickers: {t: [] for t in tickers}),
+        # 조회수 반영 스레드가 롤백된 벤치마크 티커를 기록하지 않도록
+        mock.patch.object(views, 'increase_view_count'),
+    ]
+
+
+def measure(func, repeat):
+    """실행 시간(ms) 중앙값/최소값, 한 번 실행의 쿼리 수와 최대 메모리(KB)"""
+    func()  # 준비 실행 (가격 캐시 채움)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    with CaptureQueriesContext(connection) as queries:
+        func()
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'queries': len(queries),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def build_cases(tickers):
+    """(이름, 측정 함수) 목록"""
+    import pandas as pd
+    from stock2.models import AllTimeHigh
+    from stock2.views import Stock2ResultView
+    from . import backtest, sync_state
+    from .views import calculate_investment
+
+    main, second, condition = tickers[0], tickers[1 % len(tickers)], tickers[2 % len(tickers)]
+    factory = RequestFactory()
+
+    # 가격 캐시가 빈 티커는 월별 스냅샷을 읽으므로, 캐시 경로 측정용으로 미리 채움
+    for ticker in (main, second, condition):
+        price_cache.get_price_series(ticker)
+
+    def calculator_view(lang):
+        # 한국어는 원화 입력
+        scale = 1400 if lang == 'ko' else 1
+
+        def run():
+            request = factory.post(f'/{lang}/', {
+                'ticker': main,
+                'initial_capital': str(10000 * scale),
+                'monthly_investment': str(1000 * scale),
+                'start_date': '1990-01-15',
+                'end_date': '2024-12-31',
+            })
+            response = calculate_investment(request)
+            assert response.status_code == 200
+        return run
+
+    stock2_view = Stock2ResultView()
+
+    def stock2_simulation():
+        stock2_view.run_investment_simulation(
+            main, second, 10000.0, 700.0, 300.0, date(1990, 1, 15), date(2024, 12, 31),
+            [
+                {'ticker': condition, 'type': 'high', 'percent': 20.0, 'comparison': 'below', 'priority': '1'},
+                {'ticker': second, 'type': 'specific', 'percent': 50.0, 'comparison': 'below', 'priority': '2'},
+            ],
+            'ko'
+        )
+
+    def all_time_high_full():
+        # 매번 처음부터 저장하도록 이전 기록 삭제
+        AllTimeHigh.objects.filter(ticker=condition).delete()
+        sync_state.record_ath(condition, None)
+        stock2_view.update_all_time_high(condition)
+
+    def all_time_high_incremental():
+        stock2_view.update_all_time_high(condition)
+
+    series = price_cache.get_price_series(main)
+    frame = pd.DataFrame(
+        {'Close': series.closes},
+        index=pd.to_datetime(series.days.astype('datetime64[D]')).tz_localize('America/New_York'),
+    )
+
+    def frame_conversion():
+        ingestion.frame_to_rows(frame)
+
+    def rolling_starts():
+        backtest.simulate_rolling_starts(
+            series.days, series.closes, 10000.0, 1000.0, date(1985, 1, 15), date(2024, 12, 31)
+        )
+
+    def cold(func):
+        # 가격 캐시를 비운 상태 (월별 스냅샷 경로), 이후 항목의 캐시도 비우므로 마지막에 측정
+        def run():
+            price_cache.invalidate()
+            func()
+        return run
+
+    return [
+        ('calculate_investment[ko]', calculator_view('ko')),
+        ('calculate_investment[en]', calculator_view('en')),
+        ('stock2.run_investment_simulation', stock2_simulation),
+        ('stock2.update_all_time_high[full]', all_time_high_full),
+        ('stock2.update_all_time_high[incremental]', all_time_high_incremental),
+        ('ingestion.frame_to_rows', frame_conversion),
+        ('backtest.simulate_rolling_starts', rolling_starts),
+        ('calculate_investment[snapshot]', cold(calculator_view('en'))),
+        ('stock2.run_investment_simulation[snapshot]', cold(stock2_simulation)),
+    ]
+
+
+def run(ticker_count=20, years=40, repeat=5, only=None, log=None):
+    """합성 데이터를 만들고 모든 항목을 측정한 결과 {'meta': ..., 'cases': {이름: 측정값}}"""
+    tickers = benchmark_tickers(max(ticker_count, 3))
+    results = {}
+    meta = {}
+
+    with ExitStack() as stack:
+        stack.enter_context(override_settings(**BENCHMARK_SETTINGS))
+        for patcher in stub_upstream():
+            stack.enter_context(patcher)
+
+        try:
+            with transaction.atomic():
+                price_cache.invalidate()
+                started = time.perf_counter()
+                rows = load_fixtures(tickers, years)
+                meta = {
+                    'tickers': len(tickers),
+                    'years': years,
+                    'repeat': repeat,
+                    'rows': rows,
+                    'fixture_load_s': round(time.perf_counter() - started, 2),
+                }
+
+                for name, func in build_cases(tickers):
+                    if only and not any(part in name for part in only):
+                        continue
+                    results[name] = measure(func, repeat)
+                    if log:
+                        log(name, results[name])
+
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            price_cache.invalidate()
+
+    return {'meta': meta, 'cases': results}
+
+
+def meta_mismatches(results, baseline):
+    """측정 조건이 기준선과 다른 항목 [(키, 기준선 값, 이번 값)]"""
+    base_meta = baseline.get('meta', {})
+    return [
+        (key, base_meta.get(key), results['meta'].get(key))
+        for key in META_KEYS if base_meta.get(key) != results['meta'].get(key)
+    ]
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, timings=False):
+    """기준선 대비 쿼리가 늘어났거나 (timings 이면) 느려진 항목 [(이름, 설명)]
+
+    측정 조건이 기준선과 다르면 비교할 수 없으므로 ValueError.
+    """
+    mismatches = meta_mismatches(results, baseline)
+    if mismatches:
+        raise ValueError('측정 조건이 기준선과 다릅니다: ' + ', '.join(
+            f'{key} {base} → {current}' for key, base, current in mismatches
+        ))
+
+    regressions = []
+    for name, current in results['cases'].items():
+        base = baseline.get('cases', {}).get(name)
+        if not base:
+            continue
+        if timings and current['median_ms'] > base['median_ms'] * threshold:
+            regressions.append((name, f"{base['median_ms']}ms → {current['median_ms']}ms"))
+        if current['queries'] > base['queries']:
+            regressions.append((name, f"쿼리 {base['queries']} → {current['queries']}"))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def index_tickers(count):
+    return [f'{INDEX_TICKER_PREFIX}{i:04d}' for i in range(count)]
+
+
+def covering_indexes():
+    """비교 대상 (모델, 인덱스) 목록 (StockData/AllTimeHigh 의 Meta.indexes)"""
+    from stock2.models import AllTimeHigh
+    return [(model, index) for model in (StockData, AllTimeHigh) for index in model._meta.indexes]
+
+
+def existing_index_names(model):
+    with connection.cursor() as cursor:
+        return set(connection.introspection.get_constraints(cursor, model._meta.db_table))
+
+
+def drop_indexes(indexes):
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.remove_index(model, index)
+
+
+def create_indexes(indexes):
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.add_index(model, index)
+
+
+def analyze(models):
+    """쿼리 계획기 통계 갱신 (대량 저장/인덱스 변경 직후)"""
+    statement = 'ANALYZE TABLE {}' if connection.vendor == 'mysql' else 'ANALYZE {}'
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(statement.format(connection.ops.quote_name(model._meta.db_table)))
+
+
+def clear_index_fixtures(tickers):
+    from stock2.models import AllTimeHigh
+    StockData.objects.filter(ticker__in=tickers).delete()
+    AllTimeHigh.objects.filter(ticker__in=tickers).delete()
+
+
+def load_index_fixtures(tickers, years, seed=0, log=None):
+    """티커별 합성 종가와 전고점을 StockData/AllTimeHigh 에 직접 일괄 저장, 총 행 수 반환"""
+    from stock2.models import AllTimeHigh
+
+    rng = np.random.default_rng(seed)
+    now = timezone.now()
+    total = 0
+    for i, ticker in enumerate(tickers, start=1):
+        dates, closes = synthetic_history(rng, years)
+        highs = np.maximum.accumulate(closes)
+        with transaction.atomic():
+            StockData.objects.bulk_create(
+                [StockData(ticker=ticker, date=d, close_price=c, updated_at=now)
+                 for d, c in zip(dates.tolist(), closes.tolist())],
+                batch_size=INDEX_BATCH_SIZE, ignore_conflicts=True
+            )
+            AllTimeHigh.objects.bulk_create(
+                [AllTimeHigh(ticker=ticker, date=d, high_price=h, updated_at=now)
+                 for d, h in zip(dates.tolist(), highs.tolist())],
+                batch_size=INDEX_BATCH_SIZE, ignore_conflicts=True
+            )
+        total += len(dates)
+        if log and i % 50 == 0:
+            log(f'{i}/{len(tickers)} 티커 저장 ({total}행)')
+    return total
+
+
+def index_query_cases():
+    """(이름, (티커, 날짜) → 쿼리셋) 목록, 앱에서 쓰는 조회 형태"""
+    from stock2.models import AllTimeHigh
+
+    return [
+        # 해당 날짜 이전 마지막 종가
+        ('stockdata.as_of', lambda t, d: StockData.objects.filter(ticker=t, date__lte=d)
+            .order_by('-date').values_list('date', 'close_price')[:1]),
+        # 가격 캐시의 전체 이력 로드 (price_cache.query_price_series)
+        ('stockdata.series', lambda t, d: StockData.objects.filter(ticker=t)
+            .order_by('date').values_list('date', 'close_price')),
+        # 마지막 수집 시각 (sync_state 의 Max('updated_at'))
+        ('stockdata.last_updated', lambda t, d: StockData.objects.filter(ticker=t)
+            .order_by('-updated_at').values_list('updated_at', flat=True)[:1]),
+        ('alltimehigh.as_of', lambda t, d: AllTimeHigh.objects.filter(ticker=t, date__lte=d)
+            .order_by('-date').values_list('date', 'high_price')[:1]),
+        ('alltimehigh.latest', lambda t, d: AllTimeHigh.objects.filter(ticker=t)
+            .order_by('-date').values_list('date', 'high_price')[:1]),
+    ]
+
+
+def sample_lookups(tickers, years, samples, seed=1):
+    """무작위 (티커, 날짜) 조회 대상"""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(tickers), samples).tolist()
+    offsets = rng.integers(0, int(years * 365.25), samples).tolist()
+    return [(tickers[i], FIXTURE_END - timedelta(days=offset)) for i, offset in zip(picks, offsets)]
+
+
+def time_index_queries(lookups, only=None, explain=False):
+    """조회 종류별 지연 시간 (ms) 중앙값/p95, explain 이면 첫 조회의 실행 계획 포함
+
+    ORM 값 변환 시간이 섞이지 않도록 미리 만든 SQL 을 커서로 실행해서 잰다.
+    """
+    results = {}
+    for name, build in index_query_cases():
+        if only and not any(part in name for part in only):
+            continue
+
+        statements = [build(ticker, day).query.sql_with_params() for ticker, day in lookups]
+        timings = []
+        with connection.cursor() as cursor:
+            cursor.execute(*statements[0])  # 준비 실행
+            cursor.fetchall()
+            for sql, params in statements:
+                started = time.perf_counter()
+                cursor.execute(sql, params)
+                cursor.fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+
+        results[name] = {
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        }
+        if explain:
+            results[name]['plan'] = build(*lookups[0]).explain()
+    return results
+
+
+def run_index_benchmark(ticker_count=200, years=40, samples=200, compare=False, keep=False,
+                        only=None, explain=False, log=None):
+    """합성 행을 저장하고 인덱스가 있을 때 (compare 면 인덱스를 지운 상태도) 조회 시간 측정
+
+    {'meta': ..., 'without': {이름: 측정값}, 'with': {이름: 측정값}} 반환 ('without' 은
+    compare 일 때만). 측정이 끝나면 (keep 이 아니면) 합성 행을 지운다.
+    """
+    from stock2.models import AllTimeHigh
+
+    indexes = covering_indexes()
+    missing = [
+        index.name for model, index in indexes if index.name not in existing_index_names(model)
+    ]
+    if missing:
+        raise ValueError(f"인덱스가 없습니다 ({', '.join(missing)}). migrate 를 먼저 실행하세요.")
+
+    tickers = index_tickers(ticker_count)
+    lookups = sample_lookups(tickers, years, samples)
+    results = {}
+
+    clear_index_fixtures(tickers)
+    try:
+        started = time.perf_counter()
+        rows = load_index_fixtures(tickers, years, log=log)
+        results['meta'] = {
+            'vendor': connection.vendor,
+            'tickers': len(tickers),
+            'years': years,
+            'rows': rows,
+            'stockdata_rows': StockData.objects.count(),
+            'samples': samples,
+            'fixture_load_s': round(time.perf_counter() - started, 2),
+        }
+
+        if compare:
+            drop_indexes(indexes)
+            try:
+                analyze([StockData, AllTimeHigh])
+                results['without'] = time_index_queries(lookups, only, explain)
+            finally:
+                create_indexes(indexes)
+
+        analyze([StockData, AllTimeHigh])
+        results['with'] = time_index_queries(lookups, only, explain)
+    finally:
+        if not keep:
+            clear_index_fixtures(tickers)
+
+    return results
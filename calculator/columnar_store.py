@@ -0,0 +1,93 @@
+"""티커별 컬럼형 종가 파일 저장소 (선택 사항)
+
+settings.PRICE_STORE_DIR 를 지정하면 수집 경로가 StockData 와 함께 티커마다 파일
+하나를 쓰고, 시뮬레이션은 이 파일을 읽기 전용 메모리 맵으로 연다. 여러 gunicorn
+워커가 같은 파일을 OS 페이지 캐시로 공유하므로 워커마다 사본을 들거나 DB를 읽지 않는다.
+
+파일 형식 (리틀 엔디언):
+    헤더 16바이트: 매직 b'PXC1', 예약 uint32, 행 수 uint64
+    int32 일수[n] (1970-01-01 기준), 8바이트 경계까지 패딩
+    float64 종가[n]
+"""
+import os
+import re
+import struct
+import tempfile
+
+import numpy as np
+from django.conf import settings
+
+MAGIC = b'PXC1'
+HEADER = struct.Struct('<4sIQ')
+FILE_SUFFIX = '.prices'
+
+_unsafe_chars = re.compile(r'[^A-Za-z0-9._^-]')
+
+
+def store_dir():
+    """저장소 디렉터리 (설정하지 않으면 None → 사용 안 함)"""
+    return getattr(settings, 'PRICE_STORE_DIR', None)
+
+
+def is_enabled():
+    return bool(store_dir())
+
+
+def path_for(ticker):
+    return os.path.join(store_dir(), _unsafe_chars.sub('_', ticker) + FILE_SUFFIX)
+
+
+def _closes_offset(count):
+    return HEADER.size + (count * 4 + 7) // 8 * 8
+
+
+def write_series(ticker, days, closes):
+    """티커 파일을 임시 파일로 쓴 뒤 원자적으로 교체 (열려 있는 메모리 맵은 이전 파일 유지)"""
+    directory = store_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    days = np.ascontiguousarray(days, dtype='<i4')
+    closes = np.ascontiguousarray(closes, dtype='<f8')
+    count = len(days)
+    padding = _closes_offset(count) - HEADER.size - days.nbytes
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, 0, count))
+            f.write(days.tobytes())
+            f.write(b'\0' * padding)
+            f.write(closes.tobytes())
+        os.replace(temp_path, path_for(ticker))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def file_version(ticker):
+    """파일 변경 시각 (ns), 파일이 없으면 None"""
+    try:
+        return os.stat(path_for(ticker)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def read_series(ticker):
+    """(일수, 종가, 파일 버전) 메모리 맵 배열, 파일이 없거나 형식이 다르면 None"""
+    path = path_for(ticker)
+    try:
+        version = os.stat(path).st_mtime_ns
+        mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if len(mapped) < HEADER.size:
+        return None
+    magic, _, count = HEADER.unpack(mapped[:HEADER.size].tobytes())
+    if magic != MAGIC or len(mapped) < _closes_offset(count) + count * 8:
+        return None
+
+    days = np.frombuffer(mapped, dtype='<i4', count=count, offset=HEADER.size)
+    closes = np.frombuffer(mapped, dtype='<f8', count=count, offset=_closes_offset(count))
+    return days, closes, version
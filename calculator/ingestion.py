@@ -0,0 +1,101 @@
+"""가져온 주가 데이터를 StockData 에 저장하는 공통 경로"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import columnar_store, metrics, price_cache, snapshots, sync_state
+from .models import StockData
+
+BULK_BATCH_SIZE = 1000
+
+
+def store_price_rows(rows_by_ticker):
+    """티커별 [(날짜, 종가)] 를 한 트랜잭션에서 일괄 저장
+
+    이미 있는 (ticker, date) 는 건너뛰고, 티커별 수집 상태(TickerSyncState)를 갱신한 뒤
+    저장한 티커의 캐시는 무효화한다 (컬럼형 저장소가 켜져 있으면 티커 파일도 다시 씀).
+    월별 스냅샷은 새 데이터가 영향을 주는 달부터 다시 계산한다.
+    티커별 저장 건수(중복 포함 시도 건수)를 반환한다.
+    """
+    now = timezone.now()
+    new_data = [
+        StockData(ticker=ticker, date=date, close_price=close_price, updated_at=now)
+        for ticker, rows in rows_by_ticker.items()
+        for date, close_price in rows
+    ]
+
+    with transaction.atomic():
+        if new_data:
+            StockData.objects.bulk_create(new_data, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+            metrics.ROWS_INGESTED.inc(len(new_data))
+        for ticker, rows in rows_by_ticker.items():
+            sync_state.record_ingestion(ticker, rows, now)
+
+    for ticker, rows in rows_by_ticker.items():
+        if rows:
+            price_cache.invalidate(ticker)
+            if columnar_store.is_enabled():
+                rebuild_columnar_file(ticker)
+            if snapshots.is_enabled():
+                snapshots.rebuild(ticker, since=min(date for date, _ in rows))
+
+    return {ticker: len(rows) for ticker, rows in rows_by_ticker.items()}
+
+
+def mark_fetched(ticker):
+    """새 데이터는 없지만 제공처에서 확인을 마쳤음을 기록"""
+    sync_state.record_ingestion(ticker, [])
+
+
+def rebuild_columnar_file(ticker):
+    """DB의 전체 이력으로 티커의 컬럼형 파일을 다시 씀"""
+    series = price_cache.query_price_series(ticker)
+    if len(series):
+        columnar_store.write_series(ticker, series.days, series.closes)
+    return len(series)
+
+
+def frame_to_rows(hist, latest_date=None):
+    """yfinance 가격 DataFrame → [(날짜, 종가)] (행 단위 반복 없이 열 연산으로 변환)
+
+    latest_date 가 있으면 그 이후 날짜만 남긴다.
+    """
+    if hist is None or hist.empty or 'Close' not in hist:
+        return []
+
+    closes = hist['Close'].dropna()
+    dates = closes.index.date
+    values = closes.to_numpy(dtype=float)
+
+    if latest_date is not None:
+        mask = dates > latest_date
+        dates = dates[mask]
+        values = values[mask]
+
+    return list(zip(dates.tolist(), values.tolist()))
+
+
+def latest_dates(tickers):
+    """티커별 저장된 마지막 날짜 {티커: 날짜} (수집 상태 기본키 조회)"""
+    return {
+        ticker: state.last_price_date
+        for ticker, state in sync_state.get_states(tickers).items()
+    }
+
+
+def fetch_window(ticker):
+    """증분 수집 범위 (마지막 저장 날짜, 시작일), 처음이면 (None, None)
+
+    이미 최신이면 수집 시각만 갱신하고 None 반환.
+    """
+    latest_date = latest_dates([ticker]).get(ticker)
+    if not latest_date:
+        return None, None
+
+    # 마지막 데이터 다음날부터 최신 데이터만 가져오기 (시작일이 미래면 가져올 것이 없음)
+    start_date = latest_date + timedelta(days=1)
+    if start_date > timezone.now().date():
+        mark_fetched(ticker)
+        return None
+    return latest_date, start_date
@@ -0,0 +1,70 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator import benchmarks
+
+
+def default_baseline_path():
+    """BENCHMARK_BASELINE 설정, 없으면 프로젝트 루트의 benchmark_baseline.json"""
+    return getattr(settings, 'BENCHMARK_BASELINE', None) or os.path.join(
+        getattr(settings, 'BASE_DIR', '.'), 'benchmark_baseline.json'
+    )
+
+
+class Command(BaseCommand):
+    help = '합성 주가 데이터로 계산/수집 핫패스 성능 측정 (오프라인, 기준선 비교)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickers', type=int, default=20, help='합성 티커 수')
+        parser.add_argument('--years', type=int, default=40, help='티커별 이력 기간 (년)')
+        parser.add_argument('--repeat', type=int, default=5, help='항목별 반복 횟수')
+        parser.add_argument('--only', nargs='*', help='이름에 이 문자열이 들어간 항목만 측정')
+        parser.add_argument('--baseline', default=default_baseline_path(), help='기준선 JSON 경로')
+        parser.add_argument('--save-baseline', action='store_true', help='이번 결과를 기준선으로 저장')
+        parser.add_argument('--timings', action='store_true',
+                            help='실행 시간도 기준선과 비교 (기준선을 만든 머신에서만 의미 있음)')
+        parser.add_argument('--threshold', type=float, default=benchmarks.DEFAULT_THRESHOLD,
+                            help='--timings 에서 기준선 대비 허용 배수 (기본 1.25)')
+
+    def handle(self, *args, **options):
+        def log(name, result):
+            self.stdout.write(
+                f"{name:<42} {result['median_ms']:>10.2f}ms (min {result['min_ms']:.2f})  "
+                f"쿼리 {result['queries']:>4}  메모리 {result['peak_kb']:>9.1f}KB"
+            )
+
+        results = benchmarks.run(
+            ticker_count=options['tickers'], years=options['years'], repeat=options['repeat'],
+            only=options['only'], log=log
+        )
+        meta = results['meta']
+        self.stdout.write(
+            f"합성 데이터: {meta['tickers']}개 티커 x {meta['years']}년, {meta['rows']}행 "
+            f"(저장 {meta['fixture_load_s']}s)"
+        )
+
+        path = options['baseline']
+        if options['save_baseline']:
+            benchmarks.save_baseline(path, results)
+            self.stdout.write(self.style.SUCCESS(f'기준선 저장: {path}'))
+            return
+
+        if not os.path.exists(path):
+            self.stdout.write(f'기준선 없음 ({path}), --save-baseline 으로 만들 수 있습니다.')
+            return
+
+        try:
+            regressions = benchmarks.compare(
+                results, benchmarks.load_baseline(path), options['threshold'], options['timings']
+            )
+        except ValueError as e:
+            self.stderr.write(f'{e} (기준선과 같은 --tickers/--years/--repeat 로 실행해야 비교합니다)')
+            return
+        if regressions:
+            for name, detail in regressions:
+                self.stderr.write(f'{name}: {detail}')
+            raise CommandError(f'{len(regressions)}개 항목이 기준선보다 나빠졌습니다.')
+
+        self.stdout.write(self.style.SUCCESS(f'기준선({path}) 대비 이상 없음'))
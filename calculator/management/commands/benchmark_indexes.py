@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator import benchmarks
+
+
+class Command(BaseCommand):
+    help = ('설정된 DB 에 합성 행을 넣고 복합 인덱스로 날짜 기준 조회 지연 시간 측정 '
+            '(--drop-indexes 를 주면 인덱스를 잠시 지운 상태와 비교)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickers', type=int, default=200, help='합성 티커 수 (티커당 약 250행/년)')
+        parser.add_argument('--years', type=int, default=40, help='티커별 이력 기간 (년)')
+        parser.add_argument('--samples', type=int, default=200, help='조회 종류별 무작위 조회 횟수')
+        parser.add_argument('--only', nargs='*', help='이름에 이 문자열이 들어간 조회만 측정')
+        parser.add_argument('--drop-indexes', action='store_true',
+                            help='인덱스를 잠시 지운 상태와 비교 (개발/검증용 DB 에서만, 중단되면 인덱스가 없는 채로 남을 수 있음)')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='--drop-indexes 확인 질문을 하지 않음')
+        parser.add_argument('--keep', action='store_true', help='측정 후 합성 행을 지우지 않음')
+        parser.add_argument('--explain', action='store_true', help='조회별 실행 계획 출력')
+
+    def handle(self, *args, **options):
+        if options['drop_indexes'] and options['interactive']:
+            names = ', '.join(index.name for _, index in benchmarks.covering_indexes())
+            answer = input(
+                f'{names} 인덱스를 지웠다가 다시 만듭니다. 서비스 중인 DB 라면 중단하세요. 계속하려면 yes 입력: '
+            )
+            if answer != 'yes':
+                raise CommandError('취소했습니다.')
+
+        try:
+            results = benchmarks.run_index_benchmark(
+                ticker_count=options['tickers'], years=options['years'], samples=options['samples'],
+                compare=options['drop_indexes'], keep=options['keep'], only=options['only'],
+                explain=options['explain'], log=self.stdout.write
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        meta = results['meta']
+        self.stdout.write(
+            f"{meta['vendor']}: 합성 {meta['rows']}행 x 2 테이블 ({meta['tickers']}개 티커 x {meta['years']}년, "
+            f"저장 {meta['fixture_load_s']}s), StockData 전체 {meta['stockdata_rows']}행"
+        )
+
+        without = results.get('without', {})
+        self.stdout.write(f"{'조회':<24} {'인덱스 없음 (중앙값/p95)':>26} {'인덱스 (중앙값/p95)':>24} {'배수':>7}")
+        for name, current in results['with'].items():
+            before = without.get(name)
+            before_text = f"{before['median_ms']:.3f} / {before['p95_ms']:.3f}ms" if before else '-'
+            ratio = f"{before['median_ms'] / current['median_ms']:.1f}x" if before and current['median_ms'] else '-'
+            after_text = f"{current['median_ms']:.3f} / {current['p95_ms']:.3f}ms"
+            self.stdout.write(f"{name:<24} {before_text:>26} {after_text:>24} {ratio:>7}")
+
+        if options['explain']:
+            for phase in ('without', 'with'):
+                for name, current in results.get(phase, {}).items():
+                    self.stdout.write(f'\n[{phase}] {name}\n{current["plan"]}')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator import columnar_store, ingestion, sync_state
+
+
+class Command(BaseCommand):
+    help = 'StockData 로 티커별 컬럼형 종가 파일(PRICE_STORE_DIR) 생성'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tickers', nargs='*', help='파일을 만들 티커 (생략 시 저장된 모든 티커)')
+
+    def handle(self, *args, **options):
+        if not columnar_store.is_enabled():
+            raise CommandError('PRICE_STORE_DIR 설정이 없습니다.')
+
+        tickers = [t.upper() for t in options['tickers']] or sync_state.known_tickers()
+
+        total = 0
+        for ticker in tickers:
+            rows = ingestion.rebuild_columnar_file(ticker)
+            total += rows
+            self.stdout.write(f'{ticker}: {rows}행')
+
+        self.stdout.write(self.style.SUCCESS(f'{columnar_store.store_dir()} 에 {total}행 저장'))
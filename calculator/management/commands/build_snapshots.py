@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from calculator import snapshots, sync_state
+
+
+class Command(BaseCommand):
+    help = 'StockData 로 티커별 월별 투자일 스냅샷(MonthlyPriceSnapshot) 생성/갱신'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tickers', nargs='*', help='스냅샷을 만들 티커 (생략 시 저장된 모든 티커)')
+        parser.add_argument('--full', action='store_true', help='이미 반영된 달도 처음부터 다시 계산')
+
+    def handle(self, *args, **options):
+        tickers = [t.upper() for t in options['tickers']] or sync_state.known_tickers()
+
+        total = 0
+        for ticker in tickers:
+            rows = snapshots.rebuild(ticker, full=options['full'])
+            total += rows
+            self.stdout.write(f'{ticker}: {rows}행')
+
+        self.stdout.write(self.style.SUCCESS(f'스냅샷 {total}행 저장'))
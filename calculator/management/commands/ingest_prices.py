@@ -0,0 +1,81 @@
+import time
+from datetime import timedelta
+
+import yfinance as yf
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from calculator import ingestion
+from calculator.models import TickerViewCount
+
+
+class Command(BaseCommand):
+    help = 'yfinance 에서 여러 티커의 주가를 묶음으로 내려받아 저장'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tickers', nargs='*', help='수집할 티커')
+        parser.add_argument('--all', action='store_true', help='TickerViewCount 에 있는 모든 티커')
+        parser.add_argument('--batch-size', type=int, default=50, help='한 번에 내려받을 티커 수')
+        parser.add_argument('--full', action='store_true', help='저장된 데이터와 상관없이 전체 기간 수집')
+
+    def handle(self, *args, **options):
+        tickers = [t.upper() for t in options['tickers']]
+        if options['all']:
+            tickers += list(TickerViewCount.objects.values_list('ticker', flat=True))
+        tickers = sorted(set(tickers))
+
+        if not tickers:
+            raise CommandError('티커를 지정하거나 --all 을 사용하세요.')
+
+        latest = {} if options['full'] else ingestion.latest_dates(tickers)
+        today = timezone.now().date()
+
+        # 처음 수집하는 티커(전체 기간)와 증분 수집 티커를 따로 묶음
+        new_tickers = [t for t in tickers if t not in latest]
+        known_tickers = [t for t in tickers if t in latest and latest[t] + timedelta(days=1) <= today]
+
+        totals = {'rows': 0, 'download': 0.0, 'convert': 0.0, 'write': 0.0}
+        batch_size = options['batch_size']
+
+        for group_tickers in (new_tickers, known_tickers):
+            for i in range(0, len(group_tickers), batch_size):
+                self.ingest_batch(group_tickers[i:i + batch_size], latest, totals)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(tickers)}개 티커, {totals['rows']}행 저장 "
+            f"(다운로드 {totals['download']:.2f}s, 변환 {totals['convert']:.3f}s, 저장 {totals['write']:.2f}s)"
+        ))
+
+    def ingest_batch(self, batch, latest, totals):
+        started = time.perf_counter()
+        if batch[0] in latest:
+            start = min(latest[t] for t in batch) + timedelta(days=1)
+            frame = yf.download(batch, start=start, group_by='ticker', auto_adjust=True,
+                                threads=True, progress=False)
+        else:
+            frame = yf.download(batch, period='max', group_by='ticker', auto_adjust=True,
+                                threads=True, progress=False)
+        totals['download'] += time.perf_counter() - started
+
+        if frame is None or frame.empty:
+            self.stdout.write(f"{', '.join(batch)}: 데이터 없음")
+            return
+
+        for ticker in batch:
+            started = time.perf_counter()
+            if ticker in frame.columns.get_level_values(0):
+                hist = frame[ticker]
+            elif len(batch) == 1:
+                hist = frame
+            else:
+                hist = None
+            rows = ingestion.frame_to_rows(hist, latest.get(ticker))
+            converted = time.perf_counter()
+
+            # 티커마다 한 트랜잭션, 큰 묶음의 다중 행 INSERT
+            ingestion.store_price_rows({ticker: rows})
+            totals['convert'] += converted - started
+            totals['write'] += time.perf_counter() - converted
+            totals['rows'] += len(rows)
+
+            self.stdout.write(f"{ticker}: {len(rows)}행")
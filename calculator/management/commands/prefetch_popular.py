@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from calculator import refresh, warmup
+
+
+class Command(BaseCommand):
+    help = '조회수 상위 티커 중 오래된 것을 제공처에서 미리 갱신 (가격 캐시 예열은 웹 워커가 함)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='갱신할 티커 수 (기본: PRICE_CACHE_WARMUP_TICKERS 설정)')
+        parser.add_argument('--source', choices=[refresh.SOURCE_YFINANCE, refresh.SOURCE_TWELVE_DATA],
+                            help='데이터 제공처 (기본: PRICE_REFRESH_SOURCE 설정)')
+        parser.add_argument('--force', action='store_true', help='최신 데이터여도 갱신')
+
+    def handle(self, *args, **options):
+        tickers = warmup.top_tickers(options['limit'])
+        if not tickers:
+            self.stdout.write('조회 기록이 있는 티커가 없습니다.')
+            return
+
+        refreshed = refresh.refresh_stale(tickers, options['source'], options['force'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"상위 {len(tickers)}개 티커 중 {refreshed}개 갱신: {', '.join(tickers)}"))
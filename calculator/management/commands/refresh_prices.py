@@ -0,0 +1,57 @@
+import time
+from datetime import datetime, time as dt_time
+from zoneinfo import ZoneInfo
+
+from django.core.management.base import BaseCommand
+
+from calculator import refresh, warmup
+
+MARKET_TIMEZONE = ZoneInfo('America/New_York')
+# 미국 장 마감(16:00) 후 데이터가 제공처에 반영될 시간을 두고 갱신
+DEFAULT_REFRESH_AT = '17:30'
+
+
+class Command(BaseCommand):
+    help = '주가 데이터 갱신 (대기 중인 요청 처리 + 오래된 티커 갱신). --loop 로 상주 워커 실행'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tickers', nargs='*', help='갱신할 티커 (생략 시 저장된 모든 티커)')
+        parser.add_argument('--source', choices=[refresh.SOURCE_YFINANCE, refresh.SOURCE_TWELVE_DATA],
+                            help='데이터 제공처 (기본: PRICE_REFRESH_SOURCE 설정)')
+        parser.add_argument('--force', action='store_true', help='최신 데이터여도 갱신')
+        parser.add_argument('--loop', action='store_true', help='상주하면서 요청 처리 및 장 마감 후 정기 갱신')
+        parser.add_argument('--poll-interval', type=int, default=30, help='요청 확인 주기 (초)')
+        parser.add_argument('--refresh-at', default=DEFAULT_REFRESH_AT,
+                            help='정기 갱신 시각 (미국 동부 시간, HH:MM)')
+
+    def handle(self, *args, **options):
+        tickers = [t.upper() for t in options['tickers']] or None
+
+        if not options['loop']:
+            processed = refresh.process_pending(log=self.stdout.write)
+            refreshed = refresh.refresh_stale(tickers, options['source'], options['force'], log=self.stdout.write)
+            self.stdout.write(self.style.SUCCESS(f'요청 {processed}건 처리, {refreshed}개 티커 갱신'))
+            return
+
+        refresh_at = dt_time.fromisoformat(options['refresh_at'])
+        last_scheduled_run = None
+        self.stdout.write(f'갱신 워커 시작 (정기 갱신 {refresh_at} ET, 확인 주기 {options["poll_interval"]}초)')
+
+        while True:
+            try:
+                refresh.process_pending(log=self.stdout.write)
+
+                now = datetime.now(MARKET_TIMEZONE)
+                is_weekday = now.weekday() < 5
+                if is_weekday and now.time() >= refresh_at and last_scheduled_run != now.date():
+                    # 조회수 상위 티커부터 갱신해 사용자가 요청하기 전에 받아 둠
+                    if tickers is None:
+                        warmup.prefetch(source=options['source'], force=options['force'], log=self.stdout.write)
+                    refreshed = refresh.refresh_stale(tickers, options['source'], options['force'],
+                                                      log=self.stdout.write)
+                    last_scheduled_run = now.date()
+                    self.stdout.write(self.style.SUCCESS(f'{now:%Y-%m-%d} 정기 갱신 완료 ({refreshed}개 티커)'))
+            except Exception as e:
+                self.stderr.write(f'갱신 워커 오류: {e}')
+
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,76 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# 시작 시 읽히면 안 되는 무거운 라이브러리 (첫 다운로드 때 읽음)
+HEAVY_MODULES = ('yfinance', 'pandas', 'requests', 'httpx', 'curl_cffi', 'numpy')
+EAGER_IMPORTS = ('yfinance', 'pandas', 'requests', 'httpx')
+
+# 새 인터프리터에서 워커가 첫 요청 전에 하는 일(설정, 앱 로드, URLconf)만 실행
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+elapsed = time.perf_counter() - started
+
+rss_kb = None
+try:
+    with open('/proc/self/status') as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS'))
+except (OSError, StopIteration):
+    try:
+        import resource
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            rss_kb //= 1024
+    except ImportError:
+        pass
+
+print(json.dumps({'seconds': elapsed, 'rss_kb': rss_kb, 'modules': sys.modules.keys() & set(%r)}, default=sorted))
+'''
+
+
+def probe(eager=False):
+    """새 프로세스에서 워커 시작을 재현하고 {seconds, rss_kb, modules} 반환"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    command = [sys.executable, '-c', PROBE % (HEAVY_MODULES,)]
+    if eager:
+        command.extend(EAGER_IMPORTS)
+
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise CommandError(f'시작 측정 실패:\n{result.stderr.strip()}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class Command(BaseCommand):
+    help = '새 프로세스에서 워커 시작(설정, 앱 로드, URLconf) 시간과 메모리, 읽힌 무거운 모듈 측정'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='측정 횟수 (중앙값 출력)')
+        parser.add_argument('--compare-eager', action='store_true',
+                            help='yfinance/pandas/requests/httpx 를 미리 읽은 경우와 비교')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs 는 1 이상이어야 합니다.')
+
+        modes = [('lazy', False)] + ([('eager', True)] if options['compare_eager'] else [])
+        for label, eager in modes:
+            runs = [probe(eager) for _ in range(options['runs'])]
+            seconds = statistics.median(run['seconds'] for run in runs)
+            rss = [run['rss_kb'] for run in runs if run['rss_kb'] is not None]
+            rss_text = f'{statistics.median(rss) / 1024:.1f}MB' if rss else '-'
+            modules = ', '.join(runs[-1]['modules']) or '-'
+            self.stdout.write(f'{label:<6} {seconds * 1000:>8.0f}ms  RSS {rss_text:>8}  무거운 모듈: {modules}')
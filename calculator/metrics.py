@@ -0,0 +1,220 @@
+"""운영 지표 (Prometheus 텍스트 형식)
+
+외부 데이터 제공처 요청 수/지연 시간, 저장한 행 수, 결과/가격 캐시 적중, 시뮬레이션 시간,
+갱신 잠금 대기를 프로세스 메모리에 누적하고 /admin/metrics/ 에서 Prometheus 텍스트 형식으로
+내보낸다. 관리자 로그인이 필요하며, METRICS_TOKEN 을 설정하면
+`Authorization: Bearer <토큰>` 헤더로도 읽을 수 있다 (수집기용).
+
+값은 프로세스마다 따로 쌓이므로 gunicorn 워커가 여럿이면 각 워커의 값이 다르다.
+캐시 적중률은 PromQL 로 계산한다. 예:
+
+    sum(rate(investment_calculator_result_cache_requests_total{result="hit"}[5m]))
+      / sum(rate(investment_calculator_result_cache_requests_total[5m]))
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.cache import never_cache
+from django.utils.crypto import constant_time_compare
+
+NAMESPACE = 'investment_calculator'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 히스토그램 구간 (초)
+FETCH_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+SIMULATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LOCK_WAIT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 20)
+
+_registry = []
+
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """증가만 하는 누적 값 (레이블 조합별)"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = f'{NAMESPACE}_{name}'
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels[name]) for name in self.labels), 0)
+
+    def lines(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_label_text(self.labels, key)} {_number(value)}' for key, value in values]
+
+
+class Histogram:
+    """관측값 분포 (구간별 누적 개수, 합계, 개수)"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=SIMULATION_BUCKETS):
+        self.name = f'{NAMESPACE}_{name}'
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # 레이블 조합 → [구간별 개수..., +Inf 개수, 합계]
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            entry[index] += 1
+            entry[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """with 블록 실행 시간(초) 기록 (예외가 나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        entry = self._values.get(tuple(str(labels[name]) for name in self.labels))
+        return sum(entry[:-1]) if entry else 0
+
+    def lines(self):
+        with self._lock:
+            values = sorted((key, list(entry)) for key, entry in self._values.items())
+
+        lines = []
+        for key, entry in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), entry[:-1]):
+                cumulative += count
+                le = _label_text(self.labels, key, [('le', _number(float(bound)))])
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            labels = _label_text(self.labels, key)
+            lines.append(f'{self.name}_sum{labels} {_number(entry[-1])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+UPSTREAM_REQUESTS = Counter(
+    'upstream_requests_total', '외부 데이터 제공처 HTTP 요청 수 (outcome: 상태 코드 또는 error)',
+    ('provider', 'outcome')
+)
+UPSTREAM_SECONDS = Histogram(
+    'upstream_request_seconds', '외부 데이터 제공처 요청 시간', ('provider',), FETCH_BUCKETS
+)
+PRICE_UPDATE_ERRORS = Counter(
+    'price_update_errors_total', '티커 시세 갱신 실패 수', ('provider',)
+)
+ROWS_INGESTED = Counter(
+    'rows_ingested_total', 'StockData 에 저장을 시도한 행 수 (이미 있는 날짜 포함)'
+)
+RESULT_CACHE_REQUESTS = Counter(
+    'result_cache_requests_total', '시뮬레이션 결과 캐시 조회 수', ('kind', 'result')
+)
+PRICE_CACHE_REQUESTS = Counter(
+    'price_cache_requests_total', '프로세스 가격 캐시 조회 수 (만료 포함 miss)', ('result',)
+)
+SNAPSHOT_REQUESTS = Counter(
+    'snapshot_requests_total', '월별 스냅샷 조회 수 (fallback: 일별 시계열 사용)', ('result',)
+)
+CACHE_WARMUP_TICKERS = Counter(
+    'cache_warmup_tickers_total', '예열로 가격 캐시에 새로 읽은 티커 수', ('trigger',)
+)
+CACHE_WARMUP_ERRORS = Counter(
+    'cache_warmup_errors_total', '예열 실패 수 (다음 주기에 다시 시도)'
+)
+SIMULATION_SECONDS = Histogram(
+    'simulation_seconds', '시뮬레이션 계산 시간 (캐시 적중 제외)', ('kind',), SIMULATION_BUCKETS
+)
+REFRESH_LOCK_CONTENDED = Counter(
+    'refresh_lock_contended_total', '다른 요청이 갱신 중이라 임대를 얻지 못한 횟수'
+)
+REFRESH_LOCK_WAIT_SECONDS = Histogram(
+    'refresh_lock_wait_seconds', '다른 요청의 갱신을 기다린 시간', (), LOCK_WAIT_BUCKETS
+)
+REFRESH_LOCK_WAIT_TIMEOUTS = Counter(
+    'refresh_lock_wait_timeouts_total', '기다리다 제한 시간을 넘긴 횟수'
+)
+VIEW_COUNT_FLUSH_ERRORS = Counter(
+    'view_count_flush_errors_total', '조회수 반영 실패 수'
+)
+
+
+def record_upstream(provider, outcome, seconds):
+    """외부 요청 한 건 기록"""
+    UPSTREAM_REQUESTS.inc(provider=provider, outcome=outcome)
+    UPSTREAM_SECONDS.observe(seconds, provider=provider)
+
+
+@contextmanager
+def upstream_request(provider):
+    """with 블록을 외부 요청 한 건으로 기록 (예외가 나면 outcome=error)"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        record_upstream(provider, outcome, time.perf_counter() - started)
+
+
+def render():
+    """등록된 모든 지표를 Prometheus 텍스트 형식으로"""
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.lines())
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+@never_cache
+def metrics_endpoint(request):
+    """관리자(staff) 로그인 또는 METRICS_TOKEN Bearer 헤더로 지표 조회, 그 밖에는 403
+
+    수집기가 로그인 페이지를 지표로 읽지 않도록 리다이렉트하지 않는다.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return metrics_view(request)
+
+    user = getattr(request, 'user', None)
+    if user and user.is_active and user.is_staff:
+        return metrics_view(request)
+    return HttpResponseForbidden('관리자 로그인 또는 METRICS_TOKEN 이 필요합니다.')
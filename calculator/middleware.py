@@ -0,0 +1,42 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import timing
+
+
+class RequestTimingMiddleware:
+    """요청마다 구간별 처리 시간을 측정해 Server-Timing 헤더와 로그로 남김 (WSGI/ASGI 겸용)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings, token = timing.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = timing.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        total_ms = timings.total_ms()
+        # 공유 캐시가 저장하는 응답에는 넣지 않음 (한 요청의 측정값이 모두에게 재사용되므로)
+        if getattr(settings, 'REQUEST_TIMING_HEADER', True) and not timing.is_shared_cacheable(response):
+            response['Server-Timing'] = timings.header(total_ms)
+        timing.log_request(request, response, timings, total_ms)
+        return response
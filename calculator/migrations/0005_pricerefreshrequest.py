@@ -0,0 +1,22 @@
+# Generated by Django 4.2.23 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0004_delete_dailyvisit_delete_sitevisit_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceRefreshRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=10, unique=True)),
+                ('source', models.CharField(default='yfinance', max_length=20)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
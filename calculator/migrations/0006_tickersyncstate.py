@@ -0,0 +1,24 @@
+# Generated by Django 4.2.23 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0005_pricerefreshrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TickerSyncState',
+            fields=[
+                ('ticker', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('last_fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('last_price_date', models.DateField(blank=True, null=True)),
+                ('last_ath_date', models.DateField(blank=True, null=True)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('data_version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 19:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0006_tickersyncstate'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='stockdata',
+            name='view_count',
+        ),
+    ]
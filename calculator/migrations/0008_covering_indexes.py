@@ -0,0 +1,21 @@
+# Generated by Django 4.2.23 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0007_remove_stockdata_view_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockdata',
+            index=models.Index(fields=['ticker', 'date', 'close_price'], name='stockdata_ticker_date_close'),
+        ),
+        migrations.AddIndex(
+            model_name='stockdata',
+            index=models.Index(fields=['ticker', 'updated_at'], name='stockdata_ticker_updated'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.23 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0008_covering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tickersyncstate',
+            name='snapshot_through',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='MonthlyPriceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=10)),
+                ('investment_day', models.PositiveSmallIntegerField()),
+                ('month_index', models.PositiveIntegerField()),
+                ('price_date', models.DateField()),
+                ('close_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('high_price', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+            options={
+                'unique_together': {('ticker', 'investment_day', 'month_index')},
+            },
+        ),
+    ]
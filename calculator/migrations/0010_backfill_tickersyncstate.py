@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def backfill(apps, schema_editor):
+    """수집 상태 행이 없는 기존 티커의 TickerSyncState 생성 (티커 목록을 상태 테이블에서 읽기 위함)"""
+    StockData = apps.get_model('calculator', 'StockData')
+    TickerSyncState = apps.get_model('calculator', 'TickerSyncState')
+
+    existing = set(TickerSyncState.objects.values_list('ticker', flat=True))
+    summaries = StockData.objects.values('ticker').annotate(
+        last_price_date=Max('date'), last_fetched_at=Max('updated_at'), row_count=Count('id')
+    ).order_by()
+
+    TickerSyncState.objects.bulk_create(
+        [TickerSyncState(**summary) for summary in summaries if summary['ticker'] not in existing],
+        batch_size=1000, ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0009_monthlypricesnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -6,10 +6,15 @@ class StockData(models.Model):
     date = models.DateField()
     close_price = models.DecimalField(max_digits=10, decimal_places=2)
     updated_at = models.DateTimeField(auto_now=True)
-    view_count = models.PositiveIntegerField(default=0)  # 이 필드 추가!
 
     class Meta:
         unique_together = ('ticker', 'date')
+        indexes = [
+            # 날짜 기준 종가 조회/전체 이력 로드를 인덱스만으로 처리 (테이블 접근 없음)
+            models.Index(fields=['ticker', 'date', 'close_price'], name='stockdata_ticker_date_close'),
+            # 티커별 마지막 수집 시각 (Max('updated_at'))
+            models.Index(fields=['ticker', 'updated_at'], name='stockdata_ticker_updated'),
+        ]
 
     def __str__(self):
         return f"{self.ticker} - {self.date} - {self.close_price}"
@@ -23,3 +28,43 @@ class TickerViewCount(models.Model):
     def __str__(self):
         return f"{self.ticker} - {self.view_count} views"
 
+
+class PriceRefreshRequest(models.Model):
+    """백그라운드 워커가 처리할 티커별 데이터 갱신 요청"""
+    ticker = models.CharField(max_length=10, unique=True)
+    source = models.CharField(max_length=20, default='yfinance')
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.ticker} - {self.source} - {self.requested_at}"
+
+
+class TickerSyncState(models.Model):
+    """티커별 수집 상태 (최신 여부/이어받을 위치를 기본키 조회 한 번으로 확인)"""
+    ticker = models.CharField(max_length=10, primary_key=True)
+    last_fetched_at = models.DateTimeField(null=True, blank=True)
+    last_price_date = models.DateField(null=True, blank=True)
+    last_ath_date = models.DateField(null=True, blank=True)
+    # 월별 스냅샷에 반영된 마지막 가격 날짜 (last_price_date 와 같아야 스냅샷 사용)
+    snapshot_through = models.DateField(null=True, blank=True)
+    row_count = models.PositiveIntegerField(default=0)
+    data_version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.ticker} - {self.last_price_date} (v{self.data_version})"
+
+
+class MonthlyPriceSnapshot(models.Model):
+    """티커별 매월 투자일(1~28일) 기준 종가와 전고점 (그 날 이전 마지막 거래일 값)"""
+    ticker = models.CharField(max_length=10)
+    investment_day = models.PositiveSmallIntegerField()
+    month_index = models.PositiveIntegerField()  # 연도 * 12 + (월 - 1)
+    price_date = models.DateField()
+    close_price = models.DecimalField(max_digits=10, decimal_places=2)
+    high_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        unique_together = ('ticker', 'investment_day', 'month_index')
+
+    def __str__(self):
+        return f"{self.ticker} - {self.month_index}/{self.investment_day} - {self.close_price}"
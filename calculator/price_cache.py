@@ -0,0 +1,192 @@
+"""티커별 종가 시계열 프로세스 로컬 캐시
+
+티커의 전체 (날짜, 종가) 이력을 한 번의 쿼리로 읽어 배열로 보관하고,
+"해당 날짜 이전의 마지막 종가" 조회를 메모리에서 처리한다.
+컬럼형 파일 저장소(columnar_store)가 켜져 있으면 DB 대신 메모리 맵 파일을 쓴다.
+
+수집은 다른 프로세스(refresh_prices 워커 등)에서도 일어나므로, 캐시된 시계열은 읽을 때의
+TickerSyncState.data_version 을 기억해 두고 조회할 때마다 현재 버전과 비교한다 (기본키 조회
+한 번). 버전이 바뀌었으면 다시 읽으므로, 결과 캐시 키의 버전과 계산에 쓴 시계열이 어긋나지 않는다.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+
+from . import columnar_store, metrics, sync_state
+from .models import StockData
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# 캐시 기본값 (settings 에서 덮어쓸 수 있음)
+DEFAULT_MAX_TICKERS = 256
+DEFAULT_TIMEOUT = 60 * 60
+
+
+def to_day_number(value):
+    """date → 1970-01-01 기준 일수"""
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def from_day_number(day_number):
+    """1970-01-01 기준 일수 → date"""
+    return date.fromordinal(int(day_number) + _EPOCH_ORDINAL)
+
+
+class PriceSeries:
+    """한 티커의 날짜순 (일수, 종가) 배열"""
+
+    __slots__ = ('ticker', 'days', 'closes', 'version', 'data_version', 'loaded_at', '_running_high')
+
+    def __init__(self, ticker, days, closes, version=None, data_version=None):
+        self.ticker = ticker
+        self.days = days
+        self.closes = closes
+        self.version = version  # 컬럼형 파일에서 읽은 경우 파일 버전
+        self.data_version = data_version  # 읽기 직전의 TickerSyncState.data_version
+        self.loaded_at = time.monotonic()
+        self._running_high = None
+
+    def __len__(self):
+        return len(self.days)
+
+    def index_on_or_before(self, value):
+        """해당 날짜 이전(포함) 마지막 거래일의 인덱스, 없으면 -1"""
+        return int(np.searchsorted(self.days, to_day_number(value), side='right')) - 1
+
+    def price_on_or_before(self, value):
+        """해당 날짜 이전(포함) 마지막 (날짜, 종가), 없으면 None"""
+        index = self.index_on_or_before(value)
+        if index < 0:
+            return None
+        return from_day_number(self.days[index]), float(self.closes[index])
+
+    def running_high(self):
+        """날짜별 전고점 (종가 누적 최대값), 처음 요청 시 한 번만 계산"""
+        if self._running_high is None:
+            self._running_high = np.maximum.accumulate(self.closes) if len(self.closes) else self.closes
+        return self._running_high
+
+    @property
+    def last_date(self):
+        return from_day_number(self.days[-1]) if len(self.days) else None
+
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _max_tickers():
+    return getattr(settings, 'PRICE_CACHE_MAX_TICKERS', DEFAULT_MAX_TICKERS)
+
+
+def _timeout():
+    return getattr(settings, 'PRICE_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def query_price_series(ticker):
+    """DB에서 티커의 전체 종가 이력을 한 번에 읽어 PriceSeries 생성"""
+    rows = list(
+        StockData.objects.filter(ticker=ticker).order_by('date').values_list('date', 'close_price')
+    )
+    days = np.fromiter((to_day_number(d) for d, _ in rows), dtype=np.int32, count=len(rows))
+    closes = np.fromiter((float(p) for _, p in rows), dtype=np.float64, count=len(rows))
+    return PriceSeries(ticker, days, closes)
+
+
+def load_price_series(ticker):
+    """컬럼형 파일이 있으면 메모리 맵으로, 없으면 DB에서 로드
+
+    저장소가 켜져 있는데 파일이 없으면 DB에서 읽은 김에 파일을 만들어 둔다.
+    데이터 버전은 읽기 전에 확인한다 (읽는 중에 수집되면 다음 조회 때 다시 읽음).
+    """
+    data_version = sync_state.data_version(ticker)
+    series = _load_series(ticker)
+    series.data_version = data_version
+    return series
+
+
+def _load_series(ticker):
+    if not columnar_store.is_enabled():
+        return query_price_series(ticker)
+
+    stored = columnar_store.read_series(ticker)
+    if stored is not None:
+        days, closes, version = stored
+        return PriceSeries(ticker, days, closes, version)
+
+    series = query_price_series(ticker)
+    if len(series):
+        columnar_store.write_series(ticker, series.days, series.closes)
+        series.version = columnar_store.file_version(ticker)
+    return series
+
+
+def _is_current(series):
+    """만료되지 않았고, 다른 프로세스가 새 데이터를 저장하지 않았고, 파일이 바뀌지 않았는지"""
+    if time.monotonic() - series.loaded_at >= _timeout():
+        return False
+    if series.data_version != sync_state.data_version(series.ticker):
+        return False
+    if series.version is not None:
+        return series.version == columnar_store.file_version(series.ticker)
+    return True
+
+
+def peek(ticker):
+    """캐시에 있는 유효한 시계열 (없거나 만료되면 None, 새로 로드하지 않음)"""
+    with _lock:
+        series = _cache.get(ticker)
+    if series is not None and _is_current(series):
+        return series
+    return None
+
+
+def get_cached(ticker):
+    """캐시에 있는 유효한 시계열 (사용 기록 갱신), 없거나 만료되면 None (새로 로드하지 않음)"""
+    with _lock:
+        series = _cache.get(ticker)
+    if series is None:
+        return None
+
+    if not _is_current(series):
+        invalidate(ticker)
+        return None
+
+    with _lock:
+        if ticker in _cache:
+            _cache.move_to_end(ticker)
+    metrics.PRICE_CACHE_REQUESTS.inc(result='hit')
+    return series
+
+
+def get_price_series(ticker):
+    """캐시된 시계열 반환 (없거나 만료되면 다시 로드)"""
+    series = get_cached(ticker)
+    if series is not None:
+        return series
+
+    metrics.PRICE_CACHE_REQUESTS.inc(result='miss')
+    series = load_price_series(ticker)
+
+    # 데이터가 없는 티커는 캐시하지 않음 (수집 직후 바로 보이도록)
+    if len(series):
+        with _lock:
+            _cache[ticker] = series
+            _cache.move_to_end(ticker)
+            while len(_cache) > _max_tickers():
+                _cache.popitem(last=False)
+
+    return series
+
+
+def invalidate(ticker=None):
+    """티커(또는 전체) 캐시 무효화"""
+    with _lock:
+        if ticker is None:
+            _cache.clear()
+        else:
+            _cache.pop(ticker, None)
@@ -0,0 +1,231 @@
+"""주가 데이터 갱신 예약/실행
+
+요청 처리 중에는 외부 API를 부르지 않고 저장된 데이터로 응답한다. 데이터가
+오래되었으면 PriceRefreshRequest 에 갱신 요청만 남기고, 실제 다운로드는
+`manage.py refresh_prices` 워커가 처리한다. 데이터가 전혀 없는 티커는 보여줄
+것이 없으므로 처음 한 번만 요청 안에서 바로 가져온다.
+
+바로 가져오기는 refresh_lock 으로 티커당 한 번에 하나만 실행한다.
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from . import metrics, refresh_lock, sync_state
+from .models import PriceRefreshRequest
+
+# 데이터 상태
+MISSING = 'missing'
+STALE = 'stale'
+FRESH = 'fresh'
+
+# 데이터 제공처
+SOURCE_YFINANCE = 'yfinance'
+SOURCE_TWELVE_DATA = 'twelvedata'
+
+STALE_AFTER = timedelta(hours=18)
+
+# 요청 경로의 동시 다운로드 제한 (settings 에서 덮어쓸 수 있음)
+DEFAULT_FETCH_MAX_WORKERS = 5
+DEFAULT_FETCH_DEADLINE = 15
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def default_source():
+    return getattr(settings, 'PRICE_REFRESH_SOURCE', SOURCE_YFINANCE)
+
+
+def data_state(ticker):
+    """티커 데이터 상태 (없음/오래됨/최신)"""
+    state = sync_state.get_state(ticker)
+
+    if state is None:
+        return MISSING
+    if state.last_fetched_at and timezone.now() - state.last_fetched_at < STALE_AFTER:
+        return FRESH
+    return STALE
+
+
+def request_refresh(ticker, source=None):
+    """갱신 요청 등록 (이미 대기 중이면 그대로 둠)"""
+    PriceRefreshRequest.objects.get_or_create(
+        ticker=ticker,
+        defaults={'source': source or default_source()}
+    )
+
+
+def fetch_now(ticker, source=None, wait=True):
+    """외부 API에서 바로 데이터 가져오기 (티커당 한 번에 하나만 실행)
+
+    다른 요청이 이미 같은 티커를 갱신 중이면 새로 요청하지 않고, wait 이면 그 갱신이
+    끝날 때까지 기다린 뒤 반환한다.
+    """
+    source = source or default_source()
+
+    token = refresh_lock.acquire(ticker)
+    if token is None:
+        if wait:
+            refresh_lock.wait(ticker)
+        return f"{ticker} 데이터를 다른 요청에서 갱신 중입니다."
+
+    try:
+        if source == SOURCE_TWELVE_DATA:
+            from stock2.views import update_stock_data_twelvedata
+            return update_stock_data_twelvedata(ticker)
+
+        from .views import update_stock_data_optimized
+        return update_stock_data_optimized(ticker)
+    finally:
+        refresh_lock.release(ticker, token)
+
+
+async def afetch_now(ticker, source=None, wait=True):
+    """fetch_now 의 비동기 버전 (다운로드를 기다리는 동안 이벤트 루프를 막지 않음)"""
+    source = source or default_source()
+
+    token = await sync_to_async(refresh_lock.acquire)(ticker)
+    if token is None:
+        if wait:
+            await refresh_lock.await_release(ticker)
+        return f"{ticker} 데이터를 다른 요청에서 갱신 중입니다."
+
+    try:
+        if source == SOURCE_TWELVE_DATA:
+            from stock2.views import aupdate_stock_data_twelvedata
+            return await aupdate_stock_data_twelvedata(ticker)
+
+        from .views import aupdate_stock_data_optimized
+        return await aupdate_stock_data_optimized(ticker)
+    finally:
+        await sync_to_async(refresh_lock.release)(ticker, token)
+
+
+def _fetch_executor():
+    """프로세스 공용 다운로드 스레드 풀 (동시 요청 수 제한)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PRICE_FETCH_MAX_WORKERS', DEFAULT_FETCH_MAX_WORKERS),
+                thread_name_prefix='price-fetch'
+            )
+        return _executor
+
+
+def fetch_concurrently(fetch, keys, provider, deadline=None):
+    """여러 티커(또는 티커 묶음)를 동시에 다운로드 (DB 접근 없는 fetch(key) 함수만 사용)
+
+    (결과, 진행 중) 반환. 결과는 전체 제한 시간 안에 끝난 {key: 결과}, 진행 중은 시간 안에
+    끝나지 않았고 이미 실행 중이라 취소하지 못한 {key: future}. 실패와 시간 초과는
+    provider 의 갱신 실패로 센다.
+    """
+    if deadline is None:
+        deadline = getattr(settings, 'PRICE_FETCH_DEADLINE', DEFAULT_FETCH_DEADLINE)
+
+    executor = _fetch_executor()
+    # 요청 처리 시간 측정이 스레드에서도 이어지도록 컨텍스트 복사
+    futures = {
+        executor.submit(contextvars.copy_context().run, fetch, key): key
+        for key in keys
+    }
+    done, not_done = wait(futures, timeout=deadline)
+
+    running = {}
+    for future in not_done:
+        if not future.cancel():
+            running[futures[future]] = future
+        record_fetch_error(provider, futures[future], '제한 시간 초과')
+
+    results = {}
+    for future in done:
+        key = futures[future]
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            record_fetch_error(provider, key, e)
+    return results, running
+
+
+def record_fetch_error(provider, key, error):
+    """동시 다운로드 실패 기록"""
+    metrics.PRICE_UPDATE_ERRORS.inc(provider=provider)
+    print(f"Fetch error for {key}: {error}")
+
+
+def release_when_done(running, owned):
+    """아직 진행 중인 다운로드의 티커는 owned 에서 빼고, 다운로드가 끝날 때 임대 해제
+
+    running 은 fetch_concurrently 의 진행 중 {key: future} (key 는 티커 또는 티커 묶음).
+    """
+    for key, future in running.items():
+        tickers = key if isinstance(key, tuple) else (key,)
+        leases = {ticker: owned.pop(ticker) for ticker in tickers if ticker in owned}
+        future.add_done_callback(lambda _, leases=leases: refresh_lock.release_many(leases))
+
+
+def ensure_data(ticker, source=None):
+    """요청 경로용: 데이터가 없으면 바로 가져오고, 오래되었으면 갱신 예약
+
+    (상태, 결과 메시지) 반환. 메시지는 바로 가져온 경우에만 있음.
+    """
+    state = data_state(ticker)
+
+    if state == MISSING:
+        return state, fetch_now(ticker, source)
+    if state == STALE:
+        request_refresh(ticker, source)
+    return state, None
+
+
+async def aensure_data(ticker, source=None):
+    """ensure_data 의 비동기 버전 (ASGI 뷰용)"""
+    state = await sync_to_async(data_state)(ticker)
+
+    if state == MISSING:
+        return state, await afetch_now(ticker, source)
+    if state == STALE:
+        await sync_to_async(request_refresh)(ticker, source)
+    return state, None
+
+
+def process_pending(limit=None, log=None):
+    """대기 중인 갱신 요청 처리 (요청 순서대로)"""
+    pending = PriceRefreshRequest.objects.order_by('requested_at')
+    if limit:
+        pending = pending[:limit]
+
+    processed = 0
+    for refresh_request in list(pending):
+        # 요청 처리 중인 티커는 그쪽 결과를 쓰고 건너뜀
+        result = fetch_now(refresh_request.ticker, refresh_request.source, wait=False)
+        refresh_request.delete()
+        processed += 1
+        if log:
+            log(f"{refresh_request.ticker}: {result}")
+
+    return processed
+
+
+def refresh_stale(tickers=None, source=None, force=False, log=None):
+    """알려진 모든 티커(또는 지정 티커) 중 오래된 것만 갱신"""
+    if tickers is None:
+        tickers = sync_state.known_tickers()
+
+    refreshed = 0
+    for ticker in list(tickers):
+        if not force and data_state(ticker) == FRESH:
+            continue
+        result = fetch_now(ticker, source, wait=False)
+        PriceRefreshRequest.objects.filter(ticker=ticker).delete()
+        refreshed += 1
+        if log:
+            log(f"{ticker}: {result}")
+
+    return refreshed
@@ -0,0 +1,99 @@
+"""티커별 갱신 단일 실행(single-flight) 잠금
+
+같은 티커를 여러 요청이 동시에 내려받지 않도록 캐시의 add(없을 때만 저장)로 임대(lease)를
+잡는다. 임대는 REFRESH_LOCK_TIMEOUT 초가 지나면 자동으로 풀리므로 프로세스가 죽어도
+영원히 잠기지 않는다. 임대를 얻지 못한 요청은 새로 내려받지 않고 최대 REFRESH_LOCK_WAIT
+초 동안 먼저 시작한 갱신이 끝나기를 기다린다.
+
+여러 프로세스(gunicorn 워커) 사이에서 동작하려면 REFRESH_LOCK_CACHE_ALIAS 가 공유 캐시
+(Redis, Memcached, DB 캐시 등)를 가리켜야 한다. 기본 LocMemCache 는 프로세스 안에서만 막는다.
+"""
+import asyncio
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics, timing
+
+DEFAULT_LEASE_TIMEOUT = 120  # 초
+DEFAULT_WAIT_TIMEOUT = 20  # 초
+POLL_INTERVAL = 0.1
+
+KEY_PREFIX = 'refresh-lock'
+
+
+def _cache():
+    return caches[getattr(settings, 'REFRESH_LOCK_CACHE_ALIAS', 'default')]
+
+
+def _key(ticker):
+    return f'{KEY_PREFIX}:{ticker}'
+
+
+def _wait_timeout(timeout):
+    if timeout is None:
+        return getattr(settings, 'REFRESH_LOCK_WAIT', DEFAULT_WAIT_TIMEOUT)
+    return timeout
+
+
+def acquire(ticker):
+    """임대 획득 시 토큰, 다른 곳에서 갱신 중이면 None"""
+    token = uuid.uuid4().hex
+    timeout = getattr(settings, 'REFRESH_LOCK_TIMEOUT', DEFAULT_LEASE_TIMEOUT)
+    if _cache().add(_key(ticker), token, timeout):
+        return token
+    metrics.REFRESH_LOCK_CONTENDED.inc()
+    return None
+
+
+def release(ticker, token):
+    """자기 임대만 해제 (시간이 지나 다른 요청이 잡은 임대는 건드리지 않음)"""
+    cache = _cache()
+    if cache.get(_key(ticker)) == token:
+        cache.delete(_key(ticker))
+
+
+def is_locked(ticker):
+    return _cache().get(_key(ticker)) is not None
+
+
+def acquire_many(tickers):
+    """여러 티커 임대 시도, 획득한 티커만 {티커: 토큰}"""
+    owned = {}
+    for ticker in tickers:
+        token = acquire(ticker)
+        if token:
+            owned[ticker] = token
+    return owned
+
+
+def release_many(owned):
+    for ticker, token in owned.items():
+        release(ticker, token)
+
+
+def wait(ticker, timeout=None):
+    """다른 곳의 갱신이 끝날 때까지 대기, 제한 시간 안에 끝나면 True"""
+    deadline = time.monotonic() + _wait_timeout(timeout)
+    with timing.span(timing.LOCK_WAIT, ticker), metrics.REFRESH_LOCK_WAIT_SECONDS.time():
+        while is_locked(ticker):
+            if time.monotonic() >= deadline:
+                metrics.REFRESH_LOCK_WAIT_TIMEOUTS.inc()
+                return False
+            time.sleep(POLL_INTERVAL)
+    return True
+
+
+async def await_release(ticker, timeout=None):
+    """wait 의 비동기 버전 (기다리는 동안 이벤트 루프를 막지 않음)"""
+    deadline = time.monotonic() + _wait_timeout(timeout)
+    with timing.span(timing.LOCK_WAIT, ticker), metrics.REFRESH_LOCK_WAIT_SECONDS.time():
+        while await sync_to_async(is_locked)(ticker):
+            if time.monotonic() >= deadline:
+                metrics.REFRESH_LOCK_WAIT_TIMEOUTS.inc()
+                return False
+            await asyncio.sleep(POLL_INTERVAL)
+    return True
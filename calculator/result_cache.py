@@ -0,0 +1,92 @@
+"""시뮬레이션 결과 캐시
+
+입력값을 정규화한 키(티커, 달러 금액, 날짜, 조건, 언어)에 각 티커의 data_version 과
+마지막 가격 날짜를 더해 Django 캐시 프레임워크에 결과를 저장한다. 새 데이터가 들어오면
+data_version 이 바뀌므로 이전 결과는 자연히 쓰이지 않는다.
+
+SIMULATION_CACHE_ALIAS 로 사용할 캐시를 고른다 (기본 'default'). LRU 제거와 개수 제한은
+캐시 백엔드 설정으로 한다. 예:
+
+    CACHES = {
+        'simulations': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 2000},  # 가득 차면 가장 오래 안 쓴 항목부터 제거
+        },
+    }
+"""
+import hashlib
+import json
+import pickle
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics, sync_state
+
+DEFAULT_TIMEOUT = 60 * 60 * 6
+DEFAULT_MAX_ENTRY_BYTES = 512 * 1024
+
+KEY_PREFIX = 'simulation'
+
+
+def _cache():
+    return caches[getattr(settings, 'SIMULATION_CACHE_ALIAS', 'default')]
+
+
+def make_key(kind, params, tickers):
+    """정규화한 입력값 + 티커별 데이터 버전으로 캐시 키 생성"""
+    tickers = sorted({t for t in tickers if t})
+    versions = sync_state.data_versions(tickers)
+    canonical = json.dumps(
+        {
+            'kind': kind,
+            'params': params,
+            'data': {t: versions.get(t) for t in tickers},
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str,
+    )
+    return f'{KEY_PREFIX}:{kind}:' + hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def get_or_compute(kind, params, tickers, compute):
+    """캐시에 있으면 그대로, 없으면 compute() 결과를 저장 후 반환
+
+    직렬화한 크기가 SIMULATION_CACHE_MAX_ENTRY_BYTES 를 넘는 결과는 저장하지 않는다.
+    """
+    if not getattr(settings, 'SIMULATION_CACHE_ENABLED', True):
+        with metrics.SIMULATION_SECONDS.time(kind=kind):
+            return compute()
+
+    key = make_key(kind, params, tickers)
+    cache = _cache()
+
+    result = cache.get(key)
+    if result is not None:
+        metrics.RESULT_CACHE_REQUESTS.inc(kind=kind, result='hit')
+        return result
+
+    metrics.RESULT_CACHE_REQUESTS.inc(kind=kind, result='miss')
+    with metrics.SIMULATION_SECONDS.time(kind=kind):
+        result = compute()
+
+    max_bytes = getattr(settings, 'SIMULATION_CACHE_MAX_ENTRY_BYTES', DEFAULT_MAX_ENTRY_BYTES)
+    if len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)) <= max_bytes:
+        cache.set(key, result, getattr(settings, 'SIMULATION_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+
+    return result
+
+
+def normalize_conditions(conditions):
+    """조건 목록을 키에 쓸 수 있는 형태로 정규화 (우선순위 처리 순서 때문에 순서는 유지)"""
+    return [
+        {
+            'ticker': c['ticker'].upper(),
+            'type': c['type'],
+            'percent': float(c['percent']),
+            'comparison': c['comparison'],
+            'priority': str(c['priority']),
+        }
+        for c in conditions
+    ]
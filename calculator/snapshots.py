@@ -0,0 +1,151 @@
+"""월별 투자일 기준 가격 스냅샷 (MonthlyPriceSnapshot)
+
+적립식 시뮬레이션은 매월 투자일(1~28일) 이전 마지막 거래일의 종가만 쓰므로, 티커마다
+(투자일, 월) 별 종가와 전고점을 미리 계산해 둔다. 가격 캐시에 없는 티커는 일별 StockData
+전체 대신 시뮬레이션 기간의 스냅샷만 범위 조회 한 번으로 읽는다 (일별 행의 약 1/20).
+
+스냅샷은 데이터가 있는 첫 달부터 마지막 가격 날짜가 속한 달까지 만들고, 수집 경로가 새
+데이터를 저장할 때마다 이전 반영 날짜가 속한 달부터 다시 계산한다. 투자일이 29일 이후이거나,
+기간이 마지막 가격 날짜가 속한 달을 넘거나, 스냅샷이 최신이 아니면 None 을 돌려주고 호출하는
+쪽이 일별 시계열을 쓴다. MONTHLY_SNAPSHOTS_ENABLED = False 로 끌 수 있다.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from . import metrics, price_cache, sync_state
+from .models import MonthlyPriceSnapshot, StockData
+from .price_cache import from_day_number
+
+MAX_INVESTMENT_DAY = 28
+INVESTMENT_DAYS = np.arange(1, MAX_INVESTMENT_DAY + 1)
+BULK_BATCH_SIZE = 1000
+
+_EPOCH_MONTH = np.datetime64('1970-01', 'M')
+
+
+def is_enabled():
+    return getattr(settings, 'MONTHLY_SNAPSHOTS_ENABLED', True)
+
+
+def month_index(value):
+    """date → 연도 * 12 + (월 - 1)"""
+    return value.year * 12 + value.month - 1
+
+
+def month_start_days(months):
+    """월 번호 배열 → 각 월 1일의 일수 (1970-01-01 기준)"""
+    return (_EPOCH_MONTH + (months - 1970 * 12)).astype('datetime64[D]').astype(np.int64)
+
+
+def compute_snapshots(ticker, series, from_month=None):
+    """시계열로 from_month 부터 마지막 가격 달까지의 스냅샷 행 목록 생성"""
+    if not len(series):
+        return []
+
+    first_month = month_index(from_day_number(series.days[0]))
+    if from_month is not None:
+        first_month = max(first_month, from_month)
+    months = np.arange(first_month, month_index(series.last_date) + 1)
+
+    # (월, 투자일) 별 목표일과 그 이전 마지막 거래일 인덱스
+    targets = month_start_days(months)[:, None] + (INVESTMENT_DAYS - 1)[None, :]
+    indexes = np.searchsorted(series.days, targets, side='right') - 1
+    month_pos, day_pos = np.nonzero(indexes >= 0)
+    selected = indexes[month_pos, day_pos]
+
+    highs = series.running_high()
+    return [
+        MonthlyPriceSnapshot(
+            ticker=ticker,
+            investment_day=day,
+            month_index=month,
+            price_date=from_day_number(price_day),
+            close_price=round(close, 2),
+            high_price=round(high, 2),
+        )
+        for month, day, price_day, close, high in zip(
+            months[month_pos].tolist(),
+            INVESTMENT_DAYS[day_pos].tolist(),
+            series.days[selected].tolist(),
+            series.closes[selected].tolist(),
+            highs[selected].tolist(),
+        )
+    ]
+
+
+def rebuild(ticker, since=None, full=False):
+    """이전 반영 날짜(또는 since 중 이른 날짜)가 속한 달부터 스냅샷 다시 계산
+
+    full 이면 처음부터 다시 만든다. 저장한 행 수 반환.
+    """
+    state = sync_state.get_state(ticker)
+    if state is None:
+        return 0
+
+    starts = [d for d in (state.snapshot_through, since) if d]
+    from_month = None if full or state.snapshot_through is None else month_index(min(starts))
+
+    series = price_cache.query_price_series(ticker)
+    rows = compute_snapshots(ticker, series, from_month)
+
+    with transaction.atomic():
+        stale = MonthlyPriceSnapshot.objects.filter(ticker=ticker)
+        if from_month is not None:
+            stale = stale.filter(month_index__gte=from_month)
+        stale.delete()
+        MonthlyPriceSnapshot.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+        sync_state.record_snapshot(ticker, series.last_date)
+
+    return len(rows)
+
+
+def load_schedule(ticker, investment_day, schedule, with_highs=False):
+    """구매일 배열(매월 investment_day 일)에 맞춘 (종가, 유효 여부, 전고점 또는 None) 배열
+
+    스냅샷을 쓸 수 없으면 None. 가격 캐시에 이미 있는 티커는 메모리 조회가 더 빠르므로
+    호출하는 쪽이 price_cache.get_cached 로 먼저 확인한다.
+    """
+    if not is_enabled() or not 1 <= investment_day <= MAX_INVESTMENT_DAY:
+        return None
+
+    state = sync_state.get_state(ticker)
+    if state is None or not state.snapshot_through or state.snapshot_through != state.last_price_date:
+        metrics.SNAPSHOT_REQUESTS.inc(result='fallback')
+        return None
+
+    closes = np.zeros(len(schedule))
+    valid = np.zeros(len(schedule), dtype=bool)
+    highs = np.full(len(schedule), np.nan) if with_highs else None
+    if not len(schedule):
+        return closes, valid, highs
+
+    # 구매일은 첫 달부터 한 달씩 연속
+    first_month = month_index(from_day_number(schedule[0]))
+    last_month = first_month + len(schedule) - 1
+    if last_month > month_index(state.last_price_date):
+        metrics.SNAPSHOT_REQUESTS.inc(result='fallback')
+        return None
+
+    fields = ('month_index', 'close_price', 'high_price') if with_highs else ('month_index', 'close_price')
+    rows = MonthlyPriceSnapshot.objects.filter(
+        ticker=ticker, investment_day=investment_day, month_index__range=(first_month, last_month)
+    ).values_list(*fields)
+
+    for row in rows:
+        position = row[0] - first_month
+        closes[position] = float(row[1])
+        valid[position] = True
+        if with_highs:
+            highs[position] = float(row[2])
+
+    metrics.SNAPSHOT_REQUESTS.inc(result='hit')
+    return closes, valid, highs
+
+
+def price_on_or_before(ticker, value):
+    """해당 날짜 이전(포함) 마지막 (날짜, 종가), 없으면 None (인덱스 조회 한 번)"""
+    row = StockData.objects.filter(ticker=ticker, date__lte=value).order_by('-date').values_list(
+        'date', 'close_price'
+    ).first()
+    return (row[0], float(row[1])) if row else None
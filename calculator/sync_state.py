@@ -0,0 +1,88 @@
+"""티커별 수집 상태 (TickerSyncState) 조회/갱신
+
+최신 여부 확인과 증분 수집 시작 위치를 StockData 정렬 대신 기본키 조회로 처리한다.
+상태 행이 없는 기존 티커는 처음 한 번만 StockData 를 집계해서 만든다.
+data_version 은 새 데이터가 저장될 때마다 1씩 올라가므로 캐시 무효화 키로 쓸 수 있다.
+"""
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from .models import StockData, TickerSyncState
+
+
+def get_state(ticker):
+    """티커 상태 반환 (없으면 StockData 로 만들고, 데이터도 없으면 None)"""
+    state = TickerSyncState.objects.filter(pk=ticker).first()
+    if state is not None:
+        return state
+
+    summary = StockData.objects.filter(ticker=ticker).aggregate(
+        last_price_date=Max('date'),
+        last_fetched_at=Max('updated_at'),
+        row_count=Count('id'),
+    )
+    if not summary['row_count']:
+        return None
+
+    state, _ = TickerSyncState.objects.get_or_create(ticker=ticker, defaults=summary)
+    return state
+
+
+def data_version(ticker):
+    """티커의 현재 data_version (상태가 없으면 None, 기본키 조회 한 번)"""
+    return TickerSyncState.objects.filter(pk=ticker).values_list('data_version', flat=True).first()
+
+
+def known_tickers():
+    """데이터가 저장된 모든 티커 (StockData 전체를 훑지 않고 상태 테이블에서)"""
+    return TickerSyncState.objects.order_by('ticker').values_list('ticker', flat=True)
+
+
+def get_states(tickers):
+    """여러 티커 상태 {티커: 상태} (데이터가 없는 티커는 빠짐)"""
+    states = TickerSyncState.objects.in_bulk(list(tickers))
+    for ticker in tickers:
+        if ticker not in states:
+            state = get_state(ticker)
+            if state is not None:
+                states[ticker] = state
+    return states
+
+
+def record_ingestion(ticker, rows, fetched_at=None):
+    """수집 결과 반영 (저장 트랜잭션 안에서 호출)
+
+    가져온 행이 없어도 마지막 수집 시각은 갱신해서 같은 날 다시 요청하지 않게 한다.
+    """
+    fetched_at = fetched_at or timezone.now()
+    state = get_state(ticker)
+
+    if state is None:
+        return  # 저장된 데이터가 전혀 없음
+
+    updates = {'last_fetched_at': fetched_at}
+    if rows:
+        summary = StockData.objects.filter(ticker=ticker).aggregate(
+            last_price_date=Max('date'), row_count=Count('id')
+        )
+        updates.update(summary, data_version=F('data_version') + 1)
+
+    TickerSyncState.objects.filter(pk=ticker).update(**updates)
+
+
+def record_ath(ticker, last_ath_date):
+    """전고점 저장 위치 반영"""
+    TickerSyncState.objects.filter(pk=ticker).update(last_ath_date=last_ath_date)
+
+
+def record_snapshot(ticker, snapshot_through):
+    """월별 스냅샷 반영 위치 기록"""
+    TickerSyncState.objects.filter(pk=ticker).update(snapshot_through=snapshot_through)
+
+
+def data_versions(tickers):
+    """캐시 키용 {티커: (data_version, 마지막 가격 날짜)}"""
+    return {
+        ticker: (state.data_version, state.last_price_date)
+        for ticker, state in get_states(tickers).items()
+    }
@@ -1,3 +1,917 @@
-from django.test import TestCase
+import bisect
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory, Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+
+from . import backtest, benchmarks, columnar_store, ingestion, metrics, price_cache, refresh, refresh_lock, snapshots, sync_state, view_counts, warmup
+from .middleware import RequestTimingMiddleware
+from .models import MonthlyPriceSnapshot, PriceRefreshRequest, StockData, TickerSyncState, TickerViewCount
+from .price_cache import from_day_number, to_day_number
+from .views import calculate_investment_async, calculator_response, simulate_dca_from_snapshots, simulate_investment
+
+
+def make_rows(start, end, gaps=(), base=50.0):
+    """평일마다 (날짜, 종가) 합성 시계열 (gaps 의 (시작, 끝) 구간은 데이터 없음)"""
+    rows = []
+    current = start
+    i = 0
+    while current <= end:
+        if current.weekday() < 5 and not any(a <= current <= b for a, b in gaps):
+            rows.append((current, round(base + 20 * math.sin(i / 40) + i * 0.01, 2)))
+            i += 1
+        current += timedelta(days=1)
+    return rows
+
+
+def to_arrays(rows):
+    days = np.array([to_day_number(d) for d, _ in rows], dtype=np.int32)
+    closes = np.array([p for _, p in rows], dtype=np.float64)
+    return days, closes
+
+
+def price_on_or_before(rows, value):
+    """rows 에서 해당 날짜 이전(포함) 마지막 (날짜, 종가), 없으면 None (기존 DB 조회와 같은 의미)"""
+    index = bisect.bisect_right([d for d, _ in rows], value) - 1
+    return rows[index] if index >= 0 else None
+
+
+def reference_dca(rows, initial_capital, monthly_investment, start_date, end_date, is_english, exchange_rate):
+    """기존 calculate_investment 의 월별 반복 계산 (구매일마다 가격 한 건씩 조회)
+
+    기존 코드는 29~31일 시작이면 짧은 달에서 ValueError 가 났으므로, 구매일은 엔진과 같이
+    그 달의 말일로 맞춘다.
+    """
+    end_row = price_on_or_before(rows, end_date)
+    end_date_price = end_row[1] if end_row else 0
+    end_date_price_date = (end_row[0] if end_row else end_date).strftime('%y/%m/%d')
+
+    cash = initial_capital
+    shares_held = 0.0
+    records = []
+    total_investment = initial_capital
+
+    months = 0
+    investment_date = start_date
+    while investment_date <= end_date:
+        stock_data = price_on_or_before(rows, investment_date)
+        if stock_data:
+            if months > 0:
+                cash += monthly_investment
+                total_investment += monthly_investment
+
+            stock_price = stock_data[1]
+            shares_to_buy = cash // stock_price
+            if shares_to_buy > 0:
+                shares_held += shares_to_buy
+                cash -= shares_to_buy * stock_price
+                current_stock_value = shares_held * stock_price
+                total_assets = current_stock_value + cash
+                if total_investment > 0:
+                    profit_rate = ((total_assets - total_investment) / total_investment) * 100
+                else:
+                    profit_rate = 0.0
+
+                record_data = {
+                    'date': investment_date.strftime('%y/%m/%d'),
+                    'action': 'TEST',
+                    'price': round(stock_price, 2),
+                    'shares_bought': round(shares_to_buy, 0),
+                    'shares_held': round(shares_held, 0),
+                    'stock_value': round(current_stock_value, 2),
+                    'cash': round(cash, 2),
+                    'total_assets': round(total_assets, 2),
+                    'profit_rate': round(profit_rate, 2),
+                    'currency_symbol': '$'
+                }
+                if not is_english:
+                    record_data.update({
+                        'stock_value_krw': round(current_stock_value * exchange_rate, 0),
+                        'cash_krw': round(cash * exchange_rate, 0),
+                        'total_assets_krw': round(total_assets * exchange_rate, 0),
+                    })
+                records.append(record_data)
+
+        months += 1
+        investment_date = start_date + relativedelta(months=months)
+
+    if not records:
+        return records, None
+
+    final_stock_value = shares_held * end_date_price
+    final_total_assets = final_stock_value + cash
+    final_profit_amount = final_total_assets - total_investment
+    if total_investment > 0:
+        final_profit_rate = ((final_total_assets - total_investment) / total_investment) * 100
+    else:
+        final_profit_rate = 0.0
+
+    final_result = {
+        'final_stock_value': final_stock_value,
+        'final_cash': cash,
+        'final_total_assets': final_total_assets,
+        'final_total_investment': total_investment,
+        'final_profit_amount': final_profit_amount,
+        'final_profit_rate': final_profit_rate,
+        'final_shares_held': shares_held,
+        'end_date_price': end_date_price,
+        'end_date_price_date': end_date_price_date,
+        'is_english': is_english,
+        'currency_symbol': '$',
+        'exchange_rate': exchange_rate
+    }
+    if not is_english:
+        final_result.update({
+            'final_stock_value_krw': final_stock_value * exchange_rate,
+            'final_cash_krw': cash * exchange_rate,
+            'final_total_assets_krw': final_total_assets * exchange_rate,
+            'final_total_investment_krw': total_investment * exchange_rate,
+            'final_profit_amount_krw': final_profit_amount * exchange_rate,
+        })
+    return records, final_result
+
+
+# 2001년 3~6월은 데이터 없음
+FIXTURE_ROWS = make_rows(date(2000, 1, 3), date(2004, 12, 31), gaps=[(date(2001, 3, 1), date(2001, 6, 30))])
+
+
+class SimulateDcaTests(SimpleTestCase):
+    """backtest.simulate_dca 가 기존 월별 반복 계산과 같은 값을 주는지"""
+
+    def assert_same_as_reference(self, rows, initial_capital, monthly_investment, start_date, end_date,
+                                 is_english=False, exchange_rate=1400.0):
+        days, closes = to_arrays(rows)
+        result = backtest.simulate_dca(days, closes, initial_capital, monthly_investment, start_date, end_date)
+        records = backtest.build_records(result, 'TEST', is_english, exchange_rate)
+        final_result = backtest.build_final_result(result, end_date, is_english, exchange_rate)
+
+        expected_records, expected_final = reference_dca(
+            rows, initial_capital, monthly_investment, start_date, end_date, is_english, exchange_rate
+        )
+        self.assertEqual(records, expected_records)
+        self.assertEqual(final_result, expected_final)
+        return records, final_result
+
+    def test_matches_monthly_loop(self):
+        records, final_result = self.assert_same_as_reference(
+            FIXTURE_ROWS, 10000.0, 500.0, date(2000, 2, 15), date(2004, 11, 20)
+        )
+        self.assertTrue(records)
+        self.assertIsNotNone(final_result)
+
+    def test_english_without_krw_values(self):
+        self.assert_same_as_reference(FIXTURE_ROWS, 3000.0, 250.0, date(2000, 1, 10), date(2003, 6, 1), is_english=True,
+                                      exchange_rate=1.0)
+
+    def test_start_day_29_to_31_uses_month_end(self):
+        for day in (29, 30, 31):
+            with self.subTest(day=day):
+                self.assert_same_as_reference(FIXTURE_ROWS, 5000.0, 300.0, date(2000, 1, day), date(2004, 12, 31))
+
+        schedule = backtest.investment_schedule(date(2000, 1, 31), date(2000, 4, 30))
+        self.assertEqual(
+            schedule.tolist(),
+            [to_day_number(d) for d in (date(2000, 1, 31), date(2000, 2, 29), date(2000, 3, 31), date(2000, 4, 30))]
+        )
+
+    def test_months_without_price_data(self):
+        # 데이터 시작 전 달과 중간에 데이터가 빈 달
+        self.assert_same_as_reference(FIXTURE_ROWS, 1000.0, 100.0, date(1999, 6, 15), date(2001, 12, 31))
+        self.assert_same_as_reference(FIXTURE_ROWS, 1000.0, 100.0, date(2001, 3, 1), date(2001, 9, 30))
+
+    def test_no_purchase_before_data(self):
+        records, final_result = self.assert_same_as_reference(
+            FIXTURE_ROWS, 1000.0, 100.0, date(1998, 1, 1), date(1999, 12, 31)
+        )
+        self.assertEqual(records, [])
+        self.assertIsNone(final_result)
+
+    def test_empty_series(self):
+        records, final_result = self.assert_same_as_reference([], 1000.0, 100.0, date(2000, 1, 1), date(2001, 1, 1))
+        self.assertEqual(records, [])
+        self.assertIsNone(final_result)
+
+    def test_start_after_end(self):
+        records, final_result = self.assert_same_as_reference(
+            FIXTURE_ROWS, 1000.0, 100.0, date(2003, 1, 1), date(2002, 1, 1)
+        )
+        self.assertEqual(records, [])
+        self.assertIsNone(final_result)
+        self.assertEqual(len(backtest.investment_schedule(date(2003, 1, 1), date(2002, 1, 1))), 0)
+
+    def test_zero_initial_capital(self):
+        self.assert_same_as_reference(FIXTURE_ROWS, 0.0, 100.0, date(2000, 3, 5), date(2002, 3, 5))
+
+
+class SimulateRollingStartsTests(SimpleTestCase):
+    """simulate_rolling_starts 가 시작 월마다 simulate_dca 를 호출한 것과 같은 값을 주는지"""
+
+    def assert_matches_per_start(self, rows, start_date, end_date, window_months=None):
+        days, closes = to_arrays(rows)
+        rolling = backtest.simulate_rolling_starts(
+            days, closes, 2000.0, 150.0, start_date, end_date, window_months=window_months
+        )
+        self.assertTrue(len(rolling['start_dates']))
+
+        for i, start_day in enumerate(rolling['start_dates'].tolist()):
+            start = from_day_number(start_day)
+            end = from_day_number(rolling['end_dates'][i]) if window_months else end_date
+            result = backtest.simulate_dca(days, closes, 2000.0, 150.0, start, end)
+            final_result = backtest.build_final_result(result, end, True, 1.0)
+
+            with self.subTest(start=start, end=end):
+                self.assertEqual(rolling['final_cash'][i], result['final_cash'])
+                self.assertEqual(rolling['final_shares_held'][i], result['final_shares_held'])
+                self.assertEqual(rolling['total_investment'][i], result['total_investment'])
+                if final_result is None:
+                    self.assertTrue(np.isnan(rolling['profit_rate'][i]))
+                else:
+                    self.assertEqual(rolling['final_total_assets'][i], final_result['final_total_assets'])
+                    self.assertEqual(rolling['profit_rate'][i], final_result['final_profit_rate'])
+        return rolling
+
+    def test_until_end_date(self):
+        rolling = self.assert_matches_per_start(FIXTURE_ROWS, date(1999, 10, 12), date(2004, 6, 30))
+        # 데이터 시작 전 달은 시작 월에서 빠짐 (중간에 빈 달은 직전 종가로 구매)
+        starts = [from_day_number(d) for d in rolling['start_dates'].tolist()]
+        self.assertEqual(starts[0], date(2000, 1, 12))
+        self.assertIn(date(2001, 4, 12), starts)
+
+    def test_fixed_window(self):
+        for window in (1, 12, 36):
+            with self.subTest(window=window):
+                rolling = self.assert_matches_per_start(
+                    FIXTURE_ROWS, date(2000, 1, 28), date(2004, 12, 31), window_months=window
+                )
+                self.assertTrue(all(
+                    (from_day_number(e).year - from_day_number(s).year) * 12
+                    + from_day_number(e).month - from_day_number(s).month == window - 1
+                    for s, e in zip(rolling['start_dates'].tolist(), rolling['end_dates'].tolist())
+                ))
+
+    def test_window_longer_than_range(self):
+        days, closes = to_arrays(FIXTURE_ROWS)
+        rolling = backtest.simulate_rolling_starts(
+            days, closes, 2000.0, 150.0, date(2004, 1, 5), date(2004, 12, 31), window_months=24
+        )
+        self.assertEqual(len(rolling['start_dates']), 0)
+        self.assertEqual(backtest.summarize_outcomes(rolling['profit_rate']), {'count': 0})
+
+
+class CrossProcessIngestionTests(TestCase):
+    """다른 프로세스가 데이터를 저장해도 캐시된 시계열/결과가 예전 값으로 남지 않는지"""
+
+    def setUp(self):
+        price_cache.invalidate()
+        self.addCleanup(price_cache.invalidate)
+        ingestion.store_price_rows({'AAA': make_rows(date(2020, 1, 1), date(2020, 12, 31))})
+
+    def ingest_elsewhere(self, rows):
+        """다른 프로세스의 수집처럼 저장 (이 프로세스의 가격 캐시는 무효화하지 않음)"""
+        now = timezone.now()
+        StockData.objects.bulk_create([
+            StockData(ticker='AAA', date=d, close_price=p, updated_at=now) for d, p in rows
+        ])
+        sync_state.record_ingestion('AAA', rows, now)
+
+    def test_cached_series_reloaded_after_new_version(self):
+        cached = price_cache.get_price_series('AAA')
+        self.ingest_elsewhere([(date(2021, 1, 4), 999.0)])
+
+        series = price_cache.get_price_series('AAA')
+        self.assertIsNot(series, cached)
+        self.assertEqual(series.last_date, date(2021, 1, 4))
+
+    def test_result_not_cached_under_new_version_with_old_series(self):
+        args = ('AAA', 1000.0, 100.0, date(2020, 2, 3), date(2021, 1, 31), True, 1.0)
+        price_cache.get_price_series('AAA')
+        _, before = simulate_investment(*args)
+        self.assertNotEqual(before['end_date_price'], 999.0)
+
+        self.ingest_elsewhere([(date(2021, 1, 4), 999.0)])
+        _, after = simulate_investment(*args)
+        self.assertEqual(after['end_date_price'], 999.0)
+
+        # 결과 캐시에 저장된 값도 새 데이터 기준
+        price_cache.invalidate()
+        _, cached = simulate_investment(*args)
+        self.assertEqual(cached, after)
+
+
+class MonthlySnapshotTests(TestCase):
+    """월별 스냅샷 경로가 일별 시계열과 같은 결과를 주는지 (증분 재계산, 최신이 아닐 때 대체 경로 포함)"""
+
+    GAPS = [(date(2020, 8, 3), date(2020, 10, 20))]
+
+    def setUp(self):
+        price_cache.invalidate()
+        self.addCleanup(price_cache.invalidate)
+        ingestion.store_price_rows({'AAA': make_rows(date(2020, 1, 1), date(2021, 6, 30), gaps=self.GAPS)})
+
+    def assert_same_as_daily(self, start_date, end_date):
+        snapshot_result = simulate_dca_from_snapshots('AAA', 10000.0, 500.0, start_date, end_date)
+        self.assertIsNotNone(snapshot_result)
+
+        series = price_cache.query_price_series('AAA')
+        daily_result = backtest.simulate_dca(series.days, series.closes, 10000.0, 500.0, start_date, end_date)
+        for is_english, exchange_rate in ((False, 1400.0), (True, 1.0)):
+            self.assertEqual(
+                backtest.build_records(snapshot_result, 'AAA', is_english, exchange_rate),
+                backtest.build_records(daily_result, 'AAA', is_english, exchange_rate),
+            )
+            self.assertEqual(
+                backtest.build_final_result(snapshot_result, end_date, is_english, exchange_rate),
+                backtest.build_final_result(daily_result, end_date, is_english, exchange_rate),
+            )
+
+    def snapshot_rows(self):
+        return set(MonthlyPriceSnapshot.objects.filter(ticker='AAA').values_list(
+            'investment_day', 'month_index', 'price_date', 'close_price', 'high_price'
+        ))
+
+    def test_matches_daily_series(self):
+        for day in (1, 4, 15, 28):
+            self.assert_same_as_daily(date(2020, 1, day), date(2021, 6, 20))
+        # 데이터 시작 전과 공백 구간에 걸친 기간
+        self.assert_same_as_daily(date(2019, 10, 10), date(2020, 12, 31))
+
+    def test_incremental_rebuild_matches_full_rebuild(self):
+        ingestion.store_price_rows({
+            'AAA': make_rows(date(2020, 8, 10), date(2020, 8, 21), base=80.0)
+            + make_rows(date(2021, 7, 1), date(2021, 9, 30), base=90.0)
+        })
+        self.assertEqual(sync_state.get_state('AAA').snapshot_through, date(2021, 9, 30))
+        incremental = self.snapshot_rows()
+
+        snapshots.rebuild('AAA', full=True)
+        self.assertEqual(self.snapshot_rows(), incremental)
+        self.assert_same_as_daily(date(2020, 3, 9), date(2021, 9, 30))
+
+    def test_falls_back_to_daily_series_when_snapshot_is_stale(self):
+        args = ('AAA', 10000.0, 500.0, date(2020, 2, 3), date(2021, 7, 31), True, 1.0)
+        schedule = backtest.investment_schedule(date(2020, 2, 3), date(2021, 6, 30))
+        self.assertIsNotNone(snapshots.load_schedule('AAA', 3, schedule))
+
+        # 스냅샷 재계산 없이 새 데이터만 반영된 상태
+        now = timezone.now()
+        StockData.objects.create(ticker='AAA', date=date(2021, 7, 1), close_price=999.0, updated_at=now)
+        sync_state.record_ingestion('AAA', [(date(2021, 7, 1), 999.0)], now)
+
+        state = sync_state.get_state('AAA')
+        self.assertNotEqual(state.snapshot_through, state.last_price_date)
+        self.assertIsNone(snapshots.load_schedule('AAA', 3, schedule))
+        self.assertIsNone(simulate_dca_from_snapshots(*args[:5]))
+
+        _, final_result = simulate_investment(*args)
+        self.assertEqual(final_result['end_date_price'], 999.0)
+
+    def test_falls_back_past_last_price_month(self):
+        schedule = backtest.investment_schedule(date(2021, 1, 5), date(2021, 8, 31))
+        self.assertIsNone(snapshots.load_schedule('AAA', 5, schedule))
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'locks': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'refresh-lock-tests'},
+    },
+    REFRESH_LOCK_CACHE_ALIAS='locks',
+)
+class RefreshLockTests(SimpleTestCase):
+    def tearDown(self):
+        refresh_lock._cache().clear()
+
+    def release_later(self, ticker, token, delay=0.2):
+        timer = threading.Timer(delay, refresh_lock.release, (ticker, token))
+        timer.start()
+        self.addCleanup(timer.join)
+
+    def test_single_holder(self):
+        contended = metrics.REFRESH_LOCK_CONTENDED.value()
+        token = refresh_lock.acquire('AAA')
+
+        self.assertIsNotNone(token)
+        self.assertIsNone(refresh_lock.acquire('AAA'))
+        self.assertIsNotNone(refresh_lock.acquire('BBB'))
+        self.assertEqual(metrics.REFRESH_LOCK_CONTENDED.value(), contended + 1)
+
+        refresh_lock.release('AAA', 'someone-else')
+        self.assertTrue(refresh_lock.is_locked('AAA'))
+        refresh_lock.release('AAA', token)
+        self.assertFalse(refresh_lock.is_locked('AAA'))
+
+    @override_settings(REFRESH_LOCK_TIMEOUT=1)
+    def test_expired_lease_is_not_released_by_old_owner(self):
+        old = refresh_lock.acquire('AAA')
+        time.sleep(1.1)
+
+        new = refresh_lock.acquire('AAA')
+        self.assertIsNotNone(new)
+        refresh_lock.release('AAA', old)
+        self.assertTrue(refresh_lock.is_locked('AAA'))
+
+    def test_acquire_many(self):
+        refresh_lock.acquire('BBB')
+        owned = refresh_lock.acquire_many(['AAA', 'BBB', 'CCC'])
+
+        self.assertEqual(sorted(owned), ['AAA', 'CCC'])
+        refresh_lock.release_many(owned)
+        self.assertFalse(refresh_lock.is_locked('AAA'))
+        self.assertTrue(refresh_lock.is_locked('BBB'))
+
+    def test_wait_until_released(self):
+        self.release_later('AAA', refresh_lock.acquire('AAA'))
+        self.assertTrue(refresh_lock.wait('AAA', timeout=5))
+
+    def test_wait_timeout(self):
+        timeouts = metrics.REFRESH_LOCK_WAIT_TIMEOUTS.value()
+        refresh_lock.acquire('AAA')
+
+        started = time.monotonic()
+        self.assertFalse(refresh_lock.wait('AAA', timeout=0.3))
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+        self.assertEqual(metrics.REFRESH_LOCK_WAIT_TIMEOUTS.value(), timeouts + 1)
+
+    def test_late_fetch_keeps_lease_until_done(self):
+        errors = metrics.PRICE_UPDATE_ERRORS.value(provider='test')
+        finish = threading.Event()
+
+        def fetch(batch):
+            if batch == ('BBB', 'CCC'):
+                finish.wait(5)
+                return {}
+            if batch == ('DDD',):
+                raise ValueError('bad response')
+            return {'AAA': []}
+
+        owned = refresh_lock.acquire_many(['AAA', 'BBB', 'CCC', 'DDD'])
+        results, running = refresh.fetch_concurrently(fetch, [('AAA',), ('BBB', 'CCC'), ('DDD',)], 'test',
+                                                      deadline=0.3)
+        self.assertEqual(results, {('AAA',): {'AAA': []}})
+        self.assertEqual(list(running), [('BBB', 'CCC')])
+        self.assertEqual(metrics.PRICE_UPDATE_ERRORS.value(provider='test'), errors + 2)
+
+        # 진행 중인 묶음의 임대는 호출한 쪽이 풀지 않고 다운로드가 끝날 때 풀림
+        refresh.release_when_done(running, owned)
+        refresh_lock.release_many(owned)
+        self.assertEqual(sorted(owned), ['AAA', 'DDD'])
+        self.assertFalse(refresh_lock.is_locked('AAA'))
+        self.assertTrue(refresh_lock.is_locked('BBB'))
+
+        finish.set()
+        self.assertTrue(refresh_lock.wait('BBB', timeout=5))
+        self.assertTrue(refresh_lock.wait('CCC', timeout=5))
+
+    async def test_await_release(self):
+        self.release_later('AAA', refresh_lock.acquire('AAA'))
+        self.assertTrue(await refresh_lock.await_release('AAA', timeout=5))
+
+        refresh_lock.acquire('AAA')
+        self.assertFalse(await refresh_lock.await_release('AAA', timeout=0.2))
+
+    def test_fetch_now_single_flight(self):
+        calls = []
+
+        def slow_update(ticker):
+            calls.append(ticker)
+            time.sleep(0.3)
+            return 1
+
+        with mock.patch('calculator.views.update_stock_data_optimized', side_effect=slow_update):
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(refresh.fetch_now('AAA', refresh.SOURCE_YFINANCE)))
+                for _ in range(3)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(calls, ['AAA'])
+        self.assertEqual(results.count(1), 1)
+        self.assertFalse(refresh_lock.is_locked('AAA'))
+
+    def test_fetch_now_without_wait_when_locked(self):
+        refresh_lock.acquire('AAA')
+        with mock.patch('calculator.views.update_stock_data_optimized') as update:
+            result = refresh.fetch_now('AAA', refresh.SOURCE_YFINANCE, wait=False)
+
+        update.assert_not_called()
+        self.assertIn('갱신 중', result)
+
+    def test_fetch_now_releases_on_exception(self):
+        with mock.patch('calculator.views.update_stock_data_optimized', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                refresh.fetch_now('AAA', refresh.SOURCE_YFINANCE)
+
+        self.assertFalse(refresh_lock.is_locked('AAA'))
+
+    async def test_afetch_now_releases_on_exception(self):
+        with mock.patch('calculator.views.aupdate_stock_data_optimized', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                await refresh.afetch_now('AAA', refresh.SOURCE_YFINANCE)
+
+        self.assertFalse(refresh_lock.is_locked('AAA'))
+
+
+class RequestTimingMiddlewareTests(SimpleTestCase):
+    def respond(self, **cache_control):
+        def get_response(request):
+            response = HttpResponse('ok')
+            if cache_control:
+                patch_cache_control(response, **cache_control)
+            return response
+
+        return RequestTimingMiddleware(get_response)(RequestFactory().get('/'))
+
+    def test_header_on_private_responses(self):
+        self.assertIn('total;dur=', self.respond()['Server-Timing'])
+        self.assertIn('Server-Timing', self.respond(private=True, max_age=60))
+
+    def test_no_header_on_shared_cacheable_responses(self):
+        self.assertNotIn('Server-Timing', self.respond(public=True, max_age=600))
+        self.assertNotIn('Server-Timing', self.respond(s_maxage=600))
+
+    @override_settings(REQUEST_TIMING_HEADER=False)
+    def test_header_disabled(self):
+        self.assertNotIn('Server-Timing', self.respond())
+
+
+class WarmerStartTests(SimpleTestCase):
+    """예열 스레드는 웹 진입점/gunicorn 훅에서만 시작하고 fork 된 자식에 자동으로 퍼지지 않는지"""
+
+    def test_web_entry_point_follows_setting(self):
+        with mock.patch.object(warmup, 'start_warmer') as start:
+            with override_settings(PRICE_CACHE_WARMUP_ON_STARTUP=False):
+                warmup.start_web_warmer()
+            start.assert_not_called()
+            with override_settings(PRICE_CACHE_WARMUP_ON_STARTUP=True):
+                warmup.start_web_warmer()
+            start.assert_called_once_with()
+
+    def test_error_is_counted_and_does_not_stop_the_loop(self):
+        errors = metrics.CACHE_WARMUP_ERRORS.value()
+        with mock.patch.object(warmup, 'warm', side_effect=OSError('bad store file')), \
+                self.assertLogs('calculator.warmup', 'ERROR') as logs:
+            self.assertEqual(warmup._warm_once('interval'), 0)
+
+        self.assertEqual(metrics.CACHE_WARMUP_ERRORS.value(), errors + 1)
+        self.assertIn('bad store file', logs.output[0])
+
+    def test_start_does_not_register_fork_hook(self):
+        with mock.patch.object(warmup, '_warmer', None), mock.patch.object(warmup, '_warmer_pid', None), \
+                mock.patch.object(warmup.threading, 'Thread') as thread, \
+                mock.patch.object(warmup.os, 'register_at_fork', create=True) as register:
+            warmup.start_warmer()
+            warmup.start_warmer()
+        thread.return_value.start.assert_called_once_with()
+        register.assert_not_called()
+
+
+def yfinance_frame(rows_by_ticker):
+    """yf.download(..., group_by='ticker') 와 같은 (티커, 열) 2단 열 DataFrame"""
+    return pd.concat({
+        ticker: pd.DataFrame({'Close': [p for _, p in rows]}, index=pd.DatetimeIndex([d for d, _ in rows]))
+        for ticker, rows in rows_by_ticker.items()
+    }, axis=1)
+
+
+class IngestPricesCommandTests(TestCase):
+    """ingest_prices 가 새 티커는 전체 기간, 저장된 티커는 마지막 날짜 다음부터 묶음으로 받아 저장하는지"""
+
+    ROWS = {
+        'AAA': make_rows(date(2020, 1, 1), date(2020, 12, 31)),
+        'BBB': make_rows(date(2019, 1, 1), date(2020, 12, 31), base=30.0),
+    }
+
+    def setUp(self):
+        price_cache.invalidate()
+        self.addCleanup(price_cache.invalidate)
+        ingestion.store_price_rows({'AAA': [row for row in self.ROWS['AAA'] if row[0] <= date(2020, 6, 30)]})
+
+    def download(self, batch, start=None, **kwargs):
+        return yfinance_frame({
+            ticker: [row for row in self.ROWS[ticker] if start is None or row[0] >= start] for ticker in batch
+        })
+
+    def test_ingests_new_and_incremental_tickers(self):
+        with mock.patch('yfinance.download', side_effect=self.download) as download:
+            call_command('ingest_prices', 'aaa', 'bbb', stdout=StringIO())
+
+        calls = [(c.args[0], c.kwargs.get('start'), c.kwargs.get('period')) for c in download.call_args_list]
+        self.assertEqual(calls, [(['BBB'], None, 'max'), (['AAA'], date(2020, 7, 1), None)])
+
+        for ticker, rows in self.ROWS.items():
+            stored = list(StockData.objects.filter(ticker=ticker).order_by('date').values_list('date', 'close_price'))
+            self.assertEqual([(d, float(p)) for d, p in stored], rows)
+            state = sync_state.get_state(ticker)
+            self.assertEqual((state.last_price_date, state.row_count), (date(2020, 12, 31), len(rows)))
+
+    def test_requires_tickers(self):
+        with self.assertRaises(CommandError):
+            call_command('ingest_prices', stdout=StringIO())
+
+
+class ColumnarStoreTests(TestCase):
+    """컬럼형 파일 저장/메모리 맵 읽기와 파일이 없거나 깨졌을 때 DB 대체 경로"""
+
+    ROWS = make_rows(date(2020, 1, 1), date(2020, 3, 31), gaps=[(date(2020, 2, 10), date(2020, 2, 14))])
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(PRICE_STORE_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        price_cache.invalidate()
+        self.addCleanup(price_cache.invalidate)
+
+    def test_round_trip(self):
+        days, closes = to_arrays(self.ROWS[:-1])  # 홀수 행 (종가 앞 패딩)
+        columnar_store.write_series('^TEST.X/1', days, closes)
+
+        stored_days, stored_closes, version = columnar_store.read_series('^TEST.X/1')
+        np.testing.assert_array_equal(stored_days, days)
+        np.testing.assert_array_equal(stored_closes, closes)
+        self.assertEqual(version, columnar_store.file_version('^TEST.X/1'))
+        self.assertIsNone(columnar_store.read_series('NONE'))
+
+    def test_invalid_file_is_ignored(self):
+        for content in (b'PXC1', b'XXXX' + b'\0' * 28):
+            with open(columnar_store.path_for('AAA'), 'wb') as f:
+                f.write(content)
+            self.assertIsNone(columnar_store.read_series('AAA'))
+
+    def test_ingestion_writes_file_and_cache_reads_it(self):
+        ingestion.store_price_rows({'AAA': self.ROWS})
+        self.assertTrue(os.path.exists(columnar_store.path_for('AAA')))
+
+        with self.assertNumQueries(1):  # 데이터 버전 확인만
+            series = price_cache.load_price_series('AAA')
+        self.assertIsNotNone(series.version)
+        np.testing.assert_array_equal(series.days, to_arrays(self.ROWS)[0])
+        np.testing.assert_array_equal(series.closes, to_arrays(self.ROWS)[1])
+
+    def test_missing_or_broken_file_falls_back_to_db(self):
+        ingestion.store_price_rows({'AAA': self.ROWS})
+        cached = price_cache.get_price_series('AAA')
+
+        with open(columnar_store.path_for('AAA'), 'wb') as f:
+            f.write(b'broken')
+        # 파일이 바뀌었으므로 캐시된 시계열은 쓰지 않고, DB에서 읽어 파일을 다시 만듦
+        series = price_cache.get_price_series('AAA')
+        self.assertIsNot(series, cached)
+        self.assertEqual(series.price_on_or_before(date(2020, 2, 12)), price_on_or_before(self.ROWS, date(2020, 2, 12)))
+        self.assertIsNotNone(columnar_store.read_series('AAA'))
+
+        os.remove(columnar_store.path_for('AAA'))
+        price_cache.invalidate()
+        self.assertEqual(len(price_cache.get_price_series('AAA')), len(self.ROWS))
+        self.assertTrue(os.path.exists(columnar_store.path_for('AAA')))
+
+
+class ViewCountBufferTests(TestCase):
+    """조회수는 메모리에만 모았다가 flush 때 티커별로 한 번에 반영하는지"""
+
+    def setUp(self):
+        with view_counts._lock:
+            view_counts._pending.clear()
+            view_counts._last_viewed.clear()
+
+    def test_record_then_flush(self):
+        TickerViewCount.objects.create(ticker='AAA', view_count=5)
+
+        with self.assertNumQueries(0):
+            for ticker in ('AAA', 'BBB', 'AAA', 'AAA', 'BBB'):
+                view_counts.record_view(ticker)
+        self.assertEqual(view_counts.pending_counts(), {'AAA': 3, 'BBB': 2})
+        # 반영 스레드는 웹 서버 진입점에서 켠 프로세스에서만 시작
+        self.assertIsNone(view_counts._flusher)
+
+        # AAA: UPDATE 한 번, BBB: UPDATE(0행) 후 INSERT
+        with self.assertNumQueries(3):
+            self.assertEqual(view_counts.flush(), 2)
+        counts = dict(TickerViewCount.objects.values_list('ticker', 'view_count'))
+        self.assertEqual(counts, {'AAA': 8, 'BBB': 2})
+
+        self.assertEqual(view_counts.pending_counts(), {})
+        with self.assertNumQueries(0):
+            self.assertEqual(view_counts.flush(), 0)
+
+
+class CalculatorApiTests(TestCase):
+    """JSON API 입력 검증과 출력 형식 (columnar, records=0)"""
+
+    PARAMS = {
+        'ticker': 'aaa', 'initial_capital': '10000', 'monthly_investment': '500',
+        'start_date': '2000-02-15', 'end_date': '2004-11-20',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        ingestion.store_price_rows({'AAA': FIXTURE_ROWS})
+
+    def setUp(self):
+        price_cache.invalidate()
+        self.addCleanup(price_cache.invalidate)
+        self.client = Client(enforce_csrf_checks=True)
+
+    def expected(self):
+        records, final_result = reference_dca(
+            FIXTURE_ROWS, 10000.0, 500.0, date(2000, 2, 15), date(2004, 11, 20), True, 1400.0
+        )
+        records = [dict(record, action='AAA') for record in records]  # 기준 구현은 티커를 TEST 로 기록
+        return json.loads(json.dumps({'records': records, 'final_result': final_result}, cls=DjangoJSONEncoder))
+
+    def test_calculate(self):
+        response = self.client.post(reverse('api_calculator'), self.PARAMS)  # CSRF 토큰 없이 호출 가능
+
+        self.assertEqual(response.status_code, 200)
+        expected = self.expected()
+        self.assertEqual(response.json(), dict(expected, ticker='AAA'))
+        self.assertTrue(expected['records'])
+
+    def test_columnar_and_without_records(self):
+        records = self.expected()['records']
+        data = self.client.get(reverse('api_calculator'), dict(self.PARAMS, format='columnar')).json()
+        self.assertEqual(list(data['records']), list(records[0]))
+        self.assertEqual(data['records']['date'], [record['date'] for record in records])
+
+        data = self.client.get(reverse('api_calculator'), dict(self.PARAMS, records='0')).json()
+        self.assertNotIn('records', data)
+        self.assertEqual(data['final_result'], self.expected()['final_result'])
+
+    def test_validation_errors(self):
+        response = self.client.get(reverse('api_calculator'), dict(self.PARAMS, start_date='not-a-date', ticker=''))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.json()['errors']), ['start_date', 'ticker'])
+
+        for window_months in ('abc', '-1'):
+            response = self.client.get(reverse('api_calculator_rolling'), dict(self.PARAMS, window_months=window_months))
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('window_months', response.json()['errors'])
+
+        self.assertEqual(self.client.put(reverse('api_calculator'), self.PARAMS).status_code, 405)
+
+    def test_rolling(self):
+        params = dict(self.PARAMS, window_months='12')
+        data = self.client.get(reverse('api_calculator_rolling'), params).json()
+        outcomes = data['records']
+        self.assertEqual(data['ticker'], 'AAA')
+        self.assertEqual(outcomes[0]['start_date'], '2000-02-15')
+        self.assertEqual(outcomes[0]['total_investment'], 10000.0 + 500.0 * 11)
+        self.assertEqual(data['summary']['count'], len(outcomes))
+
+        data = self.client.get(reverse('api_calculator_rolling'), dict(params, format='columnar', records='0')).json()
+        self.assertEqual(sorted(data), ['summary', 'ticker'])
+
+
+class CalculateInvestmentAsyncTests(TestCase):
+    """비동기 계산기 뷰: 데이터가 없으면 바로 받아 저장 후 계산, 오래되었으면 갱신 예약만"""
+
+    PARAMS = CalculatorApiTests.PARAMS
+
+    def setUp(self):
+        price_cache.invalidate()
+        self.addCleanup(price_cache.invalidate)
+
+    def history(self, ticker, start_date=None):
+        rows = [row for row in FIXTURE_ROWS if start_date is None or row[0] >= start_date]
+        return pd.DataFrame({'Close': [p for _, p in rows]}, index=pd.DatetimeIndex([d for d, _ in rows]))
+
+    async def post(self):
+        """(응답, 렌더링 context, 다운로드 mock)"""
+        with mock.patch('calculator.views.fetch_yfinance_history', side_effect=self.history) as fetch, \
+                mock.patch('calculator.views.calculator_response', wraps=calculator_response) as respond:
+            response = await calculate_investment_async(AsyncRequestFactory().post('/en/', self.PARAMS))
+        return response, respond.call_args.args[2], fetch
+
+    def assert_expected_result(self, context):
+        records, final_result = reference_dca(
+            FIXTURE_ROWS, 10000.0, 500.0, date(2000, 2, 15), date(2004, 11, 20), True, 1400.0
+        )
+        self.assertEqual(context['final_result'], final_result)
+        self.assertEqual(context['records'], [dict(record, action='AAA') for record in records])
+
+    async def test_fetches_missing_ticker(self):
+        response, context, fetch = await self.post()
+
+        self.assertEqual(response.status_code, 200)
+        fetch.assert_called_once_with('AAA', None)
+        self.assertEqual(await sync_to_async(StockData.objects.filter(ticker='AAA').count)(), len(FIXTURE_ROWS))
+        self.assert_expected_result(context)
+
+    async def test_stale_ticker_is_queued_not_fetched(self):
+        await sync_to_async(ingestion.store_price_rows)({'AAA': FIXTURE_ROWS})
+        await sync_to_async(TickerSyncState.objects.filter(pk='AAA').update)(
+            last_fetched_at=timezone.now() - timedelta(days=2)
+        )
+
+        response, context, fetch = await self.post()
+
+        self.assertEqual(response.status_code, 200)
+        fetch.assert_not_called()
+        self.assertTrue(await sync_to_async(PriceRefreshRequest.objects.filter(ticker='AAA').exists)())
+        self.assert_expected_result(context)
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    """기준선 비교: 측정 조건이 다르면 비교하지 않고, 실행 시간은 요청할 때만 비교"""
+
+    META = {'tickers': 20, 'years': 40, 'repeat': 5, 'rows': 100}
+    BASELINE = {'meta': META, 'cases': {'case': {'median_ms': 1.0, 'queries': 2}}}
+
+    def results(self, median_ms=1.0, queries=2, **meta):
+        return {'meta': dict(self.META, **meta), 'cases': {'case': {'median_ms': median_ms, 'queries': queries}}}
+
+    def test_meta_mismatch(self):
+        with self.assertRaisesMessage(ValueError, 'tickers 20 → 3'):
+            benchmarks.compare(self.results(tickers=3), self.BASELINE)
+        # 행 수는 측정 조건이 아님
+        self.assertEqual(benchmarks.compare(self.results(rows=99), self.BASELINE), [])
+
+    def test_queries_always_timings_on_request(self):
+        self.assertEqual(benchmarks.compare(self.results(median_ms=5.0), self.BASELINE), [])
+        self.assertEqual(len(benchmarks.compare(self.results(median_ms=5.0), self.BASELINE, timings=True)), 1)
+        self.assertEqual(benchmarks.compare(self.results(queries=3), self.BASELINE), [('case', '쿼리 2 → 3')])
+
+
+class MetricsEndpointTests(TestCase):
+    """/admin/metrics/ 는 관리자 또는 METRICS_TOKEN 만, 그 밖에는 403"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        cls.user = get_user_model().objects.create_user('user', password='x')
+
+    def test_anonymous_and_non_staff_forbidden(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    def test_staff(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        self.assertIn('# TYPE investment_calculator_price_update_errors_total counter', response.content.decode())
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+
+class BenchmarkIndexesCommandTests(TestCase):
+    """benchmark_indexes 는 --drop-indexes 를 줄 때만, 확인 후 인덱스를 지움"""
+
+    ARGS = ('benchmark_indexes', '--tickers', '2', '--years', '1', '--samples', '3')
+
+    def run_command(self, *args, answer=None):
+        with mock.patch.object(benchmarks, 'drop_indexes') as drop, \
+                mock.patch.object(benchmarks, 'create_indexes') as create, \
+                mock.patch('builtins.input', return_value=answer) as prompt:
+            call_command(*self.ARGS, *args, stdout=StringIO())
+        return drop, create, prompt
+
+    def test_default_keeps_indexes(self):
+        drop, create, prompt = self.run_command()
+        drop.assert_not_called()
+        create.assert_not_called()
+        prompt.assert_not_called()
+        self.assertFalse(StockData.objects.filter(ticker__startswith=benchmarks.INDEX_TICKER_PREFIX).exists())
+
+    def test_drop_indexes_requires_confirmation(self):
+        with self.assertRaises(CommandError):
+            self.run_command('--drop-indexes', answer='no')
+
+        drop, create, prompt = self.run_command('--drop-indexes', answer='yes')
+        prompt.assert_called_once()
+        drop.assert_called_once()
+        create.assert_called_once_with(drop.call_args.args[0])
+
+        drop, _, prompt = self.run_command('--drop-indexes', '--noinput')
+        prompt.assert_not_called()
+        drop.assert_called_once()
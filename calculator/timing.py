@@ -0,0 +1,157 @@
+"""요청별 처리 시간 측정 (Server-Timing)
+
+RequestTimingMiddleware 가 요청마다 Timings 를 만들어 contextvar 에 두면, 뷰와 수집 코드는
+`with timing.span('simulation'):` 처럼 구간 시간을 더한다. DB 쿼리는 모든 연결에 설치한
+execute_wrapper 가 수와 시간을 센다. 측정 중인 요청이 없으면 span 은 아무것도 하지 않는다.
+
+결과는 응답의 Server-Timing 헤더(브라우저 개발자 도구의 Timing 탭에 표시)와
+'calculator.timing' 로거의 한 줄 JSON 로그로 남긴다.
+
+    MIDDLEWARE = [
+        'calculator.middleware.RequestTimingMiddleware',
+        ...
+    ]
+
+REQUEST_TIMING_HEADER = False 이면 헤더는 빼고 로그만 남긴다 (내부 구간을 공개하지 않을 때).
+Cache-Control 이 public 이거나 s-maxage 가 있는 응답(공유 캐시 저장 대상)에는 헤더를 넣지 않는다.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('calculator.timing')
+
+# 구간 이름 (Server-Timing 메트릭 이름)
+DB = 'db'
+FETCH = 'fetch'
+LOCK_WAIT = 'lock-wait'
+ATH = 'ath'
+SIMULATION = 'simulation'
+RENDER = 'render'
+TOTAL = 'total'
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class Timings:
+    """한 요청의 구간별 누적 시간(ms)과 DB 쿼리 수"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_ms = 0.0
+        # (구간 이름, 세부 설명) → [누적 ms, 횟수], 삽입 순서 유지
+        self.spans = {}
+        # 다운로드는 스레드 풀에서도 기록하므로 잠금
+        self._lock = threading.Lock()
+
+    def add(self, name, ms, detail=None):
+        with self._lock:
+            entry = self.spans.setdefault((name, detail), [0.0, 0])
+            entry[0] += ms
+            entry[1] += 1
+
+    def add_query(self, ms):
+        with self._lock:
+            self.db_queries += 1
+            self.db_ms += ms
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def header(self, total_ms):
+        """Server-Timing 헤더 값"""
+        entries = [f'{DB};dur={self.db_ms:.1f};desc="{self.db_queries} queries"']
+        for (name, detail), (ms, _) in self.spans.items():
+            entry = f'{name};dur={ms:.1f}'
+            if detail:
+                entry += ';desc="%s"' % str(detail).replace('\\', '\\\\').replace('"', '\\"')
+            entries.append(entry)
+        entries.append(f'{TOTAL};dur={total_ms:.1f}')
+        return ', '.join(entries)
+
+    def as_dict(self, total_ms):
+        """로그용 요약 (세부 설명이 있는 구간은 {설명: ms} 로 묶음)"""
+        spans = {}
+        for (name, detail), (ms, _) in self.spans.items():
+            if detail:
+                spans.setdefault(name, {})[str(detail)] = round(ms, 1)
+            else:
+                spans[name] = round(ms, 1)
+        return {
+            'total_ms': round(total_ms, 1),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_ms, 1),
+            'spans': spans,
+        }
+
+
+def start():
+    """현재 컨텍스트에서 측정 시작, (Timings, 복원 토큰) 반환"""
+    timings = Timings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def span(name, detail=None):
+    """with 블록 실행 시간을 현재 요청의 구간에 더함 (측정 중이 아니면 그대로 실행)"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - started) * 1000, detail)
+
+
+def record_query(execute, sql, params, many, context):
+    """DB execute_wrapper: 측정 중인 요청의 쿼리 수와 시간 기록"""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query((time.perf_counter() - started) * 1000)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """connection_created 시그널 수신: 새 DB 연결에 record_query 설치"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def is_shared_cacheable(response):
+    """프록시/CDN 같은 공유 캐시가 저장할 수 있는 응답인지 (Cache-Control public 또는 s-maxage)"""
+    directives = {
+        directive.split('=', 1)[0].strip().lower()
+        for directive in response.get('Cache-Control', '').split(',')
+    }
+    return bool(directives & {'public', 's-maxage'})
+
+
+def log_request(request, response, timings, total_ms):
+    """요청 한 건의 측정 결과를 JSON 한 줄로 기록"""
+    line = {
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+    }
+    line.update(timings.as_dict(total_ms))
+    logger.info(json.dumps(line, ensure_ascii=False, separators=(',', ':')))
@@ -0,0 +1,123 @@
+"""티커 조회수 버퍼
+
+요청마다 DB에 쓰지 않고 프로세스 메모리에 조회수를 모아 두었다가, 백그라운드
+스레드가 주기적으로 티커마다 UPDATE 한 번으로 TickerViewCount 에 반영한다.
+
+반영 스레드는 웹 서버 진입점(wsgi/asgi)이 enable_background_flush() 를 부른 프로세스에서
+첫 조회가 기록될 때 시작한다 (fork 된 워커마다 따로 시작). 관리 명령이나 테스트처럼
+켜지 않은 프로세스는 flush() 를 직접 부르거나 종료할 때 남은 조회수를 반영한다.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, connections
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .models import TickerViewCount
+
+DEFAULT_FLUSH_INTERVAL = 60  # 초
+
+_pending = Counter()
+_last_viewed = {}
+_lock = threading.Lock()
+_flusher = None
+_flusher_pid = None
+_background_flush = False
+_exit_hook_registered = False
+
+
+def _flush_interval():
+    return getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+
+
+def record_view(ticker):
+    """조회수 1 증가 (메모리에만 기록)"""
+    global _exit_hook_registered
+    with _lock:
+        _pending[ticker] += 1
+        _last_viewed[ticker] = timezone.now()
+        if not _exit_hook_registered:
+            atexit.register(flush)
+            _exit_hook_registered = True
+    if _background_flush:
+        _ensure_flusher()
+
+
+def enable_background_flush():
+    """이 프로세스(와 fork 될 워커)에서 주기적 반영 스레드 사용 (웹 서버 진입점에서 호출)"""
+    global _background_flush
+    _background_flush = True
+
+
+def pending_counts():
+    with _lock:
+        return dict(_pending)
+
+
+def flush():
+    """모아 둔 조회수를 티커별 UPDATE 한 번으로 반영, 반영한 티커 수 반환"""
+    with _lock:
+        pending = dict(_pending)
+        last_viewed = dict(_last_viewed)
+        _pending.clear()
+        _last_viewed.clear()
+
+    for ticker, delta in pending.items():
+        try:
+            _apply(ticker, delta, last_viewed[ticker])
+        except Exception as e:
+            # 실패한 증가분은 다음 반영 때 다시 시도
+            with _lock:
+                _pending[ticker] += delta
+                _last_viewed.setdefault(ticker, last_viewed[ticker])
+            metrics.VIEW_COUNT_FLUSH_ERRORS.inc()
+            print(f"조회수 반영 중 오류: {e}")
+
+    return len(pending)
+
+
+def _apply(ticker, delta, viewed_at):
+    updated = TickerViewCount.objects.filter(ticker=ticker).update(
+        view_count=F('view_count') + delta,
+        last_viewed=viewed_at
+    )
+    if updated:
+        return
+
+    try:
+        TickerViewCount.objects.create(ticker=ticker, view_count=delta)
+    except IntegrityError:
+        # 다른 프로세스가 먼저 만든 경우
+        TickerViewCount.objects.filter(ticker=ticker).update(
+            view_count=F('view_count') + delta,
+            last_viewed=viewed_at
+        )
+
+
+def _run_flusher():
+    while True:
+        time.sleep(_flush_interval())
+        flush()
+        connections.close_all()
+
+
+def _ensure_flusher():
+    """프로세스마다 반영 스레드를 하나 띄움 (fork 된 워커에서도 새로 시작)"""
+    global _flusher, _flusher_pid
+    if _flusher is not None and _flusher_pid == os.getpid():
+        return
+
+    with _lock:
+        if _flusher is not None and _flusher_pid == os.getpid():
+            return
+        _flusher = threading.Thread(
+            target=_run_flusher, name='view-count-flusher', daemon=True
+        )
+        _flusher_pid = os.getpid()
+        _flusher.start()
@@ -1,15 +1,12 @@
-import yfinance as yf
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
-from django.utils import timezone
-from datetime import timedelta
-from .models import StockData
 from .forms import InvestmentForm
-from dateutil.relativedelta import relativedelta
-from .models import TickerViewCount
-from django.db.models import F
+from . import backtest, ingestion, metrics, price_cache, refresh, result_cache, snapshots, timing, view_counts
 from django.utils import translation
 from django.conf import settings
 
+EXCHANGE_RATE = 1400.0
+
 
 
 def set_language_from_url(request):
@@ -42,289 +39,260 @@ def set_language_from_url(request):
 
 
 def search_stock_data(ticker):
-    # 마지막 업데이트 시간 확인
-    last_update = StockData.objects.filter(ticker=ticker).order_by('-updated_at').first()
+    # 요청 처리 중에는 외부 API를 기다리지 않음 (데이터가 전혀 없을 때만 바로 가져옴)
+    try:
+        state, result = refresh.ensure_data(ticker, refresh.SOURCE_YFINANCE)
+    except Exception as e:
+        return None, f"업데이트 실패: {str(e)}"
+
+    if state == refresh.FRESH:
+        return None, "데이터가 최신 상태입니다."
+    if state == refresh.STALE:
+        # 저장된 데이터로 계산하고 갱신은 백그라운드 워커에 맡김
+        return state, "최신 데이터 업데이트 예약됨"
+    return result, "업데이트 완료"
 
-    if last_update:
-        time_diff = timezone.now() - last_update.updated_at
-        if time_diff < timedelta(hours=18):
-            return None, "데이터가 최신 상태입니다."
 
-    # 데이터 업데이트 실행
+async def asearch_stock_data(ticker):
+    """search_stock_data 의 비동기 버전"""
     try:
-        result = update_stock_data_optimized(ticker)
-        return result, "업데이트 완료"
+        state, result = await refresh.aensure_data(ticker, refresh.SOURCE_YFINANCE)
     except Exception as e:
         return None, f"업데이트 실패: {str(e)}"
 
+    if state == refresh.FRESH:
+        return None, "데이터가 최신 상태입니다."
+    if state == refresh.STALE:
+        return state, "최신 데이터 업데이트 예약됨"
+    return result, "업데이트 완료"
+
 
 def update_stock_data_optimized(ticker):
     try:
-        # 기존 데이터의 가장 최근 날짜 확인
-        latest_data = StockData.objects.filter(ticker=ticker).order_by('-date').first()
+        # 기존 데이터의 가장 최근 날짜 확인 (이미 최신이면 None)
+        window = ingestion.fetch_window(ticker)
+        if window is None:
+            return 0
 
-        stock = yf.Ticker(ticker)
+        latest_date, start_date = window
+        hist = fetch_yfinance_history(ticker, start_date)
+        return store_yfinance_history(ticker, hist, latest_date)
 
-        if latest_data:
-            # 기존 데이터가 있는 경우: 마지막 데이터 다음날부터 최신 데이터만 가져오기
-            start_date = latest_data.date + timedelta(days=1)
-            # 시작일이 현재보다 미래인 경우 조정
-            if start_date > timezone.now().date():
-                return 0
+    except Exception as e:
+        metrics.PRICE_UPDATE_ERRORS.inc(provider=refresh.SOURCE_YFINANCE)
+        print(f"Update error for {ticker}: {e}")
+        return f"업데이트 실패: {str(e)}"
 
-            hist = stock.history(start=start_date)
-            update_type = "incremental"
-        else:
-            # 처음 데이터를 가져오는 경우: 전체 데이터 가져오기
-            hist = stock.history(period="max")
-            update_type = "full"
-
-        # 데이터가 없는 경우
-        if hist.empty:
-            return f"{ticker} 데이터가 없습니다."
-
-        new_data = []
-        for date, row in hist.iterrows():
-            new_data.append(StockData(
-                ticker=ticker,
-                date=date.date(),
-                close_price=row['Close'],
-                updated_at=timezone.now()
-            ))
-
-        # 배치 처리로 저장
-        if new_data:
-            batch_size = 100
-            for i in range(0, len(new_data), batch_size):
-                batch = new_data[i:i + batch_size]
-                StockData.objects.bulk_create(batch, ignore_conflicts=True)
-
-        if update_type == "incremental":
-            return f"{ticker} 데이터 증분 업데이트 완료 ({len(new_data)}개 추가)"
-        else:
-            return f"{ticker} 데이터 전체 업데이트 완료 ({len(new_data)}개 저장)"
+
+async def aupdate_stock_data_optimized(ticker):
+    """update_stock_data_optimized 의 비동기 버전
+
+    yfinance 는 동기 라이브러리이므로 다운로드는 별도 스레드에서 기다리고,
+    DB 작업은 sync_to_async 로 처리한다.
+    """
+    try:
+        window = await sync_to_async(ingestion.fetch_window)(ticker)
+        if window is None:
+            return 0
+
+        latest_date, start_date = window
+        hist = await sync_to_async(fetch_yfinance_history, thread_sensitive=False)(ticker, start_date)
+        return await sync_to_async(store_yfinance_history)(ticker, hist, latest_date)
 
     except Exception as e:
+        metrics.PRICE_UPDATE_ERRORS.inc(provider=refresh.SOURCE_YFINANCE)
         print(f"Update error for {ticker}: {e}")
         return f"업데이트 실패: {str(e)}"
 
 
+def fetch_yfinance_history(ticker, start_date=None):
+    """yfinance 일별 시세 조회 (네트워크 요청만, DB 접근 없음)
+
+    start_date 가 없으면 전체 기간을 가져온다. yfinance(와 pandas)는 무거워서 워커 시작 시
+    읽지 않고 처음 다운로드할 때 가져온다.
+    """
+    import yfinance as yf
+
+    with timing.span(timing.FETCH, ticker), metrics.upstream_request(refresh.SOURCE_YFINANCE):
+        stock = yf.Ticker(ticker)
+        if start_date:
+            return stock.history(start=start_date)
+        return stock.history(period="max")
+
+
+def store_yfinance_history(ticker, hist, latest_date=None):
+    """내려받은 시세 저장 후 결과 메시지 반환"""
+    # 데이터가 없는 경우
+    if hist.empty:
+        ingestion.mark_fetched(ticker)
+        return f"{ticker} 데이터가 없습니다."
+
+    # 열 단위 변환 후 한 트랜잭션에서 일괄 저장 (캐시 무효화 포함)
+    new_data = ingestion.frame_to_rows(hist, latest_date)
+    ingestion.store_price_rows({ticker: new_data})
+
+    if latest_date:
+        return f"{ticker} 데이터 증분 업데이트 완료 ({len(new_data)}개 추가)"
+    else:
+        return f"{ticker} 데이터 전체 업데이트 완료 ({len(new_data)}개 저장)"
+
+
+def simulate_investment(ticker, initial_capital, monthly_investment, start_date, end_date,
+                        is_english, exchange_rate):
+    """적립식 투자 계산 (같은 입력과 데이터 버전이면 캐시된 결과 사용)
+
+    (거래 기록, 최종 결과) 반환. 금액은 달러 기준.
+    """
+    def compute():
+        # 가격 캐시에 없으면 월별 스냅샷에서 기간 내 구매일 가격만 조회
+        series = price_cache.get_cached(ticker)
+        result = None
+        if series is None:
+            result = simulate_dca_from_snapshots(
+                ticker, initial_capital, monthly_investment, start_date, end_date
+            )
+        if result is None:
+            # 티커 전체 시계열 (캐시에서 조회, 없으면 한 번의 쿼리로 로드)
+            if series is None:
+                series = price_cache.get_price_series(ticker)
+            result = backtest.simulate_dca(
+                series.days, series.closes, initial_capital, monthly_investment, start_date, end_date
+            )
+        records = backtest.build_records(result, ticker, is_english, exchange_rate)
+
+        # 최종 결과 계산 (달러 기준)
+        final_result = backtest.build_final_result(result, end_date, is_english, exchange_rate)
+        return records, final_result
+
+    params = {
+        'ticker': ticker,
+        'initial_capital': initial_capital,
+        'monthly_investment': monthly_investment,
+        'start_date': start_date,
+        'end_date': end_date,
+        'is_english': is_english,
+        'exchange_rate': exchange_rate,
+    }
+    return result_cache.get_or_compute('dca', params, [ticker], compute)
+
+
+def simulate_dca_from_snapshots(ticker, initial_capital, monthly_investment, start_date, end_date):
+    """월별 스냅샷으로 적립식 시뮬레이션 (스냅샷을 쓸 수 없으면 None)"""
+    schedule = backtest.investment_schedule(start_date, end_date)
+    loaded = snapshots.load_schedule(ticker, start_date.day, schedule)
+    if loaded is None:
+        return None
+
+    prices, valid, _ = loaded
+    end_price = snapshots.price_on_or_before(ticker, end_date)
+    return backtest.simulate_aligned(schedule, prices, valid, end_price, initial_capital, monthly_investment)
+
+
 def calculate_investment(request):
     # URL에서 언어 코드 설정
     lang_code = set_language_from_url(request)
     is_english = lang_code == 'en'
-    exchange_rate = 1400.0
 
     if request.method == 'POST':
         form = InvestmentForm(request.POST)
         if form.is_valid():
-            # 폼 데이터 추출
-            ticker = form.cleaned_data['ticker'].upper()
-
-            # 조회수 증가
-            increase_view_count(ticker)
-
-            # 입력값 처리 (언어에 따라 원화/달러 구분)
-            if is_english:
-                # 영어 선택시: 달러 입력 → 그대로 사용
-                initial_capital = float(form.cleaned_data['initial_capital'])
-                monthly_investment = float(form.cleaned_data['monthly_investment'])
-            else:
-                # 한국어 선택시: 원화 입력 → 달러로 변환
-                initial_capital = float(form.cleaned_data['initial_capital']) / exchange_rate
-                monthly_investment = float(form.cleaned_data['monthly_investment']) / exchange_rate
-
-            start_date = form.cleaned_data['start_date']
-            end_date = form.cleaned_data['end_date']
+            inputs = investment_inputs(form, is_english)
 
             # 데이터 검색 및 업데이트
-            update_result, message = search_stock_data(ticker)
-
-            if update_result is None and "최신" not in message:
-                response = render(request, 'calculator/calculator.html', {
-                    'form': form,
-                    'error': message,
-                    'is_english': is_english,
-                    'LANGUAGE_CODE': lang_code
-                })
-                response.set_cookie(settings.LANGUAGE_COOKIE_NAME, lang_code)
-                return response
-
-            # 종료일 기준 주가 데이터 조회
-            end_date_stock_data = StockData.objects.filter(
-                ticker=ticker,
-                date__lte=end_date
-            ).order_by('-date').first()
-
-            if end_date_stock_data:
-                end_date_price = float(end_date_stock_data.close_price)
-                end_date_price_date = end_date_stock_data.date.strftime('%y/%m/%d')
-            else:
-                end_date_price = 0
-                end_date_price_date = end_date.strftime('%y/%m/%d')
-
-            # 계산 수행 (모두 달러로 계산)
-            cash = initial_capital
-            shares_held = 0.0
-            records = []
-            total_investment = initial_capital
-
-            current_date = start_date
-            while current_date <= end_date:
-                # 해당 월의 구매일 설정
-                investment_day = start_date.day
-                investment_date = current_date.replace(day=investment_day)
-
-                # 주가 데이터 조회
-                stock_data = StockData.objects.filter(
-                    ticker=ticker,
-                    date__lte=investment_date
-                ).order_by('-date').first()
-
-                if stock_data:
-                    # 현금에 월적립액 추가 (첫 달 제외)
-                    if current_date > start_date:
-                        cash += monthly_investment
-                        total_investment += monthly_investment
-
-                    # 주식 구매
-                    stock_price = float(stock_data.close_price)
-                    shares_to_buy = cash // stock_price
-
-                    if shares_to_buy > 0:
-                        shares_held += shares_to_buy
-                        purchase_amount = shares_to_buy * stock_price
-                        cash -= purchase_amount
-                        current_stock_value = shares_held * stock_price
-                        total_assets = current_stock_value + cash
-
-                        # 수익률 계산
-                        if total_investment > 0:
-                            profit_rate = ((total_assets - total_investment) / total_investment) * 100
-                        else:
-                            profit_rate = 0.0
-
-                        # 기록 추가 (달러 기준)
-                        record_data = {
-                            'date': investment_date.strftime('%y/%m/%d'),
-                            'action': f'{ticker}',
-                            'price': round(stock_price, 2),
-                            'shares_bought': round(shares_to_buy, 0),
-                            'shares_held': round(shares_held, 0),
-                            'stock_value': round(current_stock_value, 2),
-                            'cash': round(cash, 2),
-                            'total_assets': round(total_assets, 2),
-                            'profit_rate': round(profit_rate, 2),
-                            'currency_symbol': '$'
-                        }
-
-                        # 한국어인 경우 원화로 변환하여 추가
-                        if not is_english:
-                            record_data.update({
-                                'stock_value_krw': round(current_stock_value * exchange_rate, 0),
-                                'cash_krw': round(cash * exchange_rate, 0),
-                                'total_assets_krw': round(total_assets * exchange_rate, 0),
-                            })
-
-                        records.append(record_data)
-
-                # 다음 달로 이동
-                current_date += relativedelta(months=1)
-
-            # 최종 결과 계산 (달러 기준)
-            if records:
-                final_stock_value = shares_held * end_date_price
-                final_cash = cash
-                final_total_assets = final_stock_value + final_cash
-                final_profit_amount = final_total_assets - total_investment
-
-                if total_investment > 0:
-                    final_profit_rate = ((final_total_assets - total_investment) / total_investment) * 100
-                else:
-                    final_profit_rate = 0.0
-
-                final_result = {
-                    # 달러 기준 값
-                    'final_stock_value': final_stock_value,
-                    'final_cash': final_cash,
-                    'final_total_assets': final_total_assets,
-                    'final_total_investment': total_investment,
-                    'final_profit_amount': final_profit_amount,
-                    'final_profit_rate': final_profit_rate,
-                    'final_shares_held': shares_held,
-                    'end_date_price': end_date_price,
-                    'end_date_price_date': end_date_price_date,
-                    'is_english': is_english,
-                    'currency_symbol': '$',
-                    'exchange_rate': exchange_rate
-                }
-
-                # 한국어인 경우 원화 값 추가
-                if not is_english:
-                    final_result.update({
-                        'final_stock_value_krw': final_stock_value * exchange_rate,
-                        'final_cash_krw': final_cash * exchange_rate,
-                        'final_total_assets_krw': final_total_assets * exchange_rate,
-                        'final_total_investment_krw': total_investment * exchange_rate,
-                        'final_profit_amount_krw': final_profit_amount * exchange_rate,
-                    })
-
-            else:
-                final_result = None
-
-            response = render(request, 'calculator/calculator.html', {
-                'form': form,
-                'records': records,
-                'final_result': final_result,
-                'ticker': ticker,
-                'update_message': message if "업데이트" in message or "Update" in message else None,
-                'is_english': is_english,
-                'LANGUAGE_CODE': lang_code
-            })
-            response.set_cookie(settings.LANGUAGE_COOKIE_NAME, lang_code)
-            return response
+            update_result, message = search_stock_data(inputs[0])
+
+            return calculation_response(request, lang_code, form, inputs, update_result, message)
         else:
             ticker = request.POST.get('ticker', '').upper()
-            response = render(request, 'calculator/calculator.html', {
-                'form': form,
-                'ticker': ticker,
-                'is_english': is_english,
-                'LANGUAGE_CODE': lang_code
-            })
-            response.set_cookie(settings.LANGUAGE_COOKIE_NAME, lang_code)
-            return response
+            return calculator_response(request, lang_code, {'form': form, 'ticker': ticker})
 
     else:
         form = InvestmentForm()
         ticker = ''
-        response = render(request, 'calculator/calculator.html', {
-            'form': form,
-            'ticker': ticker,
-            'is_english': is_english,
-            'LANGUAGE_CODE': lang_code
-        })
-        response.set_cookie(settings.LANGUAGE_COOKIE_NAME, lang_code)
-        return response
+        return calculator_response(request, lang_code, {'form': form, 'ticker': ticker})
 
 
-def increase_view_count(ticker):
-    """티커 조회수 증가 함수"""
-    try:
-        # StockData의 각 레코드 조회수 증가
-        StockData.objects.filter(ticker=ticker).update(view_count=F('view_count') + 1)
+async def calculate_investment_async(request):
+    """calculate_investment 의 비동기 버전 (settings.ASYNC_VIEWS 를 켜면 사용)
+
+    데이터가 없는 티커를 내려받는 동안 이벤트 루프를 막지 않으므로, 한 ASGI 워커가
+    다른 요청(캐시된 티커)을 계속 처리할 수 있다. DB 작업과 렌더링은 sync_to_async 로 처리.
+    """
+    lang_code = set_language_from_url(request)
+    is_english = lang_code == 'en'
+
+    if request.method == 'POST':
+        form = InvestmentForm(request.POST)
+        if form.is_valid():
+            inputs = investment_inputs(form, is_english)
+            update_result, message = await asearch_stock_data(inputs[0])
+            return await sync_to_async(calculation_response)(
+                request, lang_code, form, inputs, update_result, message
+            )
+        ticker = request.POST.get('ticker', '').upper()
+        return await sync_to_async(calculator_response)(request, lang_code, {'form': form, 'ticker': ticker})
+
+    return await sync_to_async(calculator_response)(request, lang_code, {'form': InvestmentForm(), 'ticker': ''})
+
+
+def investment_inputs(form, is_english):
+    """검증된 폼에서 (티커, 초기자금, 월적립액, 시작일, 종료일) 추출 (금액은 달러 기준)"""
+    # 폼 데이터 추출
+    ticker = form.cleaned_data['ticker'].upper()
+
+    # 조회수 증가
+    increase_view_count(ticker)
+
+    # 입력값 처리 (언어에 따라 원화/달러 구분)
+    if is_english:
+        # 영어 선택시: 달러 입력 → 그대로 사용
+        initial_capital = float(form.cleaned_data['initial_capital'])
+        monthly_investment = float(form.cleaned_data['monthly_investment'])
+    else:
+        # 한국어 선택시: 원화 입력 → 달러로 변환
+        initial_capital = float(form.cleaned_data['initial_capital']) / EXCHANGE_RATE
+        monthly_investment = float(form.cleaned_data['monthly_investment']) / EXCHANGE_RATE
+
+    start_date = form.cleaned_data['start_date']
+    end_date = form.cleaned_data['end_date']
+    return ticker, initial_capital, monthly_investment, start_date, end_date
+
 
-        # TickerViewCount 모델에 집계
-        ticker_view, created = TickerViewCount.objects.get_or_create(
-            ticker=ticker,
-            defaults={'view_count': 1}
+def calculation_response(request, lang_code, form, inputs, update_result, message):
+    """데이터 확인 결과에 따라 오류 또는 계산 결과 페이지 응답"""
+    is_english = lang_code == 'en'
+    ticker, initial_capital, monthly_investment, start_date, end_date = inputs
+
+    if update_result is None and "최신" not in message:
+        return calculator_response(request, lang_code, {'form': form, 'error': message})
+
+    # 계산 수행 (모두 달러로 계산)
+    with timing.span(timing.SIMULATION):
+        records, final_result = simulate_investment(
+            ticker, initial_capital, monthly_investment, start_date, end_date, is_english, EXCHANGE_RATE
         )
-        if not created:
-            ticker_view.view_count = F('view_count') + 1
-            ticker_view.last_viewed = timezone.now()
-            ticker_view.save()
 
-    except Exception as e:
-        print(f"조회수 증가 중 오류: {e}")
+    return calculator_response(request, lang_code, {
+        'form': form,
+        'records': records,
+        'final_result': final_result,
+        'ticker': ticker,
+        'update_message': message if "업데이트" in message or "Update" in message else None,
+    })
+
 
+def calculator_response(request, lang_code, context):
+    """계산기 페이지 렌더링 (언어 쿠키 포함)"""
+    context.update({
+        'is_english': lang_code == 'en',
+        'LANGUAGE_CODE': lang_code
+    })
+    with timing.span(timing.RENDER):
+        response = render(request, 'calculator/calculator.html', context)
+    response.set_cookie(settings.LANGUAGE_COOKIE_NAME, lang_code)
+    return response
 
 
+def increase_view_count(ticker):
+    """티커 조회수 증가 함수 (메모리에 모았다가 주기적으로 TickerViewCount 에 반영)"""
+    view_counts.record_view(ticker)
@@ -0,0 +1,138 @@
+"""인기 티커 캐시 예열 (TickerViewCount 기준)
+
+배포 직후나 장 마감 후 수집이 끝난 뒤 첫 요청들이 가격 캐시를 채우느라 느려지지 않도록,
+조회수(view_count, 같으면 last_viewed) 상위 티커의 종가 시계열과 전고점(누적 최대값)을
+미리 프로세스 캐시에 읽어 둔다. 캐시에 있는 티커는 월별 스냅샷 대신 메모리 경로를 쓴다.
+
+- 웹 워커 시작: PRICE_CACHE_WARMUP_ON_STARTUP = True 이면 wsgi/asgi 애플리케이션을 읽을 때
+  백그라운드 스레드가 예열하고, 이후 PRICE_CACHE_WARMUP_INTERVAL(초)마다 새 데이터가 저장된
+  티커나 만료된 티커만 다시 읽는다 (야간 수집 결과도 이 주기 안에 반영됨). 관리 명령이나
+  시뮬레이션 sweep 의 프로세스 풀 워커에서는 시작하지 않는다.
+- 사전 수집: `manage.py prefetch_popular` 또는 refresh_prices --loop 의 정기 갱신이
+  인기 티커부터 제공처에서 갱신해 사용자가 요청하기 전에 데이터를 받아 둔다.
+
+캐시는 프로세스마다 따로 있다. gunicorn --preload 처럼 fork 전에 앱을 읽는 경우에는 설정을
+끄고 gunicorn 설정 파일에서 워커마다 시작한다::
+
+    from calculator.warmup import post_fork  # gunicorn.conf.py
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, price_cache, sync_state
+from .models import TickerViewCount
+
+DEFAULT_WARMUP_TICKERS = 20
+DEFAULT_WARMUP_INTERVAL = 15 * 60  # 초
+
+logger = logging.getLogger('calculator.warmup')
+
+_warmer = None
+_warmer_pid = None
+_lock = threading.Lock()
+
+
+def _limit():
+    # 가격 캐시 크기보다 많이 읽으면 먼저 읽은 티커가 밀려남
+    limit = getattr(settings, 'PRICE_CACHE_WARMUP_TICKERS', DEFAULT_WARMUP_TICKERS)
+    return min(limit, price_cache._max_tickers())
+
+
+def _interval():
+    return getattr(settings, 'PRICE_CACHE_WARMUP_INTERVAL', DEFAULT_WARMUP_INTERVAL)
+
+
+def top_tickers(limit=None):
+    """조회수 상위 티커 목록 (조회수가 같으면 최근 조회 순)"""
+    limit = _limit() if limit is None else limit
+    return list(
+        TickerViewCount.objects.filter(view_count__gt=0)
+        .order_by('-view_count', '-last_viewed')
+        .values_list('ticker', flat=True)[:limit]
+    )
+
+
+def warm(tickers=None, trigger='manual'):
+    """티커 시계열과 전고점을 가격 캐시에 읽음, 새로 읽은 티커 수 반환
+
+    이미 캐시에 있고 저장된 마지막 가격 날짜까지 담고 있는 티커는 건너뛴다.
+    """
+    tickers = top_tickers() if tickers is None else list(tickers)
+    states = sync_state.get_states(tickers)
+
+    loaded = 0
+    # 덜 인기 있는 티커부터 읽어 가장 인기 있는 티커가 LRU 의 최신 쪽에 남도록
+    for ticker in reversed(tickers):
+        state = states.get(ticker)
+        if state is None:
+            continue
+
+        cached = price_cache.peek(ticker)
+        if cached is not None and cached.last_date == state.last_price_date:
+            continue
+
+        price_cache.invalidate(ticker)
+        series = price_cache.get_price_series(ticker)
+        series.running_high()
+        loaded += 1
+
+    metrics.CACHE_WARMUP_TICKERS.inc(loaded, trigger=trigger)
+    return loaded
+
+
+def prefetch(limit=None, source=None, force=False, log=None):
+    """인기 티커 중 오래된 것을 제공처에서 먼저 갱신, 갱신한 티커 수 반환"""
+    from . import refresh
+
+    return refresh.refresh_stale(top_tickers(limit), source, force, log=log)
+
+
+def _warm_once(trigger):
+    """예열 한 주기, 실패해도 예외를 올리지 않음 (스레드가 멈추지 않도록)"""
+    try:
+        return warm(trigger=trigger)
+    except Exception:
+        # DB 가 아직 준비되지 않았거나 파일/시계열 오류, 다음 주기에 다시 시도
+        metrics.CACHE_WARMUP_ERRORS.inc()
+        logger.exception('캐시 예열 중 오류 (trigger=%s)', trigger)
+        return 0
+    finally:
+        connections.close_all()
+
+
+def _run_warmer():
+    trigger = 'startup'
+    while True:
+        _warm_once(trigger)
+        trigger = 'interval'
+        time.sleep(_interval())
+
+
+def start_warmer():
+    """현재 프로세스에 예열 스레드를 하나 띄움 (fork 된 자식은 스레드를 물려받지 않으므로 다시 시작 가능)"""
+    global _warmer, _warmer_pid
+    if _warmer is not None and _warmer_pid == os.getpid():
+        return
+
+    with _lock:
+        if _warmer is not None and _warmer_pid == os.getpid():
+            return
+        _warmer = threading.Thread(target=_run_warmer, name='price-cache-warmer', daemon=True)
+        _warmer_pid = os.getpid()
+        _warmer.start()
+
+
+def start_web_warmer():
+    """웹 서버 진입점(wsgi/asgi)에서 호출, PRICE_CACHE_WARMUP_ON_STARTUP 이면 예열 시작"""
+    if getattr(settings, 'PRICE_CACHE_WARMUP_ON_STARTUP', False):
+        start_warmer()
+
+
+def post_fork(server, worker):
+    """gunicorn post_fork 훅 (--preload 사용 시 워커마다 예열 시작)"""
+    start_warmer()
@@ -2,16 +2,29 @@
 
 from django.contrib import admin
 from django.urls import path, include
+from django.conf import settings
 from django.conf.urls.i18n import i18n_patterns
-from calculator.views import calculate_investment
+from calculator.views import calculate_investment, calculate_investment_async
+from calculator import api as calculator_api, metrics
+from stock2.api import Stock2ApiView, Stock2SweepApiView
+
+# ASYNC_VIEWS 를 켜면 ASGI 서버에서 계산기를 비동기 뷰로 처리
+calculator_view = calculate_investment_async if getattr(settings, 'ASYNC_VIEWS', False) else calculate_investment
 
 urlpatterns = [
+    # 운영 지표 (Prometheus 텍스트 형식, 관리자 로그인 또는 METRICS_TOKEN 필요)
+    path('admin/metrics/', metrics.metrics_endpoint, name='metrics'),
     path('admin/', admin.site.urls),
     path('i18n/', include('django.conf.urls.i18n')),
+    # JSON API (언어 접두사 없음, lang 파라미터로 통화 선택)
+    path('api/calculator/', calculator_api.calculate, name='api_calculator'),
+    path('api/calculator/rolling/', calculator_api.rolling, name='api_calculator_rolling'),
+    path('api/stock2/', Stock2ApiView.as_view(), name='api_stock2'),
+    path('api/stock2/sweep/', Stock2SweepApiView.as_view(), name='api_stock2_sweep'),
 ]
 
 urlpatterns += i18n_patterns(
-    path('', calculate_investment, name='calculator'),
+    path('', calculator_view, name='calculator'),
     path('stock2/', include('stock2.urls')),
     # prefix_default_language를 제거하거나 True로 설정하면 모든 언어에 접두사가 붙습니다.
     # prefix_default_language=True,
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'investment_calculator.settings')
 
 application = get_wsgi_application()
+
+from calculator import view_counts, warmup  # noqa: E402
+
+# 조회수 버퍼 반영 스레드 (웹 워커에서 첫 조회 시 시작)
+view_counts.enable_background_flush()
+# 인기 티커 가격 캐시 예열 (웹 워커에서만, PRICE_CACHE_WARMUP_ON_STARTUP 설정)
+warmup.start_web_warmer()
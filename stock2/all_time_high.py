@@ -0,0 +1,71 @@
+"""전고점/하락률 계산
+
+전고점은 캐시된 종가 배열의 누적 최대값으로 바로 계산한다. AllTimeHigh 테이블
+저장은 선택 사항이며, 마지막으로 저장된 전고점을 시작값으로 이후 날짜만 추가한다.
+"""
+import numpy as np
+from django.utils import timezone
+
+from calculator import price_cache, sync_state
+from calculator.price_cache import from_day_number, to_day_number
+from .models import AllTimeHigh
+
+
+def get_all_time_high(ticker):
+    """티커의 (일수, 전고점) 배열"""
+    series = price_cache.get_price_series(ticker)
+    return series.days, series.running_high()
+
+
+def get_drawdown(ticker):
+    """티커의 (일수, 전고점 대비 하락률 %) 배열"""
+    series = price_cache.get_price_series(ticker)
+    highs = series.running_high()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = np.where(highs > 0, (1 - series.closes / highs) * 100, 0.0)
+    return series.days, drawdown
+
+
+def persist_all_time_high(ticker):
+    """AllTimeHigh 테이블에 마지막 저장일 이후의 전고점만 증분 저장"""
+    series = price_cache.get_price_series(ticker)
+    if not len(series):
+        return
+
+    # 마지막 저장일은 수집 상태에서 기본키로 조회 (상태가 없을 때만 테이블 정렬)
+    state = sync_state.get_state(ticker)
+    if state is not None and state.last_ath_date:
+        last_stored = AllTimeHigh.objects.filter(ticker=ticker, date=state.last_ath_date).first()
+    else:
+        last_stored = AllTimeHigh.objects.filter(ticker=ticker).order_by('-date').first()
+
+    if last_stored:
+        # 마지막 저장일 다음 거래일부터, 저장된 전고점을 시작값으로 누적 최대값 계산
+        start = int(np.searchsorted(series.days, to_day_number(last_stored.date), side='right'))
+        seed = float(last_stored.high_price)
+        highs = np.maximum.accumulate(np.concatenate(([seed], series.closes[start:])))[1:]
+    else:
+        start = 0
+        highs = series.running_high()
+
+    now = timezone.now()
+    new_records = [
+        AllTimeHigh(
+            ticker=ticker,
+            date=from_day_number(day),
+            high_price=round(high, 2),
+            updated_at=now
+        )
+        for day, high in zip(series.days[start:].tolist(), highs.tolist())
+    ]
+
+    if new_records:
+        AllTimeHigh.objects.bulk_create(new_records, batch_size=1000, ignore_conflicts=True)
+        last_ath_date = new_records[-1].date
+    else:
+        last_ath_date = last_stored.date if last_stored else None
+
+    if state is not None and last_ath_date and state.last_ath_date != last_ath_date:
+        sync_state.record_ath(ticker, last_ath_date)
+
+    return f"{ticker} 전고점 데이터 업데이트 완료 ({len(new_records)}개 추가)"
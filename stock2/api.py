@@ -0,0 +1,127 @@
+"""조건부 투자 시뮬레이션 JSON API (출력 옵션은 calculator.api 와 동일)"""
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+
+from calculator.api import query_params, result_response
+from . import sweep
+from .views import EXCHANGE_RATE, Stock2ResultView, parse_form_data
+
+DEFAULT_SWEEP_TOP = 100
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class Stock2ApiView(Stock2ResultView):
+    """Stock2 입력 폼과 같은 필드 이름을 쿼리/폼 값으로 받아 결과를 JSON 으로 반환"""
+    http_method_names = ['get', 'post']
+
+    def get(self, request):
+        params = query_params(request)
+        lang_code = params.get('lang', 'en')
+        if lang_code not in ('ko', 'en'):
+            lang_code = 'en'
+
+        form_data = params.dict()
+        form_data['language'] = lang_code
+
+        try:
+            inputs = parse_form_data(form_data, lang_code)
+        except (TypeError, ValueError) as e:
+            return JsonResponse({'error': f'입력값 오류: {str(e)}'}, status=400)
+        if not inputs['ticker']:
+            return JsonResponse({'error': '티커를 입력하세요.'}, status=400)
+
+        try:
+            result = self.simulate(inputs)
+        except Exception as e:
+            return JsonResponse({'error': f'계산 중 오류가 발생했습니다: {str(e)}'}, status=500)
+
+        return result_response(
+            result['records'], params, ticker=inputs['ticker'], final_result=result['final_result']
+        )
+
+    def post(self, request):
+        return self.get(request)
+
+
+def sweep_allowed(request):
+    """관리자(staff) 로그인 또는 STOCK2_SWEEP_API_TOKEN Bearer 헤더"""
+    token = getattr(settings, 'STOCK2_SWEEP_API_TOKEN', None)
+    if token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class Stock2SweepApiView(Stock2ResultView):
+    """조건 후보(percent_N, comparison_N, priority_N 에 쉼표로 여러 값)의 모든 조합을
+    계산해 수익률 순위표를 반환 (top, sort 로 출력 조절)
+
+    계산량이 커서 관리자 또는 토큰이 있는 요청만 받고, 요청 안에서(프로세스 풀 없이)
+    STOCK2_SWEEP_API_MAX_POINTS 개 이하의 조합만 계산한다. 큰 탐색은 sweep_conditions 명령으로.
+    """
+    http_method_names = ['get', 'post']
+
+    def get(self, request):
+        if not sweep_allowed(request):
+            return JsonResponse({'error': '관리자 로그인 또는 API 토큰이 필요합니다.'}, status=403)
+
+        params = query_params(request)
+        lang_code = params.get('lang', 'en')
+        if lang_code not in ('ko', 'en'):
+            lang_code = 'en'
+        exchange_rate = EXCHANGE_RATE if lang_code == 'ko' else 1.0
+
+        form_data = params.dict()
+        form_data['language'] = lang_code
+        sort_by = params.get('sort', 'final_profit_rate')
+
+        try:
+            specs = sweep.specs_from_form_data(form_data)
+            # 기본 입력값은 조건 없이 해석
+            base = parse_form_data(
+                {k: v for k, v in form_data.items() if not k.startswith('condition_ticker_')}, lang_code
+            )
+            top = int(params.get('top', DEFAULT_SWEEP_TOP))
+        except (TypeError, ValueError) as e:
+            return JsonResponse({'error': f'입력값 오류: {str(e)}'}, status=400)
+        if not base['ticker'] or not specs:
+            return JsonResponse({'error': '티커와 조건을 입력하세요.'}, status=400)
+        if sort_by not in ('final_profit_rate', 'final_total_assets'):
+            return JsonResponse({'error': f'알 수 없는 정렬 기준: {sort_by}'}, status=400)
+        # 데이터를 내려받기 전에 조합 수 확인
+        size = sweep.grid_size(specs)
+        if size > sweep.api_max_points():
+            return JsonResponse(
+                {'error': f'조합 수({size})가 최대 {sweep.api_max_points()}개를 넘습니다. sweep_conditions 명령을 쓰세요.'},
+                status=400
+            )
+
+        try:
+            tickers = {base['ticker'], base['ticker2']} | {spec['ticker'] for spec in specs}
+            tickers.discard('')
+            self.refresh_tickers(tickers)
+            rows = sweep.run_sweep(
+                base['ticker'], base['ticker2'], base['initial_capital'], base['monthly_investment'],
+                base['monthly_investment2'], base['start_date'], base['end_date'], specs,
+                sort_by=sort_by, limit=sweep.api_max_points()
+            )
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': f'계산 중 오류가 발생했습니다: {str(e)}'}, status=500)
+
+        for row in rows:
+            row['final_total_assets'] = round(row['final_total_assets'] * exchange_rate, 0)
+            row['final_total_investment'] = round(row['final_total_investment'] * exchange_rate, 0)
+
+        return result_response(
+            rows[:top], params, ticker=base['ticker'], count=len(rows),
+            currency='KRW' if lang_code == 'ko' else 'USD'
+        )
+
+    def post(self, request):
+        return self.get(request)
@@ -0,0 +1,73 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from stock2 import sweep
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+class Command(BaseCommand):
+    help = '조건 전략의 percent/comparison/priority 조합을 모두 계산해 수익률 순위표 출력'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ticker', help='기본 종목')
+        parser.add_argument('--ticker2', default='', help='추가 적립 종목')
+        parser.add_argument('--initial-capital', type=float, default=0.0, help='초기자금 (달러)')
+        parser.add_argument('--monthly', type=float, default=0.0, help='기본 종목 월적립액 (달러)')
+        parser.add_argument('--monthly2', type=float, default=0.0, help='추가 종목 월적립액 (달러)')
+        parser.add_argument('--start-date', type=parse_date, required=True, help='YYYY-MM-DD')
+        parser.add_argument('--end-date', type=parse_date, required=True, help='YYYY-MM-DD')
+        parser.add_argument(
+            '--condition', nargs=5, action='append', default=[],
+            metavar=('TICKER', 'TYPE', 'PERCENTS', 'COMPARISONS', 'PRIORITIES'),
+            help='조건 후보 (예: QQQ high 10,20,30 below 1,2) 최대 3개, 쉼표로 여러 값'
+        )
+        parser.add_argument('--workers', type=int, default=None, help='프로세스 수 (기본 CPU 수)')
+        parser.add_argument('--sort', default='final_profit_rate',
+                            choices=['final_profit_rate', 'final_total_assets'], help='정렬 기준')
+        parser.add_argument('--top', type=int, default=20, help='출력할 상위 개수')
+
+    def handle(self, *args, **options):
+        if not options['condition'] or len(options['condition']) > 3:
+            raise CommandError('--condition 을 1~3개 지정하세요.')
+
+        specs = []
+        for condition_ticker, condition_type, percents, comparisons, priorities in options['condition']:
+            try:
+                specs.append(sweep.validate_spec({
+                    'ticker': condition_ticker.upper(),
+                    'type': condition_type,
+                    'percent': [float(v) for v in sweep.parse_choices(percents)],
+                    'comparison': sweep.parse_choices(comparisons),
+                    'priority': sweep.parse_choices(priorities),
+                }))
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        started = time.perf_counter()
+        try:
+            rows = sweep.run_sweep(
+                options['ticker'].upper(), options['ticker2'].upper(),
+                options['initial_capital'], options['monthly'], options['monthly2'],
+                options['start_date'], options['end_date'], specs,
+                workers=options['workers'] or sweep.max_workers(), sort_by=options['sort']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        for row in rows[:options['top']]:
+            conditions = ', '.join(
+                f"{c['ticker']} {c['type']} {c['percent']:g} {c['comparison']} p{c['priority']}"
+                for c in row['conditions']
+            )
+            self.stdout.write(
+                f"{row['rank']:>4}. {row['final_profit_rate']:>9.2f}%  "
+                f"{row['final_total_assets']:>14,.0f}  ({row['purchases']}회)  {conditions}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'{len(rows)}개 조합 계산 ({elapsed:.2f}s)'))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock2', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alltimehigh',
+            index=models.Index(fields=['ticker', 'date', 'high_price'], name='alltimehigh_ticker_date_high'),
+        ),
+    ]
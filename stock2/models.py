@@ -8,6 +8,10 @@ class AllTimeHigh(models.Model):
 
     class Meta:
         unique_together = ('ticker', 'date')
+        indexes = [
+            # 마지막/날짜 기준 전고점 조회를 인덱스만으로 처리
+            models.Index(fields=['ticker', 'date', 'high_price'], name='alltimehigh_ticker_date_high'),
+        ]
 
     def __str__(self):
         return f"{self.ticker} - {self.date} - {self.high_price}"
\ No newline at end of file
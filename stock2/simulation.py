@@ -0,0 +1,292 @@
+"""조건부 다종목 적립식 투자 시뮬레이션
+
+관련된 모든 티커(기본 종목, 추가 적립 종목, 조건 티커)의 시계열을 미리 읽어
+월별 구매일에 맞춘 가격 배열을 만든 뒤, 매월 계산은 메모리 인덱싱만으로 처리한다.
+가격 캐시에 없는 티커는 일별 시계열 대신 월별 스냅샷에서 구매일 값만 읽는다.
+"""
+from calculator import price_cache, snapshots
+from calculator.backtest import asof_indexes, investment_schedule
+from calculator.price_cache import from_day_number
+
+
+def align_to_schedule(days, values, schedule):
+    """구매일별 as-of 값 리스트 (데이터가 없는 날은 None)"""
+    indexes = asof_indexes(days, schedule).tolist()
+    values = values.tolist()
+    return [values[i] if i >= 0 else None for i in indexes]
+
+
+def check_condition(condition, current_price, all_time_high):
+    """조건 확인 (해당 구매일의 주가와 전고점으로 판단)"""
+    if current_price is None:
+        return False
+
+    if condition['type'] == 'specific':
+        target_price = condition['percent']
+
+        if condition['comparison'] == 'above':
+            return current_price >= target_price
+        else:  # below
+            return current_price <= target_price
+
+    elif condition['type'] == 'high':  # 전고점 대비 하락
+        if all_time_high is None:
+            return False
+
+        # 전고점 대비 하락 계산: 주가 <= 전고점 * (100 - percent) / 100
+        target_price = all_time_high * (100 - condition['percent']) / 100
+
+        return current_price <= target_price
+
+    return False
+
+
+def load_price_inputs(ticker, ticker2, conditions):
+    """시뮬레이션에 필요한 티커별 시계열과 전고점(누적 최대값) 배열을 한 번에 로드"""
+    tickers = {t for t in [ticker, ticker2] + [c['ticker'] for c in conditions] if t}
+    series = {t: price_cache.get_price_series(t) for t in tickers}
+    highs = {
+        c['ticker']: (series[c['ticker']].days, series[c['ticker']].running_high())
+        for c in conditions if c['type'] == 'high'
+    }
+    return series, highs
+
+
+def align_inputs(series, highs, schedule, end_date):
+    """시계열로 티커별 구매일 가격/전고점 리스트와 종료일 (날짜, 종가) 계산"""
+    prices = {t: align_to_schedule(s.days, s.closes, schedule) for t, s in series.items()}
+    aligned_highs = {t: align_to_schedule(days, values, schedule) for t, (days, values) in highs.items()}
+    end_prices = {t: s.price_on_or_before(end_date) for t, s in series.items()}
+    return prices, aligned_highs, end_prices
+
+
+def load_aligned_inputs(ticker, ticker2, conditions, investment_day, schedule, end_date):
+    """align_inputs 와 같은 값을 티커별로 월별 스냅샷(가격 캐시에 없을 때) 또는 시계열에서 로드"""
+    tickers = {t for t in [ticker, ticker2] + [c['ticker'] for c in conditions] if t}
+    high_tickers = {c['ticker'] for c in conditions if c['type'] == 'high'}
+
+    prices, aligned_highs, end_prices = {}, {}, {}
+    for t in tickers:
+        series = price_cache.get_cached(t)
+        loaded = None
+        if series is None:
+            loaded = snapshots.load_schedule(t, investment_day, schedule, with_highs=t in high_tickers)
+        if loaded is None:
+            if series is None:
+                series = price_cache.get_price_series(t)
+            highs = {t: (series.days, series.running_high())} if t in high_tickers else {}
+            aligned = align_inputs({t: series}, highs, schedule, end_date)
+            prices.update(aligned[0])
+            aligned_highs.update(aligned[1])
+            end_prices.update(aligned[2])
+            continue
+
+        closes, valid, highs = loaded
+        prices[t] = [c if v else None for c, v in zip(closes.tolist(), valid.tolist())]
+        if t in high_tickers:
+            aligned_highs[t] = [h if v else None for h, v in zip(highs.tolist(), valid.tolist())]
+        end_prices[t] = snapshots.price_on_or_before(t, end_date)
+
+    return prices, aligned_highs, end_prices
+
+
+def run_investment_simulation(ticker, ticker2, initial_capital, monthly_investment,
+                              monthly_investment2, start_date, end_date, conditions, language='en',
+                              series=None, highs=None):
+    """투자 시뮬레이션 실행 (언어에 따라 통화 처리)
+
+    series/highs 를 넘기면 DB를 읽지 않고 주어진 배열만으로 계산한다.
+    """
+    # 언어에 따라 환율 설정
+    exchange_rate = 1400.0 if language == 'ko' else 1.0
+
+    # 모든 계산은 달러 기준으로 수행
+    cash_usd = initial_capital  # 이미 달러로 변환됨
+    shares_held = {}
+    if ticker:
+        shares_held[ticker] = 0
+    if ticker2:
+        shares_held[ticker2] = 0
+
+    total_investment = initial_capital  # 달러 기준
+    records = []
+
+    # 우선순위별 조건 분류
+    priority_conditions = {}
+    for condition in conditions:
+        if condition['priority'] != 'none':
+            priority = int(condition['priority'])
+            if priority not in priority_conditions:
+                priority_conditions[priority] = []
+            priority_conditions[priority].append(condition)
+
+    # 시작일의 일자가 28일을 넘으면 28일로 조정한 월별 구매일
+    investment_day = min(start_date.day, 28)
+    if start_date <= end_date:
+        schedule = investment_schedule(start_date.replace(day=investment_day), end_date)
+    else:
+        schedule = investment_schedule(start_date, end_date)
+
+    # 구매일에 맞춘 티커별 가격/전고점 배열과 종료일 종가
+    if series is None or highs is None:
+        prices, aligned_highs, end_prices = load_aligned_inputs(
+            ticker, ticker2, conditions, investment_day, schedule, end_date
+        )
+    else:
+        prices, aligned_highs, end_prices = align_inputs(series, highs, schedule, end_date)
+    no_prices = [None] * len(schedule)
+
+    # 투자 시뮬레이션
+    for month, day_number in enumerate(schedule.tolist()):
+        investment_date = from_day_number(day_number)
+
+        # 월적립액 추가 (달러 기준)
+        cash_usd += monthly_investment + monthly_investment2
+        total_investment += monthly_investment + monthly_investment2
+
+        # 조건에 따른 주식 구매
+        purchased = False
+
+        # 우선순위 순으로 조건 확인
+        for priority in sorted(priority_conditions.keys()):
+            for condition in priority_conditions[priority]:
+                condition_ticker = condition['ticker']
+                stock_price = prices.get(condition_ticker, no_prices)[month]
+                all_time_high = aligned_highs.get(condition_ticker, no_prices)[month]
+
+                if check_condition(condition, stock_price, all_time_high):
+                    if stock_price:
+                        # 주가는 달러 기준이므로 그대로 사용
+                        shares_to_buy = int(cash_usd // stock_price)  # 소수점 제거
+
+                        if shares_to_buy > 0:
+                            if condition_ticker not in shares_held:
+                                shares_held[condition_ticker] = 0
+
+                            shares_held[condition_ticker] += shares_to_buy
+                            purchase_amount = shares_to_buy * stock_price
+                            cash_usd -= purchase_amount
+                            purchased = True
+
+                            # 기록 시 통화 변환
+                            purchase_amount_converted = purchase_amount * exchange_rate if language == 'ko' else purchase_amount
+                            cash_converted = cash_usd * exchange_rate if language == 'ko' else cash_usd
+
+                            records.append({
+                                'date': investment_date.strftime('%Y-%m-%d'),
+                                'action': f"{condition_ticker} (우선순위{priority})" if language == 'ko' else f"{condition_ticker} (priority {priority})",
+                                'price': round(stock_price, 2),
+                                'shares_bought': shares_to_buy,
+                                'shares_held': shares_held[condition_ticker],
+                                'purchase_amount': round(purchase_amount_converted, 0),
+                                'cash': round(cash_converted, 0),
+                                'currency': 'KRW' if language == 'ko' else 'USD',
+                            })
+                            break
+            if purchased:
+                break
+
+        # 조건에 맞는 종목이 없으면 기본 종목 구매
+        if not purchased:
+            # 첫 번째 종목 구매
+            if ticker and monthly_investment > 0:
+                stock_price1 = prices.get(ticker, no_prices)[month]
+                if stock_price1:
+                    shares_to_buy1 = int((cash_usd * (monthly_investment / (
+                        monthly_investment + monthly_investment2))) // stock_price1) if (
+                        monthly_investment + monthly_investment2) > 0 else 0
+
+                    if shares_to_buy1 > 0:
+                        shares_held[ticker] += shares_to_buy1
+                        purchase_amount1 = shares_to_buy1 * stock_price1
+                        cash_usd -= purchase_amount1
+
+                        purchase_amount1_converted = purchase_amount1 * exchange_rate if language == 'ko' else purchase_amount1
+                        cash_converted = cash_usd * exchange_rate if language == 'ko' else cash_usd
+
+                        records.append({
+                            'date': investment_date.strftime('%Y-%m-%d'),
+                            'action': f"{ticker}",
+                            'price': round(stock_price1, 2),
+                            'shares_bought': shares_to_buy1,
+                            'shares_held': shares_held[ticker],
+                            'purchase_amount': round(purchase_amount1_converted, 0),
+                            'cash': round(cash_converted, 0),
+                            'currency': 'KRW' if language == 'ko' else 'USD',
+                        })
+
+            # 두 번째 종목 구매
+            if ticker2 and monthly_investment2 > 0:
+                stock_price2 = prices.get(ticker2, no_prices)[month]
+                if stock_price2 and cash_usd > 0:
+                    shares_to_buy2 = int(cash_usd // stock_price2)
+
+                    if shares_to_buy2 > 0:
+                        shares_held[ticker2] += shares_to_buy2
+                        purchase_amount2 = shares_to_buy2 * stock_price2
+                        cash_usd -= purchase_amount2
+
+                        purchase_amount2_converted = purchase_amount2 * exchange_rate if language == 'ko' else purchase_amount2
+                        cash_converted = cash_usd * exchange_rate if language == 'ko' else cash_usd
+
+                        records.append({
+                            'date': investment_date.strftime('%Y-%m-%d'),
+                            'action': f"{ticker2}",
+                            'price': round(stock_price2, 2),
+                            'shares_bought': shares_to_buy2,
+                            'shares_held': shares_held[ticker2],
+                            'purchase_amount': round(purchase_amount2_converted, 0),
+                            'cash': round(cash_converted, 0),
+                            'currency': 'KRW' if language == 'ko' else 'USD',
+                        })
+
+    # 최종 결과 계산
+    final_stock_value = 0
+    ticker_details = {}
+
+    for t, shares in shares_held.items():
+        end_price_data = end_prices.get(t)
+        end_price = end_price_data[1] if end_price_data else None
+        if end_price:
+            ticker_value = shares * end_price  # 달러 기준
+            final_stock_value += ticker_value
+
+            # 통화 변환
+            ticker_value_converted = ticker_value * exchange_rate if language == 'ko' else ticker_value
+            end_price_converted = end_price * exchange_rate if language == 'ko' else end_price
+
+            ticker_details[t] = {
+                'shares': int(shares),
+                'value': round(ticker_value_converted, 0),
+                'price': round(end_price_converted, 2),
+                'value_usd': round(ticker_value, 2),
+                'price_usd': round(end_price, 2)
+            }
+
+    # 통화 변환
+    final_stock_value_converted = final_stock_value * exchange_rate if language == 'ko' else final_stock_value
+    cash_converted = cash_usd * exchange_rate if language == 'ko' else cash_usd
+    total_investment_converted = total_investment * exchange_rate if language == 'ko' else total_investment
+
+    final_total_assets = final_stock_value + cash_usd
+    final_total_assets_converted = final_total_assets * exchange_rate if language == 'ko' else final_total_assets
+
+    final_profit_rate = ((final_total_assets - total_investment) / total_investment) * 100 if total_investment > 0 else 0
+    final_profit_amount = final_total_assets - total_investment
+    final_profit_amount_converted = final_profit_amount * exchange_rate if language == 'ko' else final_profit_amount
+
+    return {
+        'records': records,
+        'final_result': {
+            'final_stock_value': round(final_stock_value_converted, 0),
+            'final_cash': round(cash_converted, 0),
+            'final_total_assets': round(final_total_assets_converted, 0),
+            'final_total_investment': round(total_investment_converted, 0),
+            'final_profit_rate': round(final_profit_rate, 2),
+            'final_profit_amount': round(final_profit_amount_converted, 0),
+            'shares_held': shares_held,
+            'ticker_details': ticker_details,
+            'currency': 'KRW' if language == 'ko' else 'USD',
+            'exchange_rate': exchange_rate if language == 'ko' else 1.0
+        }
+    }
@@ -0,0 +1,206 @@
+"""조건 전략 파라미터 탐색 (sweep)
+
+조건별 percent/comparison/priority 후보 목록의 모든 조합을 시뮬레이션해서 최종 수익률
+순으로 정렬한 표를 만든다. 기본은 현재 프로세스에서 계산하고, sweep_conditions 명령처럼
+workers 를 2 이상 주면 프로세스 풀을 쓴다. 가격 배열은 부모 프로세스가 한 번만 읽어 프로세스 풀
+initializer 로 워커마다 한 번 넘기므로, 워커는 DB를 읽지 않고 계산만 한다.
+
+웹 요청(API)에서는 스레드가 여러 개인 워커 프로세스를 fork 하지 않도록 항상 현재 프로세스에서,
+조합 수는 STOCK2_SWEEP_API_MAX_POINTS 이하로만 계산한다.
+
+워커 모듈은 spawn 방식(Windows/macOS)에서도 동작하도록 Django 관련 모듈을 함수 안에서
+가져온다.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_MAX_POINTS = 5000
+DEFAULT_API_MAX_POINTS = 200
+DEFAULT_CHUNK_SIZE = 16
+# 이보다 작은 조합은 프로세스 풀을 띄우지 않고 현재 프로세스에서 계산
+MIN_PARALLEL_POINTS = 64
+
+GRID_FIELDS = ('percent', 'comparison', 'priority')
+CONDITION_TYPES = ('specific', 'high')
+COMPARISONS = ('above', 'below')
+PRIORITIES = ('none', '1', '2', '3')
+
+# 워커 프로세스 상태 (initializer 에서 설정)
+_worker = {}
+
+
+def max_points():
+    from django.conf import settings
+    return getattr(settings, 'STOCK2_SWEEP_MAX_POINTS', DEFAULT_MAX_POINTS)
+
+
+def api_max_points():
+    from django.conf import settings
+    return getattr(settings, 'STOCK2_SWEEP_API_MAX_POINTS', DEFAULT_API_MAX_POINTS)
+
+
+def max_workers():
+    from django.conf import settings
+    return getattr(settings, 'STOCK2_SWEEP_MAX_WORKERS', None) or os.cpu_count() or 1
+
+
+def expand_grid(specs):
+    """조건 후보 목록 → 조건 리스트의 모든 조합
+
+    specs 는 조건마다 {'ticker', 'type', 'percent': [...], 'comparison': [...],
+    'priority': [...]} 이며, 값이 리스트가 아니면 한 개짜리 후보로 본다.
+    """
+    choices = []
+    for spec in specs:
+        values = [spec[field] if isinstance(spec[field], (list, tuple)) else [spec[field]]
+                  for field in GRID_FIELDS]
+        choices.append([
+            {
+                'ticker': spec['ticker'],
+                'type': spec['type'],
+                'percent': float(percent),
+                'comparison': comparison,
+                'priority': str(priority),
+            }
+            for percent, comparison, priority in itertools.product(*values)
+        ])
+    return [list(combination) for combination in itertools.product(*choices)]
+
+
+def parse_choices(value):
+    """'5,10,15' → ['5', '10', '15']"""
+    return [v.strip() for v in str(value).split(',') if v.strip()]
+
+
+def validate_spec(spec):
+    """조건 후보 값 검증 (알 수 없는 유형/비교/우선순위나 빈 후보 목록이면 ValueError)"""
+    if spec['type'] not in CONDITION_TYPES:
+        raise ValueError(f"알 수 없는 조건 유형: {spec['type']}")
+    for field, allowed in (('comparison', COMPARISONS), ('priority', PRIORITIES)):
+        unknown = [value for value in spec[field] if value not in allowed]
+        if unknown:
+            raise ValueError(f"알 수 없는 {field} 값: {', '.join(unknown)}")
+    for field in GRID_FIELDS:
+        if not spec[field]:
+            raise ValueError(f"{spec['ticker']} 조건의 {field} 후보가 없습니다.")
+    return spec
+
+
+def specs_from_form_data(form_data):
+    """Stock2 폼 필드(condition_ticker_1 ...)에서 조건 후보 목록 생성 (값이 잘못되면 ValueError)
+
+    percent_N, comparison_N, priority_N 은 쉼표로 구분한 여러 값을 받을 수 있다.
+    """
+    specs = []
+    for i in range(1, 4):
+        condition_ticker = form_data.get(f'condition_ticker_{i}', '').upper()
+        if condition_ticker:
+            specs.append(validate_spec({
+                'ticker': condition_ticker,
+                'type': form_data.get(f'condition_type_{i}', 'specific'),
+                'percent': [float(v) for v in parse_choices(form_data.get(f'percent_{i}', '0'))],
+                'comparison': parse_choices(form_data.get(f'comparison_{i}', 'above')),
+                'priority': parse_choices(form_data.get(f'priority_{i}', 'none')),
+            }))
+    return specs
+
+
+def grid_size(specs):
+    """조합 수 (조합을 만들지 않고 계산)"""
+    size = 1
+    for spec in specs:
+        for field in GRID_FIELDS:
+            size *= len(spec[field]) if isinstance(spec[field], (list, tuple)) else 1
+    return size
+
+
+def _make_state(base, arrays, high_tickers):
+    """넘겨받은 가격 배열로 계산 상태(시계열/전고점) 구성"""
+    from calculator.price_cache import PriceSeries
+
+    series = {t: PriceSeries(t, days, closes) for t, (days, closes) in arrays.items()}
+    return {
+        'base': base,
+        'series': series,
+        'highs': {t: (series[t].days, series[t].running_high()) for t in high_tickers},
+    }
+
+
+def _init_worker(base, arrays, high_tickers):
+    """워커마다 한 번 실행되는 프로세스 풀 initializer"""
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        django.setup()
+
+    _worker.update(_make_state(base, arrays, high_tickers))
+
+
+def _evaluate(conditions, state=None):
+    """조건 조합 하나 계산 (state 가 없으면 워커 상태 사용)"""
+    from .simulation import run_investment_simulation
+
+    state = state or _worker
+    result = run_investment_simulation(
+        conditions=conditions, language='en',
+        series=state['series'], highs=state['highs'], **state['base']
+    )
+    final_result = result['final_result']
+    return {
+        'conditions': conditions,
+        'final_profit_rate': final_result['final_profit_rate'],
+        'final_total_assets': final_result['final_total_assets'],
+        'final_total_investment': final_result['final_total_investment'],
+        'purchases': len(result['records']),
+    }
+
+
+def run_sweep(ticker, ticker2, initial_capital, monthly_investment, monthly_investment2,
+              start_date, end_date, specs, workers=1, sort_by='final_profit_rate', limit=None):
+    """모든 조건 조합을 계산해 sort_by 내림차순으로 정렬한 결과 리스트 반환 (금액은 달러)
+
+    workers 가 2 이상이면 프로세스 풀 사용. limit 는 허용 조합 수 (기본 STOCK2_SWEEP_MAX_POINTS).
+    """
+    from calculator import metrics
+    from .simulation import load_price_inputs
+
+    size = grid_size(specs)
+    limit = limit or max_points()
+    if size > limit:
+        raise ValueError(f'조합 수({size})가 최대 {limit}개를 넘습니다.')
+    grid = expand_grid(specs)
+
+    base = {
+        'ticker': ticker,
+        'ticker2': ticker2,
+        'initial_capital': initial_capital,
+        'monthly_investment': monthly_investment,
+        'monthly_investment2': monthly_investment2,
+        'start_date': start_date,
+        'end_date': end_date,
+    }
+    # 모든 조합에 쓰이는 티커를 한 번에 로드 (조합마다 티커는 같음)
+    series, _ = load_price_inputs(ticker, ticker2, specs)
+    arrays = {t: (s.days, s.closes) for t, s in series.items()}
+    high_tickers = sorted({spec['ticker'] for spec in specs if spec['type'] == 'high'})
+
+    with metrics.SIMULATION_SECONDS.time(kind='sweep'):
+        rows = _run_grid(grid, base, arrays, high_tickers, workers)
+
+    rows.sort(key=lambda row: row[sort_by], reverse=True)
+    for rank, row in enumerate(rows, start=1):
+        row['rank'] = rank
+    return rows
+
+
+def _run_grid(grid, base, arrays, high_tickers, workers):
+    """조합 목록 계산 (조합이 적거나 워커가 하나면 현재 프로세스에서)"""
+    if workers <= 1 or len(grid) < MIN_PARALLEL_POINTS:
+        state = _make_state(base, arrays, high_tickers)
+        return [_evaluate(conditions, state) for conditions in grid]
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(base, arrays, high_tickers)
+    ) as executor:
+        return list(executor.map(_evaluate, grid, chunksize=DEFAULT_CHUNK_SIZE))
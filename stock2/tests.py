@@ -1,3 +1,637 @@
-from django.test import TestCase
+import json
+import threading
+import time
+import weakref
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from calculator import ingestion, metrics, price_cache, sync_state
+from calculator.models import PriceRefreshRequest, StockData, TickerSyncState
+from calculator.tests import make_rows, price_on_or_before
+from . import twelvedata
+from .simulation import load_price_inputs, run_investment_simulation
+from .twelvedata import AsyncTwelveDataClient, TokenBucket, TwelveDataClient, TwelveDataError
+from .views import Stock2ResultAsyncView, Stock2ResultView, result_url
+
+
+class StubTwelveDataServer:
+    """오프라인 테스트용 Twelve Data time_series 대역 서버
+
+    series 에 티커별 [(날짜 문자열, 종가 문자열)] 을 넣어 두면 실제 API와 같은 형식으로
+    응답한다. failures 에 넣은 상태 코드는 앞에서부터 한 번씩 먼저 응답한다.
+    """
+
+    def __init__(self, series=None):
+        self.series = series or {}
+        self.failures = []
+        self.error_body = None  # 설정하면 HTTP 200 으로 이 오류 본문을 응답
+        self.requests = []
+        self.client_ports = set()
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, handler):
+        query = parse_qs(urlparse(handler.path).query)
+        with self.lock:
+            self.requests.append(query)
+            self.client_ports.add(handler.client_address[1])
+            status = self.failures.pop(0) if self.failures else 200
+
+        if status != 200:
+            body = {'code': status, 'status': 'error', 'message': 'stub failure'}
+        elif self.error_body:
+            body = self.error_body
+        else:
+            symbols = query['symbol'][0].split(',')
+            payloads = {symbol: self.payload(symbol) for symbol in symbols}
+            body = payloads[symbols[0]] if len(symbols) == 1 else payloads
+
+        encoded = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(encoded)))
+        handler.end_headers()
+        handler.wfile.write(encoded)
+
+    def payload(self, symbol):
+        if symbol not in self.series:
+            return {'code': 400, 'status': 'error', 'message': f'{symbol} not found'}
+        values = [{'datetime': d, 'close': c} for d, c in reversed(self.series[symbol])]
+        return {'meta': {'symbol': symbol}, 'values': values, 'status': 'ok'}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_waits_only_after_burst_capacity_is_used(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=clock, sleep=clock.sleep)
+
+        waits = [bucket.acquire() for _ in range(4)]
+
+        self.assertEqual(waits, [0.0, 0.0, 1.0, 1.0])
+        self.assertEqual(clock.now, 2.0)
+
+    def test_batch_request_costs_one_credit_per_symbol(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate_per_minute=8, clock=clock, sleep=clock.sleep)
+
+        self.assertEqual(bucket.reserve(8), 0.0)
+        self.assertAlmostEqual(bucket.reserve(2), 15.0)
+
+    def test_shared_across_threads(self):
+        bucket = TokenBucket(rate_per_minute=6000, capacity=5)
+        waits = []
+
+        def worker():
+            waits.append(bucket.reserve())
+
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 처음 5개만 바로 나가고 나머지는 예약 순서대로 간격을 둠
+        self.assertEqual(sum(1 for w in waits if w == 0), 5)
+        self.assertEqual(len(set(round(w, 6) for w in waits if w > 0)), 15)
+
+
+class TwelveDataClientTests(SimpleTestCase):
+    def setUp(self):
+        self.server = StubTwelveDataServer({
+            'AAA': [('2024-01-02', '10.00'), ('2024-01-03', '10.50')],
+            'BBB': [('2024-01-02', '20.00')],
+        }).start()
+        self.addCleanup(self.server.stop)
+        self.client = TwelveDataClient(
+            'test-key', base_url=self.server.url, credits_per_minute=6000, backoff=0.01
+        )
+        self.addCleanup(self.client.close)
+
+    def test_single_symbol(self):
+        result = self.client.time_series(['AAA'])
+
+        self.assertEqual(result, {'AAA': [(date(2024, 1, 2), '10.00'), (date(2024, 1, 3), '10.50')]})
+        self.assertEqual(self.server.requests[0]['outputsize'], ['5000'])
+        self.assertEqual(self.server.requests[0]['apikey'], ['test-key'])
+
+    def test_batch_symbols_in_one_request(self):
+        result = self.client.time_series(['AAA', 'BBB', 'ZZZ'], start_date=date(2024, 1, 1))
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.server.requests[0]['symbol'], ['AAA,BBB,ZZZ'])
+        self.assertEqual(self.server.requests[0]['start_date'], ['2024-01-01'])
+        self.assertEqual(result['BBB'], [(date(2024, 1, 2), '20.00')])
+        self.assertEqual(result['ZZZ'], [])
+
+    def test_batches_are_split_by_batch_size(self):
+        self.client.batch_size = 2
+        self.client.time_series(['AAA', 'BBB', 'ZZZ'])
+
+        self.assertEqual([r['symbol'] for r in self.server.requests], [['AAA,BBB'], ['ZZZ']])
+
+    def test_retries_transient_errors(self):
+        self.server.failures = [503, 429]
+
+        result = self.client.time_series(['AAA'])
+
+        self.assertEqual(len(result['AAA']), 2)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_gives_up_after_max_retries(self):
+        self.server.failures = [500] * 10
+
+        with self.assertRaises(TwelveDataError):
+            self.client.time_series(['AAA'])
+        self.assertEqual(len(self.server.requests), self.client.max_retries + 1)
+
+    def test_request_level_error_body_raises(self):
+        self.server.error_body = {'code': 401, 'status': 'error', 'message': 'invalid api key'}
+
+        for symbols in (['AAA', 'BBB'], ['AAA']):
+            with self.subTest(symbols=symbols), self.assertRaises(TwelveDataError):
+                self.client.time_series(symbols)
+
+    def test_unknown_single_symbol_is_empty(self):
+        self.assertEqual(self.client.time_series(['ZZZ']), {'ZZZ': []})
+
+    def test_reuses_connection(self):
+        for _ in range(5):
+            self.client.time_series(['AAA'])
+
+        self.assertEqual(len(self.server.client_ports), 1)
+
+    def test_limiter_bounds_throughput(self):
+        self.client.limiter = TokenBucket(rate_per_minute=600, capacity=1)
+
+        started = time.monotonic()
+        for _ in range(3):
+            self.client.time_series(['AAA'])
+        elapsed = time.monotonic() - started
+
+        # 초당 10 크레딧: 첫 요청 이후 두 번은 0.1초씩 기다려야 함
+        self.assertGreaterEqual(elapsed, 0.2)
+
+
+class AsyncTwelveDataClientTests(SimpleTestCase):
+    def setUp(self):
+        self.server = StubTwelveDataServer({
+            'AAA': [('2024-01-02', '10.00'), ('2024-01-03', '10.50')],
+            'BBB': [('2024-01-02', '20.00')],
+        }).start()
+        self.addCleanup(self.server.stop)
+
+    def make_client(self, **kwargs):
+        kwargs.setdefault('limiter', TokenBucket(rate_per_minute=6000))
+        return AsyncTwelveDataClient('test-key', base_url=self.server.url, backoff=0.01, **kwargs)
+
+    async def test_same_results_as_sync_client(self):
+        client = self.make_client()
+        try:
+            result = await client.time_series(['AAA', 'BBB', 'ZZZ'], start_date=date(2024, 1, 1))
+        finally:
+            await client.aclose()
+
+        self.assertEqual(result['AAA'], [(date(2024, 1, 2), '10.00'), (date(2024, 1, 3), '10.50')])
+        self.assertEqual(result['ZZZ'], [])
+        self.assertEqual(self.server.requests[0]['symbol'], ['AAA,BBB,ZZZ'])
+
+    async def test_batches_and_retries(self):
+        self.server.failures = [503]
+        client = self.make_client(batch_size=1)
+        try:
+            result = await client.time_series(['AAA', 'BBB'])
+        finally:
+            await client.aclose()
+
+        self.assertEqual(len(result['AAA']), 2)
+        self.assertEqual(len(result['BBB']), 1)
+        self.assertEqual(len(self.server.requests), 3)
+
+    async def test_limiter_waits_without_blocking(self):
+        limiter = TokenBucket(rate_per_minute=600, capacity=1)
+        client = self.make_client(limiter=limiter, batch_size=1)
+        try:
+            started = time.monotonic()
+            await client.time_series(['AAA', 'BBB', 'ZZZ'])
+            elapsed = time.monotonic() - started
+        finally:
+            await client.aclose()
+
+        # 초당 10 크레딧: 첫 요청 이후 두 묶음은 0.1초 간격으로 나감
+        self.assertGreaterEqual(elapsed, 0.2)
+
+
+def reference_simulation(rows, ticker, ticker2, initial_capital, monthly_investment, monthly_investment2,
+                         start_date, end_date, conditions, language='en'):
+    """기존 Stock2ResultView.run_investment_simulation 의 월별 반복 계산
+
+    구매일마다 티커별 가격 한 건, 'high' 조건은 그 날짜까지의 최고 종가(기존 AllTimeHigh 조회)를 쓴다.
+    """
+    def get_stock_price(t, value):
+        row = price_on_or_before(rows.get(t, []), value)
+        return row[1] if row else None
+
+    def check_condition(condition, value):
+        current_price = get_stock_price(condition['ticker'], value)
+        if current_price is None:
+            return False
+        if condition['type'] == 'specific':
+            if condition['comparison'] == 'above':
+                return current_price >= condition['percent']
+            return current_price <= condition['percent']
+        if condition['type'] == 'high':
+            all_time_high = max(p for d, p in rows[condition['ticker']] if d <= value)
+            return current_price <= all_time_high * (100 - condition['percent']) / 100
+        return False
+
+    exchange_rate = 1400.0 if language == 'ko' else 1.0
+
+    def converted(value):
+        return value * exchange_rate if language == 'ko' else value
+
+    cash_usd = initial_capital
+    shares_held = {}
+    if ticker:
+        shares_held[ticker] = 0
+    if ticker2:
+        shares_held[ticker2] = 0
+    total_investment = initial_capital
+    records = []
+
+    priority_conditions = {}
+    for condition in conditions:
+        if condition['priority'] != 'none':
+            priority_conditions.setdefault(int(condition['priority']), []).append(condition)
+
+    def buy(t, stock_price, shares_to_buy, action):
+        nonlocal cash_usd
+        shares_held[t] = shares_held.get(t, 0) + shares_to_buy
+        purchase_amount = shares_to_buy * stock_price
+        cash_usd -= purchase_amount
+        records.append({
+            'date': investment_date.strftime('%Y-%m-%d'),
+            'action': action,
+            'price': round(stock_price, 2),
+            'shares_bought': shares_to_buy,
+            'shares_held': shares_held[t],
+            'purchase_amount': round(converted(purchase_amount), 0),
+            'cash': round(converted(cash_usd), 0),
+            'currency': 'KRW' if language == 'ko' else 'USD',
+        })
+
+    investment_day = min(start_date.day, 28)
+    current_date = start_date
+    while current_date <= end_date:
+        investment_date = current_date.replace(day=investment_day)
+        if investment_date > end_date:
+            break
+
+        cash_usd += monthly_investment + monthly_investment2
+        total_investment += monthly_investment + monthly_investment2
+
+        purchased = False
+        for priority in sorted(priority_conditions):
+            for condition in priority_conditions[priority]:
+                if check_condition(condition, investment_date):
+                    stock_price = get_stock_price(condition['ticker'], investment_date)
+                    shares_to_buy = int(cash_usd // stock_price)
+                    if shares_to_buy > 0:
+                        action = (f"{condition['ticker']} (우선순위{priority})" if language == 'ko'
+                                  else f"{condition['ticker']} (priority {priority})")
+                        buy(condition['ticker'], stock_price, shares_to_buy, action)
+                        purchased = True
+                        break
+            if purchased:
+                break
+
+        if not purchased:
+            if ticker and monthly_investment > 0:
+                stock_price1 = get_stock_price(ticker, investment_date)
+                if stock_price1:
+                    share = monthly_investment / (monthly_investment + monthly_investment2)
+                    shares_to_buy1 = int((cash_usd * share) // stock_price1)
+                    if shares_to_buy1 > 0:
+                        buy(ticker, stock_price1, shares_to_buy1, ticker)
+            if ticker2 and monthly_investment2 > 0:
+                stock_price2 = get_stock_price(ticker2, investment_date)
+                if stock_price2 and cash_usd > 0:
+                    shares_to_buy2 = int(cash_usd // stock_price2)
+                    if shares_to_buy2 > 0:
+                        buy(ticker2, stock_price2, shares_to_buy2, ticker2)
+
+        current_date = (current_date.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+    final_stock_value = 0
+    ticker_details = {}
+    for t, shares in shares_held.items():
+        end_price = get_stock_price(t, end_date)
+        if end_price:
+            ticker_value = shares * end_price
+            final_stock_value += ticker_value
+            ticker_details[t] = {
+                'shares': int(shares),
+                'value': round(converted(ticker_value), 0),
+                'price': round(converted(end_price), 2),
+                'value_usd': round(ticker_value, 2),
+                'price_usd': round(end_price, 2)
+            }
+
+    final_total_assets = final_stock_value + cash_usd
+    final_profit_amount = final_total_assets - total_investment
+    return {
+        'records': records,
+        'final_result': {
+            'final_stock_value': round(converted(final_stock_value), 0),
+            'final_cash': round(converted(cash_usd), 0),
+            'final_total_assets': round(converted(final_total_assets), 0),
+            'final_total_investment': round(converted(total_investment), 0),
+            'final_profit_rate': round(((final_total_assets - total_investment) / total_investment) * 100, 2)
+            if total_investment > 0 else 0,
+            'final_profit_amount': round(converted(final_profit_amount), 0),
+            'shares_held': shares_held,
+            'ticker_details': ticker_details,
+            'currency': 'KRW' if language == 'ko' else 'USD',
+            'exchange_rate': exchange_rate if language == 'ko' else 1.0
+        }
+    }
+
+
+SIMULATION_ROWS = {
+    'AAA': make_rows(date(2005, 1, 3), date(2012, 12, 31), base=60.0),
+    # 2008년 하반기 데이터 없음, 기본 종목보다 늦게 시작
+    'BBB': make_rows(date(2006, 6, 1), date(2012, 12, 31), gaps=[(date(2008, 7, 1), date(2008, 12, 31))], base=30.0),
+    'CCC': make_rows(date(2005, 1, 3), date(2012, 12, 31), base=45.0),
+}
+
+CONDITIONS = [
+    {'ticker': 'CCC', 'type': 'high', 'percent': 30.0, 'comparison': 'below', 'priority': '1'},
+    {'ticker': 'BBB', 'type': 'specific', 'percent': 20.0, 'comparison': 'below', 'priority': '2'},
+    {'ticker': 'AAA', 'type': 'specific', 'percent': 75.0, 'comparison': 'above', 'priority': '2'},
+    {'ticker': 'CCC', 'type': 'specific', 'percent': 1.0, 'comparison': 'above', 'priority': 'none'},
+]
+
+SCENARIOS = [
+    # (기본 종목, 추가 종목, 초기 자본, 월적립액, 추가 월적립액, 시작일, 종료일, 조건, 언어)
+    ('AAA', 'BBB', 10000.0, 500.0, 300.0, date(2005, 3, 15), date(2012, 6, 30), CONDITIONS, 'en'),
+    ('AAA', 'BBB', 10000.0, 500.0, 300.0, date(2005, 3, 31), date(2012, 6, 30), CONDITIONS, 'ko'),
+    ('AAA', '', 2000.0, 400.0, 0.0, date(2004, 6, 10), date(2010, 1, 5), CONDITIONS[:1], 'en'),
+    ('AAA', 'BBB', 0.0, 0.0, 700.0, date(2006, 1, 2), date(2009, 12, 31), [], 'ko'),
+]
+
+
+class RunInvestmentSimulationTests(TestCase):
+    """조건부 시뮬레이션이 기존 월별 조회 계산과 같은 값을 주는지 (일별 시계열/월별 스냅샷 경로 모두)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # 수집 경로로 저장해 수집 상태와 월별 스냅샷도 만든다
+        ingestion.store_price_rows(SIMULATION_ROWS)
+
+    def setUp(self):
+        price_cache.invalidate()
+        self.addCleanup(price_cache.invalidate)
+
+    def run_scenario(self, scenario, **kwargs):
+        return run_investment_simulation(*scenario[:8], language=scenario[8], **kwargs)
+
+    def expected(self, scenario):
+        return reference_simulation(SIMULATION_ROWS, *scenario[:8], language=scenario[8])
+
+    def test_daily_series_path(self):
+        for scenario in SCENARIOS:
+            for t in SIMULATION_ROWS:
+                price_cache.get_price_series(t)
+            with self.subTest(scenario=scenario[5:7]):
+                self.assertEqual(self.run_scenario(scenario), self.expected(scenario))
+
+    def test_snapshot_path(self):
+        for scenario in SCENARIOS:
+            price_cache.invalidate()
+            hits = metrics.SNAPSHOT_REQUESTS.value(result='hit')
+            with self.subTest(scenario=scenario[5:7]):
+                self.assertEqual(self.run_scenario(scenario), self.expected(scenario))
+                self.assertGreater(metrics.SNAPSHOT_REQUESTS.value(result='hit'), hits)
+
+    def test_preloaded_inputs(self):
+        for scenario in SCENARIOS:
+            series, highs = load_price_inputs(scenario[0], scenario[1], scenario[7])
+            with self.subTest(scenario=scenario[5:7]):
+                self.assertEqual(self.run_scenario(scenario, series=series, highs=highs), self.expected(scenario))
+
+    @override_settings(MONTHLY_SNAPSHOTS_ENABLED=False)
+    def test_snapshots_disabled(self):
+        scenario = SCENARIOS[0]
+        self.assertEqual(self.run_scenario(scenario), self.expected(scenario))
+
+    def test_conditions_trigger_purchases(self):
+        # 픽스처가 조건 분기를 실제로 거치는지 확인
+        actions = {r['action'] for r in self.expected(SCENARIOS[0])['records']}
+        self.assertIn('CCC (priority 1)', actions)
+        self.assertIn('AAA (priority 2)', actions)
+        self.assertIn('AAA', actions)
+
+
+class Stock2SweepApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ingestion.store_price_rows({t: SIMULATION_ROWS[t] for t in ('AAA', 'CCC')})
+        cls.staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+
+    def setUp(self):
+        price_cache.invalidate()
+        self.addCleanup(price_cache.invalidate)
+
+    def params(self, percents='10,20,30'):
+        return {
+            'ticker': 'AAA', 'initial_capital': '1000', 'monthly_investment': '100',
+            'start_date': '2006-01-10', 'end_date': '2010-12-31',
+            'condition_ticker_1': 'CCC', 'condition_type_1': 'high', 'percent_1': percents,
+            'comparison_1': 'below', 'priority_1': '1',
+        }
+
+    def test_requires_staff_or_token(self):
+        response = self.client.get(reverse('api_stock2_sweep'), self.params())
+        self.assertEqual(response.status_code, 403)
+
+    def test_staff_runs_in_process(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('api_stock2_sweep'), self.params())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+
+    @override_settings(STOCK2_SWEEP_API_TOKEN='secret')
+    def test_token(self):
+        url = reverse('api_stock2_sweep')
+        self.assertEqual(self.client.get(url, self.params(), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(url, self.params(), HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_rejects_unknown_condition_values(self):
+        self.client.force_login(self.staff)
+        for field, value in (('comparison_1', 'below,foo'), ('condition_type_1', 'bogus'), ('priority_1', '9')):
+            response = self.client.get(reverse('api_stock2_sweep'), dict(self.params(), **{field: value}))
+            self.assertEqual(response.status_code, 400, field)
+
+        with self.assertRaisesMessage(CommandError, 'foo'):
+            call_command('sweep_conditions', 'AAA', '--start-date', '2006-01-10', '--end-date', '2010-12-31',
+                         '--condition', 'CCC', 'high', '10,20', 'below,foo', '1')
+
+    @override_settings(STOCK2_SWEEP_API_MAX_POINTS=2)
+    def test_point_cap(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('api_stock2_sweep'), self.params())
+        self.assertEqual(response.status_code, 400)
+
+
+class Stock2ResultViewTests(TestCase):
+    def test_without_query_redirects_to_form(self):
+        response = self.client.get(reverse('stock2_result'))
+        self.assertRedirects(response, reverse('stock2'), fetch_redirect_response=False)
+
+    def test_save_inputs_keeps_query_inputs(self):
+        query = '?ticker=aaa&initial_capital=1000&monthly_investment=100&start_date=2020-01-01&end_date=2021-01-01'
+        response = self.client.post(reverse('stock2_result') + query, {'save_inputs': 'on'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith(reverse('stock2') + '?'))
+        self.assertIn('ticker=AAA', response['Location'])
+        self.assertIn('save_inputs=on', response['Location'])
+
+        form = self.client.get(response['Location'])
+        self.assertEqual(form.context['form_data']['ticker'], 'AAA')
+
+    def test_post_without_save_inputs(self):
+        response = self.client.post(reverse('stock2_result'), {})
+        self.assertRedirects(response, reverse('stock2'), fetch_redirect_response=False)
+
+    def test_etag_revalidation(self):
+        ingestion.store_price_rows({'AAA': SIMULATION_ROWS['AAA']})
+        price_cache.invalidate()
+        self.addCleanup(price_cache.invalidate)
+        url = result_url({
+            'ticker': 'aaa', 'initial_capital': '1000', 'monthly_investment': '100',
+            'start_date': '2006-01-10', 'end_date': '2012-12-31',
+        })
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=600', response['Cache-Control'])
+        self.assertNotIn('Server-Timing', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # 오래된 티커는 304 로 응답해도 갱신 예약
+        TickerSyncState.objects.filter(pk='AAA').update(last_fetched_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertTrue(PriceRefreshRequest.objects.filter(ticker='AAA').exists())
+
+        # 새 데이터가 들어오면 예전 ETag 로는 새로 계산
+        now = timezone.now()
+        StockData.objects.create(ticker='AAA', date=date(2013, 1, 2), close_price=99.0, updated_at=now)
+        sync_state.record_ingestion('AAA', [(date(2013, 1, 2), 99.0)], now)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class Stock2ResultAsyncViewTests(TestCase):
+    """비동기 결과 뷰: 데이터가 없는 티커는 비동기 클라이언트로 받아 저장하고 동기 뷰와 같은 결과"""
+
+    def setUp(self):
+        self.server = StubTwelveDataServer({
+            ticker: [(d.isoformat(), f'{p:.2f}') for d, p in SIMULATION_ROWS[ticker]] for ticker in ('AAA', 'CCC')
+        }).start()
+        self.addCleanup(self.server.stop)
+
+        settings_override = override_settings(TWELVE_DATA_API_KEY='test-key', TWELVE_DATA_BASE_URL=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # 프로세스 공용 클라이언트를 대역 서버용으로 새로 만듦
+        for name, value in (('_client', None), ('_async_clients', weakref.WeakKeyDictionary())):
+            patcher = mock.patch.object(twelvedata, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        price_cache.invalidate()
+        self.addCleanup(price_cache.invalidate)
+
+        self.url = result_url({
+            'ticker': 'aaa', 'initial_capital': '1000', 'monthly_investment': '100',
+            'start_date': '2006-01-10', 'end_date': '2012-12-31',
+            'condition_ticker_1': 'ccc', 'condition_type_1': 'high', 'percent_1': '20',
+            'comparison_1': 'below', 'priority_1': '1',
+        })
+
+    async def get(self, headers=None):
+        try:
+            return await Stock2ResultAsyncView.as_view()(AsyncRequestFactory().get(self.url, headers=headers))
+        finally:
+            await twelvedata.get_async_client().aclose()
+
+    async def test_fetches_missing_tickers_in_one_batch(self):
+        response = await self.get()
+
+        self.assertEqual(response.status_code, 200)
+        # 묶음 요청 한 번 (티커 순서는 정해져 있지 않음)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(sorted(self.server.requests[0]['symbol'][0].split(',')), ['AAA', 'CCC'])
+        for ticker in ('AAA', 'CCC'):
+            count = await sync_to_async(StockData.objects.filter(ticker=ticker).count)()
+            self.assertEqual(count, len(SIMULATION_ROWS[ticker]))
+
+        # 동기 뷰와 같은 결과 (ETag 는 입력값과 데이터 버전으로 정해짐)
+        sync_response = await sync_to_async(Stock2ResultView.as_view())(RequestFactory().get(self.url))
+        self.assertEqual(sync_response['ETag'], response['ETag'])
+
+        response = await self.get({'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(self.server.requests), 1)
@@ -0,0 +1,318 @@
+"""Twelve Data API 클라이언트
+
+프로세스 안에서 하나의 requests.Session (keep-alive 연결 풀)을 재사용하고,
+분당 크레딧 한도에 맞춘 토큰 버킷으로 모든 스레드의 요청 속도를 제한한다.
+여러 티커는 쉼표로 묶어 한 번의 요청으로 가져온다.
+
+AsyncTwelveDataClient 는 같은 요청을 httpx.AsyncClient 로 보내는 비동기 버전으로,
+속도 제한기는 동기 클라이언트와 공유하고 대기는 asyncio.sleep 으로 한다.
+
+requests/httpx 는 URLconf 를 읽을 때가 아니라 클라이언트를 처음 만들 때 가져온다
+(워커 시작 시간과 메모리 절약).
+"""
+import asyncio
+import threading
+import time
+import weakref
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from calculator import metrics
+
+PROVIDER = 'twelvedata'  # 지표 레이블
+BASE_URL = 'https://api.twelvedata.com'
+
+# 무료 요금제 기준: 분당 8 크레딧, 티커 하나당 1 크레딧
+DEFAULT_CREDITS_PER_MINUTE = 8
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_TIMEOUT = (3.05, 20)  # (연결, 읽기) 초
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+FULL_OUTPUT_SIZE = 5000
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# 단일 티커 응답의 본문 오류 중 "해당 티커 데이터 없음"으로 보는 코드 (그 밖의 코드는 예외)
+NO_DATA_ERROR_CODES = {400, 404}
+
+
+class TwelveDataError(Exception):
+    """재시도 후에도 실패한 Twelve Data 요청"""
+
+
+class TokenBucket:
+    """스레드 간에 공유되는 토큰 버킷 속도 제한기
+
+    토큰을 먼저 예약한 뒤 필요한 만큼만 기다리므로, 동시에 들어온 요청들도
+    도착 순서대로 간격을 두고 나간다.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """토큰 예약 후 기다려야 할 시간(초) 반환"""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self, tokens=1):
+        """토큰을 쓸 수 있을 때까지 대기"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+class TwelveDataClient:
+    def __init__(self, api_key, base_url=BASE_URL, credits_per_minute=DEFAULT_CREDITS_PER_MINUTE,
+                 batch_size=DEFAULT_BATCH_SIZE, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff=DEFAULT_BACKOFF, limiter=None, sleep=time.sleep):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self.limiter = limiter or TokenBucket(credits_per_minute, sleep=sleep)
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def _get(self, path, params, credits):
+        """크레딧 차감 후 GET 요청, 일시적인 오류는 지수 백오프로 재시도"""
+        import requests
+
+        params = dict(params, apikey=self.api_key)
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.sleep(self.backoff * 2 ** (attempt - 1))
+
+            self.limiter.acquire(credits)
+            started = time.perf_counter()
+            try:
+                response = self.session.get(f'{self.base_url}{path}', params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.record_upstream(PROVIDER, 'error', time.perf_counter() - started)
+                last_error = e
+                continue
+            metrics.record_upstream(PROVIDER, response.status_code, time.perf_counter() - started)
+
+            if response.status_code in RETRY_STATUS_CODES:
+                last_error = TwelveDataError(f'HTTP {response.status_code}')
+                retry_after = response.headers.get('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    self.sleep(int(retry_after))
+                continue
+
+            response.raise_for_status()
+            data = response.json()
+
+            last_error = rate_limit_error(data)
+            if last_error:
+                continue
+
+            return data
+
+        raise TwelveDataError(f'{path} 요청 실패: {last_error}')
+
+    def time_series(self, symbols, start_date=None):
+        """티커별 일별 종가 [(날짜, 종가 문자열)] (가장 오래된 날짜부터)
+
+        start_date 가 없으면 가능한 전체 기간을 가져온다. 데이터가 없거나
+        오류가 난 티커는 빈 리스트.
+        """
+        results = {}
+        for batch in batches(symbols, self.batch_size):
+            data = self._get('/time_series', time_series_params(batch, start_date), credits=len(batch))
+            results.update(parse_batch(batch, data))
+        return results
+
+
+class AsyncTwelveDataClient:
+    """TwelveDataClient 와 같은 요청을 이벤트 루프를 막지 않고 보내는 비동기 클라이언트"""
+
+    def __init__(self, api_key, base_url=BASE_URL, batch_size=DEFAULT_BATCH_SIZE, timeout=DEFAULT_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, limiter=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limiter = limiter or TokenBucket(DEFAULT_CREDITS_PER_MINUTE)
+
+        import httpx
+
+        connect, read = timeout
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=4),
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _get(self, path, params, credits):
+        """크레딧 차감 후 GET 요청, 일시적인 오류는 지수 백오프로 재시도"""
+        import httpx
+
+        params = dict(params, apikey=self.api_key)
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+            wait = self.limiter.reserve(credits)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            started = time.perf_counter()
+            try:
+                response = await self.client.get(f'{self.base_url}{path}', params=params)
+            except httpx.TransportError as e:
+                metrics.record_upstream(PROVIDER, 'error', time.perf_counter() - started)
+                last_error = e
+                continue
+            metrics.record_upstream(PROVIDER, response.status_code, time.perf_counter() - started)
+
+            if response.status_code in RETRY_STATUS_CODES:
+                last_error = TwelveDataError(f'HTTP {response.status_code}')
+                retry_after = response.headers.get('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    await asyncio.sleep(int(retry_after))
+                continue
+
+            response.raise_for_status()
+            data = response.json()
+
+            last_error = rate_limit_error(data)
+            if last_error:
+                continue
+
+            return data
+
+        raise TwelveDataError(f'{path} 요청 실패: {last_error}')
+
+    async def time_series(self, symbols, start_date=None):
+        """TwelveDataClient.time_series 의 비동기 버전 (묶음 요청을 동시에 보냄)"""
+        batch_list = batches(symbols, self.batch_size)
+        responses = await asyncio.gather(*[
+            self._get('/time_series', time_series_params(batch, start_date), credits=len(batch))
+            for batch in batch_list
+        ])
+
+        results = {}
+        for batch, data in zip(batch_list, responses):
+            results.update(parse_batch(batch, data))
+        return results
+
+
+def batches(symbols, batch_size):
+    symbols = list(symbols)
+    return [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+
+
+def time_series_params(batch, start_date=None):
+    params = {'symbol': ','.join(batch), 'interval': '1day'}
+    if start_date:
+        params['start_date'] = start_date.strftime('%Y-%m-%d')
+    else:
+        params['outputsize'] = FULL_OUTPUT_SIZE
+    return params
+
+
+def rate_limit_error(data):
+    """크레딧 초과는 HTTP 200 + 본문 코드 429 로 오기도 함"""
+    if isinstance(data, dict) and data.get('status') == 'error' and data.get('code') == 429:
+        return TwelveDataError(data.get('message', 'rate limited'))
+    return None
+
+
+def parse_batch(batch, data):
+    """묶음 응답을 {티커: [(날짜, 종가)]} 로 변환
+
+    티커가 하나면 결과가 바로, 여러 개면 티커별로 묶여서 온다. 요청 전체가 실패한 본문
+    (예: 잘못된 API 키 401)은 모든 티커의 빈 데이터로 보지 않고 TwelveDataError 를 낸다.
+    """
+    if isinstance(data, dict) and data.get('status') == 'error':
+        if len(batch) > 1 or data.get('code') not in NO_DATA_ERROR_CODES:
+            raise TwelveDataError(f"{data.get('code')}: {data.get('message', 'error')}")
+
+    by_symbol = {batch[0]: data} if len(batch) == 1 else data
+    return {symbol: parse_values(by_symbol.get(symbol)) for symbol in batch}
+
+
+def parse_values(payload):
+    """time_series 응답 하나를 [(날짜, 종가)] 로 변환"""
+    if not isinstance(payload, dict) or not payload.get('values'):
+        return []
+
+    return [
+        (datetime.strptime(value['datetime'], '%Y-%m-%d').date(), value['close'])
+        for value in reversed(payload['values'])  # 가장 오래된 데이터부터 처리
+    ]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def api_key():
+    """settings.TWELVE_DATA_API_KEY (없으면 ImproperlyConfigured)"""
+    key = getattr(settings, 'TWELVE_DATA_API_KEY', None)
+    if not key:
+        raise ImproperlyConfigured('TWELVE_DATA_API_KEY 설정이 없습니다.')
+    return key
+
+
+def get_client():
+    """프로세스 공용 클라이언트 (세션과 속도 제한기를 모든 스레드가 공유)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TwelveDataClient(
+                api_key=api_key(),
+                base_url=getattr(settings, 'TWELVE_DATA_BASE_URL', BASE_URL),
+                credits_per_minute=getattr(settings, 'TWELVE_DATA_CREDITS_PER_MINUTE', DEFAULT_CREDITS_PER_MINUTE),
+            )
+        return _client
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """이벤트 루프별 비동기 클라이언트 (속도 제한기는 동기 클라이언트와 공유)"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncTwelveDataClient(
+            api_key=api_key(),
+            base_url=getattr(settings, 'TWELVE_DATA_BASE_URL', BASE_URL),
+            limiter=get_client().limiter,
+        )
+        _async_clients[loop] = client
+    return client
@@ -1,9 +1,14 @@
 #stock2/urls.py
 
 from django.urls import path
-from .views import Stock2View, Stock2ResultView
+from django.conf import settings
+
+from .views import Stock2View, Stock2ResultView, Stock2ResultAsyncView
+
+# ASYNC_VIEWS 를 켜면 ASGI 서버에서 결과 페이지를 비동기 뷰로 처리
+result_view = Stock2ResultAsyncView if getattr(settings, 'ASYNC_VIEWS', False) else Stock2ResultView
 
 urlpatterns = [
     path('', Stock2View.as_view(), name='stock2'),
-    path('result/', Stock2ResultView.as_view(), name='stock2_result'),
+    path('result/', result_view.as_view(), name='stock2_result'),
 ]
\ No newline at end of file
@@ -1,13 +1,25 @@
-import requests
-import pandas as pd
+import re
+from urllib.parse import urlencode
+
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.views import View
-from django.utils import timezone
-from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
-from calculator.models import StockData
-from .models import AllTimeHigh
+from django.utils.cache import get_conditional_response, patch_cache_control
+from datetime import datetime
+from calculator import ingestion, metrics, refresh, refresh_lock, result_cache, timing
+from . import all_time_high, simulation, twelvedata
 from django.utils import translation
+from django.conf import settings
+
+EXCHANGE_RATE = 1400.0
+
+# 결과 페이지 캐시 유지 시간 (초), STOCK2_RESULT_MAX_AGE 로 변경
+DEFAULT_RESULT_MAX_AGE = 60 * 10
+
+_ticker_pattern = re.compile(r'^[A-Z0-9.^=-]{1,15}$')
 
 
 
@@ -34,6 +46,200 @@ def set_language_from_url(request):
     return lang_code
 
 
+def fetch_twelve_data(ticker, start_date=None):
+    """Twelve Data 일별 종가 조회 (네트워크 요청만, DB 접근 없음)
+
+    가장 오래된 날짜부터 [(날짜, 종가 문자열)] 로 반환한다.
+    """
+    with timing.span(timing.FETCH, ticker):
+        return twelvedata.get_client().time_series([ticker], start_date)[ticker]
+
+
+def fetch_twelve_data_batch(tickers):
+    """여러 티커의 전체 기간 종가를 묶음 요청으로 조회 (DB 접근 없음)"""
+    with timing.span(timing.FETCH, ','.join(tickers)):
+        return twelvedata.get_client().time_series(tickers)
+
+
+def update_stock_data_twelvedata(ticker):
+    """Twelve Data API를 사용한 최적화된 주식 데이터 업데이트"""
+    try:
+        # 기존 데이터의 가장 최근 날짜 확인 (이미 최신이면 None)
+        window = ingestion.fetch_window(ticker)
+        if window is None:
+            return 0
+
+        latest_date, start_date = window
+        rows = fetch_twelve_data(ticker, start_date)
+        return store_twelve_data_rows(ticker, rows, latest_date)
+
+    except Exception as e:
+        metrics.PRICE_UPDATE_ERRORS.inc(provider=twelvedata.PROVIDER)
+        print(f"Update error for {ticker}: {e}")
+        return f"업데이트 실패: {str(e)}"
+
+
+async def aupdate_stock_data_twelvedata(ticker):
+    """update_stock_data_twelvedata 의 비동기 버전 (DB 작업만 sync_to_async)"""
+    try:
+        window = await sync_to_async(ingestion.fetch_window)(ticker)
+        if window is None:
+            return 0
+
+        latest_date, start_date = window
+        with timing.span(timing.FETCH, ticker):
+            rows = (await twelvedata.get_async_client().time_series([ticker], start_date))[ticker]
+        return await sync_to_async(store_twelve_data_rows)(ticker, rows, latest_date)
+
+    except Exception as e:
+        metrics.PRICE_UPDATE_ERRORS.inc(provider=twelvedata.PROVIDER)
+        print(f"Update error for {ticker}: {e}")
+        return f"업데이트 실패: {str(e)}"
+
+
+def store_twelve_data_rows(ticker, rows, latest_date=None):
+    """내려받은 종가 저장 후 결과 메시지 반환"""
+    if not rows:
+        ingestion.mark_fetched(ticker)
+        return f"{ticker} 데이터가 없습니다."
+
+    # 기존 데이터보다 새로운 데이터만 추가 (중복 방지)
+    new_data = [(date, close) for date, close in rows if not latest_date or date > latest_date]
+    ingestion.store_price_rows({ticker: new_data})
+
+    if latest_date:
+        return f"{ticker} 데이터 증분 업데이트 완료 ({len(new_data)}개 추가)"
+    else:
+        return f"{ticker} 데이터 전체 업데이트 완료 ({len(new_data)}개 저장)"
+
+
+def _number_text(value):
+    """숫자 문자열 정규화 ('1000.0' → '1000')"""
+    number = float(value)
+    return str(int(number)) if number.is_integer() else repr(number)
+
+
+def _ticker_text(value):
+    ticker = value.strip().upper()
+    if ticker and not _ticker_pattern.match(ticker):
+        raise ValueError(f'잘못된 티커: {value}')
+    return ticker
+
+
+def normalize_form_data(data):
+    """입력값 검증 후 정해진 순서의 문자열 dict 로 정규화 (URL 쿼리 스트링용)
+
+    값이 잘못되면 ValueError. 빈 조건은 빼고 남은 조건을 1번부터 다시 번호 매긴다.
+    """
+    form_data = {
+        'ticker': _ticker_text(data.get('ticker', '')),
+        'initial_capital': _number_text(data.get('initial_capital') or 0),
+        'monthly_investment': _number_text(data.get('monthly_investment') or 0),
+        'start_date': datetime.strptime(data.get('start_date', ''), '%Y-%m-%d').strftime('%Y-%m-%d'),
+        'end_date': datetime.strptime(data.get('end_date', ''), '%Y-%m-%d').strftime('%Y-%m-%d'),
+    }
+    if not form_data['ticker']:
+        raise ValueError('티커를 입력하세요.')
+
+    ticker2 = _ticker_text(data.get('investment_ticker_2', ''))
+    if ticker2:
+        form_data['investment_ticker_2'] = ticker2
+        form_data['monthly_investment_2'] = _number_text(data.get('monthly_investment_2') or 0)
+
+    number = 0
+    for i in range(1, 4):
+        condition_ticker = _ticker_text(data.get(f'condition_ticker_{i}', ''))
+        if not condition_ticker:
+            continue
+
+        condition_type = data.get(f'condition_type_{i}', 'specific')
+        comparison = data.get(f'comparison_{i}', 'above')
+        priority = data.get(f'priority_{i}', 'none')
+        if condition_type not in ('specific', 'high'):
+            raise ValueError(f'잘못된 조건 유형: {condition_type}')
+        if comparison not in ('above', 'below'):
+            raise ValueError(f'잘못된 비교 조건: {comparison}')
+        if priority not in ('none', '1', '2', '3'):
+            raise ValueError(f'잘못된 우선순위: {priority}')
+
+        number += 1
+        form_data[f'condition_ticker_{number}'] = condition_ticker
+        form_data[f'condition_type_{number}'] = condition_type
+        form_data[f'percent_{number}'] = _number_text(data.get(f'percent_{i}') or 0)
+        form_data[f'comparison_{number}'] = comparison
+        form_data[f'priority_{number}'] = priority
+
+    return form_data
+
+
+def result_url(form_data):
+    """입력값이 그대로 담긴 결과 페이지 주소 (같은 입력이면 항상 같은 URL)"""
+    return f"{reverse('stock2_result')}?{urlencode(normalize_form_data(form_data))}"
+
+
+def parse_form_data(form_data, lang_code):
+    """입력값을 시뮬레이션 인자로 변환 (금액은 달러 기준)
+
+    결과 페이지 쿼리 스트링과 API 쿼리 파라미터가 같은 필드 이름을 쓴다.
+    """
+    # 환율 설정 (언어에 따라 다르게 처리)
+    exchange_rate = EXCHANGE_RATE if lang_code == 'ko' else 1.0
+
+    # 입력값 추출
+    ticker = form_data.get('ticker', '').upper()
+    ticker2 = form_data.get('investment_ticker_2', '').upper()
+
+    # 저장된 언어 정보 사용
+    saved_lang = form_data.get('language', 'ko')
+
+    # 언어에 따라 금액 처리
+    if lang_code == 'ko':
+        # 한국어인 경우 원화를 달러로 변환
+        initial_capital = float(form_data.get('initial_capital', '0')) / exchange_rate
+        monthly_investment = float(form_data.get('monthly_investment', '0')) / exchange_rate
+        monthly_investment2 = float(form_data.get('monthly_investment_2', '0')) / exchange_rate
+
+    else:
+        # 영어인 경우 그대로 사용
+        initial_capital = float(form_data.get('initial_capital', 0))
+        monthly_investment = float(form_data.get('monthly_investment', 0))
+        monthly_investment2 = float(form_data.get('monthly_investment_2', 0))
+
+
+    start_date = datetime.strptime(form_data.get('start_date'), '%Y-%m-%d').date()
+    end_date = datetime.strptime(form_data.get('end_date'), '%Y-%m-%d').date()
+
+    # 조건 설정 처리
+    conditions = []
+    for i in range(1, 4):
+        condition_ticker = form_data.get(f'condition_ticker_{i}', '').upper()
+        if condition_ticker:
+            condition_type = form_data.get(f'condition_type_{i}', 'specific')
+            percent = float(form_data.get(f'percent_{i}', 0))
+            comparison = form_data.get(f'comparison_{i}', 'above')
+            priority = form_data.get(f'priority_{i}', 'none')
+
+            conditions.append({
+                'ticker': condition_ticker,
+                'type': condition_type,
+                'percent': percent,
+                'comparison': comparison,
+                'priority': priority
+            })
+
+    return {
+        'ticker': ticker,
+        'ticker2': ticker2,
+        'initial_capital': initial_capital,
+        'monthly_investment': monthly_investment,
+        'monthly_investment2': monthly_investment2,
+        'start_date': start_date,
+        'end_date': end_date,
+        'conditions': conditions,
+        'language': saved_lang,
+    }
+
+
 class Stock2View(View):
     template_name = 'stock2/stock2.html'
 
@@ -47,11 +253,12 @@ class Stock2View(View):
             'LANGUAGE_CODE': lang_code,
         }
 
-        # 세션에서 저장된 입력값이 있는지 확인
-        if 'saved_form_data' in request.session:
-            form_data = request.session.get('saved_form_data')
-            context['form_data'] = form_data
-            del request.session['saved_form_data']
+        # 결과 페이지에서 "입력 값 유지"로 돌아온 경우 쿼리 스트링의 입력값 사용
+        if request.GET.get('save_inputs') == 'on':
+            try:
+                context['form_data'] = normalize_form_data(request.GET)
+            except ValueError:
+                pass
 
         return render(request, self.template_name, context)
 
@@ -59,9 +266,9 @@ class Stock2View(View):
         """POST 요청: 계산 수행 후 결과 페이지로 리다이렉트"""
         try:
             # 언어 설정
-            lang_code = set_language_from_url(request)
+            set_language_from_url(request)
 
-            # 입력값을 세션에 저장
+            # 입력값 모으기
             form_data = {}
 
             # 기본 입력값
@@ -85,14 +292,8 @@ class Stock2View(View):
                     form_data[f'comparison_{i}'] = request.POST.get(f'comparison_{i}', 'above')
                     form_data[f'priority_{i}'] = request.POST.get(f'priority_{i}', 'none')
 
-            # 언어 정보도 저장
-            form_data['language'] = lang_code
-
-            # 세션에 저장
-            request.session['form_data_for_calculation'] = form_data
-
-            # 결과 페이지로 리다이렉트
-            return redirect('stock2_result')
+            # 입력값을 쿼리 스트링에 담아 결과 페이지로 리다이렉트 (세션에 쓰지 않음)
+            return redirect(result_url(form_data))
 
         except Exception as e:
             return render(request, self.template_name, {
@@ -104,466 +305,308 @@ class Stock2ResultView(View):
     template_name = 'stock2/stock2_result.html'
 
     def get(self, request):
-        """GET 요청: 계산 결과 표시"""
+        """GET 요청: 계산 결과 표시
+
+        입력값은 쿼리 스트링에서 읽으므로 결과는 URL 과 데이터 버전만으로 정해진다.
+        ETag 는 정규화한 입력값과 티커별 data_version/마지막 가격 날짜로 만들어, 새 데이터가
+        들어오기 전까지는 프록시나 브라우저 캐시가 304 로 응답할 수 있다. 304 로 응답할 때도
+        오래된 티커는 갱신을 예약하고, 데이터가 없는 티커가 있으면 304 대신 계산한다.
+        """
         try:
             # 언어 설정
             lang_code = set_language_from_url(request)
 
-            # 환율 설정 (언어에 따라 다르게 처리)
-            exchange_rate = 1400.0 if lang_code == 'ko' else 1.0
-
-            # 세션에서 저장된 입력값 가져오기
-            form_data = request.session.get('form_data_for_calculation', {})
+            form_data = self.load_form_data(request, lang_code)
             if not form_data:
                 return redirect('stock2')
 
             # 입력값 추출
-            ticker = form_data.get('ticker', '').upper()
-            ticker2 = form_data.get('investment_ticker_2', '').upper()
+            inputs = parse_form_data(form_data, lang_code)
+            saved_lang = inputs['language']
 
-            # 저장된 언어 정보 사용
-            saved_lang = form_data.get('language', 'ko')
+            missing = self.queue_stale(self.input_tickers(inputs))
+            if not missing:
+                etag = self.result_etag(inputs)
+                not_modified = get_conditional_response(request, etag=etag)
+                if not_modified is not None:
+                    return self.add_cache_headers(not_modified, etag)
 
-            # 언어에 따라 금액 처리
-            if lang_code == 'ko':
-                # 한국어인 경우 원화를 달러로 변환
-                initial_capital = float(form_data.get('initial_capital', '0')) / exchange_rate
-                monthly_investment = float(form_data.get('monthly_investment', '0')) / exchange_rate
-                monthly_investment2 = float(form_data.get('monthly_investment_2', '0')) / exchange_rate
-
-            else:
-                # 영어인 경우 그대로 사용
-                initial_capital = float(form_data.get('initial_capital', 0))
-                monthly_investment = float(form_data.get('monthly_investment', 0))
-                monthly_investment2 = float(form_data.get('monthly_investment_2', 0))
-
-
-            start_date = datetime.strptime(form_data.get('start_date'), '%Y-%m-%d').date()
-            end_date = datetime.strptime(form_data.get('end_date'), '%Y-%m-%d').date()
-
-            # 조건 설정 처리
-            conditions = []
-            for i in range(1, 4):
-                condition_ticker = form_data.get(f'condition_ticker_{i}', '').upper()
-                if condition_ticker:
-                    condition_type = form_data.get(f'condition_type_{i}', 'specific')
-                    percent = float(form_data.get(f'percent_{i}', 0))
-                    comparison = form_data.get(f'comparison_{i}', 'above')
-                    priority = form_data.get(f'priority_{i}', 'none')
-
-                    conditions.append({
-                        'ticker': condition_ticker,
-                        'type': condition_type,
-                        'percent': percent,
-                        'comparison': comparison,
-                        'priority': priority
-                    })
-
-            # 모든 티커 데이터 최신화
-            all_tickers = set()
-            all_tickers.add(ticker)
-            if ticker2:
-                all_tickers.add(ticker2)
-            for condition in conditions:
-                all_tickers.add(condition['ticker'])
-
-            for t in all_tickers:
-                if t:  # 빈 문자열 방지
-                    self.update_stock_data_optimized2(t)
-                    # 전고점 대비 하락 조건이 있는 티커만 전고점 업데이트
-                    if any(cond['type'] == 'high' and cond['ticker'] == t for cond in conditions):
-                        self.update_all_time_high(t)
-
-            # 투자 시뮬레이션 실행 (달러 기준)
-            result = self.run_investment_simulation(
-                ticker, ticker2, initial_capital, monthly_investment, monthly_investment2,
-                start_date, end_date, conditions, saved_lang
-            )
+            # 시뮬레이션 실행 (달러 기준)
+            result = self.simulate(inputs, missing)
 
             # 결과에 입력값과 언어 정보 추가
             result['form_data'] = form_data
             result['current_language'] = lang_code
             result['saved_language'] = saved_lang
 
-            return render(request, self.template_name, result)
+            with timing.span(timing.RENDER):
+                response = render(request, self.template_name, result)
+            # 시뮬레이션 중 데이터가 새로 들어왔을 수 있으므로 다시 계산
+            return self.add_cache_headers(response, self.result_etag(inputs))
 
         except Exception as e:
             return render(request, 'stock2/stock2.html', {
                 'error': f'계산 중 오류가 발생했습니다: {str(e)}'
             })
 
-    def post(self, request):
-        """POST 요청: 입력값 유지 요청 처리"""
-        # 입력값 유지 체크박스 확인
-        save_inputs = request.POST.get('save_inputs') == 'on'
-
-        if save_inputs:
-            # 세션에서 입력값 가져와서 저장
-            form_data = request.session.get('form_data_for_calculation', {})
-            request.session['saved_form_data'] = form_data
+    def load_form_data(self, request, lang_code):
+        """쿼리 스트링의 입력값 (없으면 None)"""
+        if not request.GET:
+            return None
+        form_data = normalize_form_data(request.GET)
+        form_data['language'] = lang_code
+        return form_data
+
+    def result_etag(self, inputs):
+        """입력값 + 관련 티커 데이터 버전으로 만든 ETag"""
+        params = dict(inputs, conditions=result_cache.normalize_conditions(inputs['conditions']))
+        tickers = [inputs['ticker'], inputs['ticker2']] + [c['ticker'] for c in inputs['conditions']]
+        return '"%s"' % result_cache.make_key('stock2-page', params, tickers).rsplit(':', 1)[-1][:32]
+
+    def add_cache_headers(self, response, etag):
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True,
+            max_age=getattr(settings, 'STOCK2_RESULT_MAX_AGE', DEFAULT_RESULT_MAX_AGE)
+        )
+        return response
 
-        # 입력 페이지로 리다이렉트
-        return redirect('stock2')
-
-    # 아래 메서드들은 기존과 동일 (update_stock_data_optimized2, update_all_time_high,
-    # check_condition, run_investment_simulation, get_stock_price)
-    # ...
+    def post(self, request):
+        """POST 요청 (입력 값 유지): 결과 URL 의 입력값을 쿼리 스트링에 담아 입력 페이지로 리다이렉트"""
+        target = reverse('stock2')
+        if request.POST.get('save_inputs') != 'on':
+            return redirect(target)
 
-    def update_stock_data_optimized2(self, ticker):
-        """Twelve Data API를 사용한 최적화된 주식 데이터 업데이트"""
         try:
-            # 마지막 업데이트 시간 확인
-            last_update = StockData.objects.filter(ticker=ticker).order_by('-updated_at').first()
-
-            if last_update:
-                time_diff = timezone.now() - last_update.updated_at
-                if time_diff < timedelta(hours=18):
-                    return  # 최신 데이터임
-
-            # 기존 데이터의 가장 최근 날짜 확인
-            latest_data = StockData.objects.filter(ticker=ticker).order_by('-date').first()
-
-            # Twelve Data API 설정
-            api_key = "6a14ee0a3a2145aaa74e444093bb63e3"
-
-            if latest_data:
-                # 기존 데이터가 있는 경우: 마지막 데이터 다음날부터 최신 데이터만 가져오기
-                start_date = latest_data.date + timedelta(days=1)
-                # 시작일이 현재보다 미래인 경우 조정
-                if start_date > timezone.now().date():
-                    return 0
-
-                # Twelve Data API 호출 (특정 기간 데이터)
-                url = f"https://api.twelvedata.com/time_series?symbol={ticker}&interval=1day&start_date={start_date.strftime('%Y-%m-%d')}&apikey={api_key}"
-                update_type = "incremental"
-            else:
-                # 처음 데이터를 가져오는 경우: 전체 데이터 가져오기
-                url = f"https://api.twelvedata.com/time_series?symbol={ticker}&interval=1day&outputsize=5000&apikey={api_key}"
-                update_type = "full"
-
-            # API 요청
-            response = requests.get(url)
-            data = response.json()
-
-            if 'values' not in data or not data['values']:
-                return f"{ticker} 데이터가 없습니다."
-
-            new_data = []
-            for value in reversed(data['values']):  # 가장 오래된 데이터부터 처리
-                date = datetime.strptime(value['datetime'], '%Y-%m-%d').date()
-
-                # 기존 데이터보다 새로운 데이터만 추가 (중복 방지)
-                if not latest_data or date > latest_data.date:
-                    new_data.append(StockData(
-                        ticker=ticker,
-                        date=date,
-                        close_price=value['close'],
-                        updated_at=timezone.now()
-                    ))
-
-            # 배치 처리로 저장
-            if new_data:
-                StockData.objects.bulk_create(new_data, ignore_conflicts=True)
-
-            if update_type == "incremental":
-                return f"{ticker} 데이터 증분 업데이트 완료 ({len(new_data)}개 추가)"
-            else:
-                return f"{ticker} 데이터 전체 업데이트 완료 ({len(new_data)}개 저장)"
-
-        except Exception as e:
-            print(f"Update error for {ticker}: {e}")
-            return f"업데이트 실패: {str(e)}"
+            form_data = normalize_form_data(request.GET or request.POST)
+        except ValueError:
+            return redirect(target)
+        return redirect(f"{target}?{urlencode(dict(form_data, save_inputs='on'))}")
+
+    # 시뮬레이션 계산은 simulation 모듈에서 미리 로드한 가격 배열로 수행
+
+    def simulate(self, inputs, missing=None):
+        """입력에 쓰인 티커 데이터를 최신화한 뒤 투자 시뮬레이션 실행 (missing: 이미 확인한 없는 티커)"""
+        all_tickers = self.input_tickers(inputs)
+        self.refresh_tickers(all_tickers, missing)
+
+        for t in all_tickers:
+            # 전고점 대비 하락 조건이 있는 티커만 전고점 업데이트
+            if any(cond['type'] == 'high' and cond['ticker'] == t for cond in inputs['conditions']):
+                with timing.span(timing.ATH, t):
+                    self.update_all_time_high(t)
+
+        with timing.span(timing.SIMULATION):
+            return self.run_investment_simulation(**inputs)
+
+    def input_tickers(self, inputs):
+        """입력에 쓰인 모든 티커 (기본 종목, 추가 적립 종목, 조건 티커)"""
+        all_tickers = set()
+        all_tickers.add(inputs['ticker'])
+        if inputs['ticker2']:
+            all_tickers.add(inputs['ticker2'])
+        for condition in inputs['conditions']:
+            all_tickers.add(condition['ticker'])
+
+        all_tickers.discard('')  # 빈 문자열 방지
+        return all_tickers
+
+    def refresh_tickers(self, tickers, missing=None):
+        """여러 티커 데이터 확인
+
+        오래된 티커는 갱신 예약만 하고, 데이터가 없는 티커는 묶음 요청을 동시에 보낸 뒤
+        한 번에 저장한다 (가장 느린 요청 하나 만큼만 기다림). 다른 요청이 이미 내려받고
+        있는 티커는 다시 요청하지 않고 그 갱신이 끝나기를 기다린다. missing 을 주면 이미
+        queue_stale 로 확인한 것으로 본다.
+        """
+        if missing is None:
+            missing = self.queue_stale(tickers)
+        if not missing:
+            return {}
+
+        owned = refresh_lock.acquire_many(missing)
+        try:
+            # 임대를 얻기 직전에 다른 요청이 저장을 마쳤을 수 있으므로 다시 확인
+            still_missing = [t for t in owned if refresh.data_state(t) == refresh.MISSING]
+            stored = self.fetch_missing(still_missing, owned) if still_missing else {}
+        finally:
+            refresh_lock.release_many(owned)
+
+        for ticker in missing:
+            if ticker not in owned:
+                refresh_lock.wait(ticker)
+        return stored
+
+    def fetch_missing(self, missing, owned):
+        """데이터가 없는 티커를 묶음 요청으로 동시에 내려받아 한 번에 저장
+
+        제한 시간이 지나도 실행 중인 묶음의 티커는 owned 에서 빼고 요청이 끝날 때 임대를 푼다.
+        """
+        # 티커를 묶음 요청 단위로 나눠 동시에 요청
+        batch_size = twelvedata.get_client().batch_size
+        batches = [tuple(missing[i:i + batch_size]) for i in range(0, len(missing), batch_size)]
+
+        results, running = refresh.fetch_concurrently(fetch_twelve_data_batch, batches, twelvedata.PROVIDER)
+        refresh.release_when_done(running, owned)
+
+        fetched = {}
+        for rows_by_ticker in results.values():
+            fetched.update(rows_by_ticker)
+        return ingestion.store_price_rows(fetched)
+
+    def queue_stale(self, tickers):
+        """오래된 티커는 갱신 예약, 데이터가 없는 티커 목록 반환"""
+        missing = []
+        for ticker in tickers:
+            state = refresh.data_state(ticker)
+            if state == refresh.STALE:
+                refresh.request_refresh(ticker, refresh.SOURCE_TWELVE_DATA)
+            elif state == refresh.MISSING:
+                missing.append(ticker)
+        return missing
 
     def update_all_time_high(self, ticker):
-        """전고점 데이터 업데이트"""
-        # 마지막 업데이트 시간 확인
-        last_update = AllTimeHigh.objects.filter(ticker=ticker).order_by('-updated_at').first()
+        """전고점 데이터 업데이트
 
-        if last_update:
-            time_diff = timezone.now() - last_update.updated_at
-            if time_diff < timedelta(hours=18):
-                return  # 최신 데이터임
-
-        # 해당 티커의 모든 주가 데이터 가져오기 (날짜순 정렬)
-        stock_data = StockData.objects.filter(ticker=ticker).order_by('date')
-
-        if not stock_data:
+        시뮬레이션은 종가 배열에서 전고점을 바로 계산하므로, 테이블 저장은
+        STOCK2_PERSIST_ALL_TIME_HIGH 설정을 켠 경우에만 증분으로 수행한다.
+        """
+        if not getattr(settings, 'STOCK2_PERSIST_ALL_TIME_HIGH', False):
             return
 
-        # pandas로 전고점 계산
-        dates = []
-        close_prices = []
+        return all_time_high.persist_all_time_high(ticker)
 
-        for data in stock_data:
-            dates.append(data.date)
-            close_prices.append(float(data.close_price))
+    def run_investment_simulation(self, ticker, ticker2, initial_capital, monthly_investment,
+                                  monthly_investment2, start_date, end_date, conditions, language='en'):
+        """투자 시뮬레이션 실행 (언어에 따라 통화 처리, 같은 입력과 데이터 버전이면 캐시 사용)"""
+        params = {
+            'ticker': ticker,
+            'ticker2': ticker2,
+            'initial_capital': initial_capital,
+            'monthly_investment': monthly_investment,
+            'monthly_investment2': monthly_investment2,
+            'start_date': start_date,
+            'end_date': end_date,
+            'conditions': result_cache.normalize_conditions(conditions),
+            'language': language,
+        }
+        tickers = [ticker, ticker2] + [c['ticker'] for c in conditions]
 
-        df = pd.DataFrame({'date': dates, 'close_price': close_prices})
-        df['all_time_high'] = df['close_price'].expanding().max()
+        return result_cache.get_or_compute('stock2', params, tickers, lambda: simulation.run_investment_simulation(
+            ticker, ticker2, initial_capital, monthly_investment, monthly_investment2,
+            start_date, end_date, conditions, language
+        ))
 
-        # 전고점 데이터 저장
-        new_records = []
-        for _, row in df.iterrows():
-            # 이미 존재하는 데이터는 건너뛰기
-            if not AllTimeHigh.objects.filter(ticker=ticker, date=row['date']).exists():
-                new_records.append(AllTimeHigh(
-                    ticker=ticker,
-                    date=row['date'],
-                    high_price=row['all_time_high'],
-                    updated_at=timezone.now()
-                ))
 
-        if new_records:
-            AllTimeHigh.objects.bulk_create(new_records)
+class Stock2ResultAsyncView(Stock2ResultView):
+    """Stock2ResultView 의 비동기 버전 (settings.ASYNC_VIEWS 를 켜면 사용)
 
-        return f"{ticker} 전고점 데이터 업데이트 완료 ({len(new_records)}개 추가)"
+    데이터가 없는 티커는 httpx 비동기 요청으로 동시에 내려받고, DB 작업과 렌더링은
+    sync_to_async 로 처리하므로 다운로드를 기다리는 동안에도 워커가 다른 요청을 처리한다.
+    """
 
-    def check_condition(self, condition, date):
-        """조건 확인"""
-        ticker = condition['ticker']
+    async def get(self, request):
+        """GET 요청: 계산 결과 표시"""
+        try:
+            # 언어 설정
+            lang_code = set_language_from_url(request)
 
-        # 해당 날짜의 주가 조회 (가장 가까운 날짜의 데이터)
-        stock_data = StockData.objects.filter(
-            ticker=ticker, date__lte=date
-        ).order_by('-date').first()
+            form_data = self.load_form_data(request, lang_code)
+            if not form_data:
+                return redirect('stock2')
 
-        if not stock_data:
-            return False
+            # 입력값 추출
+            inputs = parse_form_data(form_data, lang_code)
+            saved_lang = inputs['language']
 
-        current_price = float(stock_data.close_price)
+            missing = await sync_to_async(self.queue_stale)(self.input_tickers(inputs))
+            if not missing:
+                etag = await sync_to_async(self.result_etag)(inputs)
+                not_modified = get_conditional_response(request, etag=etag)
+                if not_modified is not None:
+                    return self.add_cache_headers(not_modified, etag)
 
-        if condition['type'] == 'specific':
-            target_price = condition['percent']
+            # 시뮬레이션 실행 (달러 기준)
+            result = await self.asimulate(inputs, missing)
 
-            if condition['comparison'] == 'above':
-                return current_price >= target_price
-            else:  # below
-                return current_price <= target_price
+            # 결과에 입력값과 언어 정보 추가
+            result['form_data'] = form_data
+            result['current_language'] = lang_code
+            result['saved_language'] = saved_lang
 
-        elif condition['type'] == 'high':  # 전고점 대비 하락
-            # 해당 날짜의 전고점 조회 (가장 가까운 날짜의 전고점)
-            all_time_high_data = AllTimeHigh.objects.filter(
-                ticker=ticker, date__lte=date
-            ).order_by('-date').first()
+            with timing.span(timing.RENDER):
+                response = await sync_to_async(render)(request, self.template_name, result)
+            return self.add_cache_headers(response, await sync_to_async(self.result_etag)(inputs))
 
-            if not all_time_high_data:
-                return False
+        except Exception as e:
+            return await sync_to_async(render)(request, 'stock2/stock2.html', {
+                'error': f'계산 중 오류가 발생했습니다: {str(e)}'
+            })
 
-            all_time_high = float(all_time_high_data.high_price)
-            # 전고점 대비 하락 계산: 주가 <= 전고점 * (100 - percent) / 100
-            target_price = all_time_high * (100 - condition['percent']) / 100
+    async def post(self, request):
+        """POST 요청: 입력값 유지 요청 처리 (DB/세션을 쓰지 않으므로 그대로 호출)"""
+        return super().post(request)
 
-            return current_price <= target_price
+    async def asimulate(self, inputs, missing=None):
+        """simulate 의 비동기 버전"""
+        all_tickers = self.input_tickers(inputs)
+        await self.arefresh_tickers(all_tickers, missing)
 
-        return False
+        for t in all_tickers:
+            if any(cond['type'] == 'high' and cond['ticker'] == t for cond in inputs['conditions']):
+                with timing.span(timing.ATH, t):
+                    await sync_to_async(self.update_all_time_high)(t)
 
-    def run_investment_simulation(self, ticker, ticker2, initial_capital, monthly_investment,
-                                  monthly_investment2, start_date, end_date, conditions, language='en'):
-        """투자 시뮬레이션 실행 (언어에 따라 통화 처리)"""
-        # 언어에 따라 환율 설정
-        exchange_rate = 1400.0 if language == 'ko' else 1.0
-
-        # 모든 계산은 달러 기준으로 수행
-        cash_usd = initial_capital  # 이미 달러로 변환됨
-        shares_held = {}
-        if ticker:
-            shares_held[ticker] = 0
-        if ticker2:
-            shares_held[ticker2] = 0
-
-        total_investment = initial_capital  # 달러 기준
-        records = []
-
-        # 우선순위별 조건 분류
-        priority_conditions = {}
-        for condition in conditions:
-            if condition['priority'] != 'none':
-                priority = int(condition['priority'])
-                if priority not in priority_conditions:
-                    priority_conditions[priority] = []
-                priority_conditions[priority].append(condition)
-
-        # 시작일의 일자가 28일을 넘으면 28일로 조정
-        investment_day = min(start_date.day, 28)
-
-        # 투자 시뮬레이션
-        current_date = start_date
-        while current_date <= end_date:
-            # 해당 월의 구매일 설정 (28일 이하로 제한)
-            try:
-                # 현재 월의 마지막 날 확인
-                next_month = current_date.replace(day=1) + relativedelta(months=1)
-                last_day_of_month = next_month - timedelta(days=1)
+        with timing.span(timing.SIMULATION):
+            return await sync_to_async(self.run_investment_simulation)(**inputs)
 
-                # 실제 구매일 결정 (28일 또는 월말 중 작은 값)
-                actual_investment_day = min(investment_day, last_day_of_month.day)
-                investment_date = current_date.replace(day=actual_investment_day)
+    async def arefresh_tickers(self, tickers, missing=None):
+        """refresh_tickers 의 비동기 버전 (제한 시간 안에 끝난 묶음 요청만 저장)"""
+        if missing is None:
+            missing = await sync_to_async(self.queue_stale)(tickers)
+        if not missing:
+            return {}
 
-            except ValueError:
-                # 날짜 설정 실패 시 월말로 설정
-                investment_date = current_date.replace(day=1) + relativedelta(months=1) - timedelta(days=1)
-
-            if investment_date > end_date:
-                break
-
-            # 월적립액 추가 (달러 기준)
-            cash_usd += monthly_investment + monthly_investment2
-            total_investment += monthly_investment + monthly_investment2
-
-            # 조건에 따른 주식 구매
-            purchased = False
-
-            # 우선순위 순으로 조건 확인
-            for priority in sorted(priority_conditions.keys()):
-                for condition in priority_conditions[priority]:
-                    if self.check_condition(condition, investment_date):
-                        condition_ticker = condition['ticker']
-                        stock_price = self.get_stock_price(condition_ticker, investment_date)
-
-                        if stock_price:
-                            # 주가는 달러 기준이므로 그대로 사용
-                            shares_to_buy = int(cash_usd // stock_price)  # 소수점 제거
-
-                            if shares_to_buy > 0:
-                                if condition_ticker not in shares_held:
-                                    shares_held[condition_ticker] = 0
-
-                                shares_held[condition_ticker] += shares_to_buy
-                                purchase_amount = shares_to_buy * stock_price
-                                cash_usd -= purchase_amount
-                                purchased = True
-
-                                # 기록 시 통화 변환
-                                purchase_amount_converted = purchase_amount * exchange_rate if language == 'ko' else purchase_amount
-                                cash_converted = cash_usd * exchange_rate if language == 'ko' else cash_usd
-
-                                records.append({
-                                    'date': investment_date.strftime('%Y-%m-%d'),
-                                    'action': f"{condition_ticker} (우선순위{priority})" if language == 'ko' else f"{condition_ticker} (priority {priority})" ,
-                                    'price': round(stock_price, 2),
-                                    'shares_bought': shares_to_buy,
-                                    'shares_held': shares_held[condition_ticker],
-                                    'purchase_amount': round(purchase_amount_converted, 0),
-                                    'cash': round(cash_converted, 0),
-                                    'currency': 'KRW' if language == 'ko' else 'USD',
-                                })
-                                break
-                if purchased:
-                    break
-
-            # 조건에 맞는 종목이 없으면 기본 종목 구매
-            if not purchased:
-                # 첫 번째 종목 구매
-                if ticker and monthly_investment > 0:
-                    stock_price1 = self.get_stock_price(ticker, investment_date)
-                    if stock_price1:
-                        shares_to_buy1 = int((cash_usd * (monthly_investment / (
-                                    monthly_investment + monthly_investment2))) // stock_price1) if (
-                                                                                                                monthly_investment + monthly_investment2) > 0 else 0
-
-                        if shares_to_buy1 > 0:
-                            shares_held[ticker] += shares_to_buy1
-                            purchase_amount1 = shares_to_buy1 * stock_price1
-                            cash_usd -= purchase_amount1
-
-                            purchase_amount1_converted = purchase_amount1 * exchange_rate if language == 'ko' else purchase_amount1
-                            cash_converted = cash_usd * exchange_rate if language == 'ko' else cash_usd
-
-                            records.append({
-                                'date': investment_date.strftime('%Y-%m-%d'),
-                                'action': f"{ticker}",
-                                'price': round(stock_price1, 2),
-                                'shares_bought': shares_to_buy1,
-                                'shares_held': shares_held[ticker],
-                                'purchase_amount': round(purchase_amount1_converted, 0),
-                                'cash': round(cash_converted, 0),
-                                'currency': 'KRW' if language == 'ko' else 'USD',
-                            })
-
-                # 두 번째 종목 구매
-                if ticker2 and monthly_investment2 > 0:
-                    stock_price2 = self.get_stock_price(ticker2, investment_date)
-                    if stock_price2 and cash_usd > 0:
-                        shares_to_buy2 = int(cash_usd // stock_price2)
-
-                        if shares_to_buy2 > 0:
-                            shares_held[ticker2] += shares_to_buy2
-                            purchase_amount2 = shares_to_buy2 * stock_price2
-                            cash_usd -= purchase_amount2
-
-                            purchase_amount2_converted = purchase_amount2 * exchange_rate if language == 'ko' else purchase_amount2
-                            cash_converted = cash_usd * exchange_rate if language == 'ko' else cash_usd
-
-                            records.append({
-                                'date': investment_date.strftime('%Y-%m-%d'),
-                                'action': f"{ticker2}",
-                                'price': round(stock_price2, 2),
-                                'shares_bought': shares_to_buy2,
-                                'shares_held': shares_held[ticker2],
-                                'purchase_amount': round(purchase_amount2_converted, 0),
-                                'cash': round(cash_converted, 0),
-                                'currency': 'KRW' if language == 'ko' else 'USD',
-                            })
-
-            # 다음 달로 이동
-            current_date = current_date.replace(day=1) + relativedelta(months=1)
-
-        # 최종 결과 계산
-        final_stock_value = 0
-        ticker_details = {}
-
-        for t, shares in shares_held.items():
-            end_price = self.get_stock_price(t, end_date)
-            if end_price:
-                ticker_value = shares * end_price  # 달러 기준
-                final_stock_value += ticker_value
-
-                # 통화 변환
-                ticker_value_converted = ticker_value * exchange_rate if language == 'ko' else ticker_value
-                end_price_converted = end_price * exchange_rate if language == 'ko' else end_price
-
-                ticker_details[t] = {
-                    'shares': int(shares),
-                    'value': round(ticker_value_converted, 0),
-                    'price': round(end_price_converted, 2),
-                    'value_usd': round(ticker_value, 2),
-                    'price_usd': round(end_price, 2)
-                }
-
-        # 통화 변환
-        final_stock_value_converted = final_stock_value * exchange_rate if language == 'ko' else final_stock_value
-        cash_converted = cash_usd * exchange_rate if language == 'ko' else cash_usd
-        total_investment_converted = total_investment * exchange_rate if language == 'ko' else total_investment
-
-        final_total_assets = final_stock_value + cash_usd
-        final_total_assets_converted = final_total_assets * exchange_rate if language == 'ko' else final_total_assets
-
-        final_profit_rate = ((
-                                         final_total_assets - total_investment) / total_investment) * 100 if total_investment > 0 else 0
-        final_profit_amount = final_total_assets - total_investment
-        final_profit_amount_converted = final_profit_amount * exchange_rate if language == 'ko' else final_profit_amount
-
-        return {
-            'records': records,
-            'final_result': {
-                'final_stock_value': round(final_stock_value_converted, 0),
-                'final_cash': round(cash_converted, 0),
-                'final_total_assets': round(final_total_assets_converted, 0),
-                'final_total_investment': round(total_investment_converted, 0),
-                'final_profit_rate': round(final_profit_rate, 2),
-                'final_profit_amount': round(final_profit_amount_converted, 0),
-                'shares_held': shares_held,
-                'ticker_details': ticker_details,
-                'currency': 'KRW' if language == 'ko' else 'USD',
-                'exchange_rate': exchange_rate if language == 'ko' else 1.0
-            }
+        owned = await sync_to_async(refresh_lock.acquire_many)(missing)
+        try:
+            still_missing = await sync_to_async(
+                lambda: [t for t in owned if refresh.data_state(t) == refresh.MISSING]
+            )()
+            stored = await self.afetch_missing(still_missing) if still_missing else {}
+        finally:
+            await sync_to_async(refresh_lock.release_many)(owned)
+
+        for ticker in missing:
+            if ticker not in owned:
+                await refresh_lock.await_release(ticker)
+        return stored
+
+    async def afetch_missing(self, missing):
+        """fetch_missing 의 비동기 버전"""
+        client = twelvedata.get_async_client()
+
+        async def fetch(batch):
+            with timing.span(timing.FETCH, ','.join(batch)):
+                return await client.time_series(batch)
+
+        tasks = {
+            asyncio.ensure_future(fetch(batch)): batch
+            for batch in twelvedata.batches(missing, client.batch_size)
         }
-
-    def get_stock_price(self, ticker, date):
-        """특정 날짜의 주가 조회"""
-        stock_data = StockData.objects.filter(
-            ticker=ticker, date__lte=date
-        ).order_by('-date').first()
-
-
-        return float(stock_data.close_price) if stock_data else None
+        deadline = getattr(settings, 'PRICE_FETCH_DEADLINE', refresh.DEFAULT_FETCH_DEADLINE)
+        done, not_done = await asyncio.wait(tasks, timeout=deadline)
+
+        # 시간 안에 끝나지 않은 요청은 취소가 끝날 때까지 기다린 뒤 임대를 푼다
+        for task in not_done:
+            task.cancel()
+            refresh.record_fetch_error(twelvedata.PROVIDER, tasks[task], '제한 시간 초과')
+        if not_done:
+            await asyncio.wait(not_done)
+
+        fetched = {}
+        for task in done:
+            try:
+                fetched.update(task.result())
+            except Exception as e:
+                refresh.record_fetch_error(twelvedata.PROVIDER, tasks[task], e)
+        return await sync_to_async(ingestion.store_price_rows)(fetched)